@@ -0,0 +1,103 @@
+"""
+Benchmark: float64 vs float32 抽样/求值的峰值内存与精度
+
+对一个 d 个假设的模型 (两两相乘再求和)，分别以 dtype="float64" / "float32"
+运行一次 Monte Carlo，统计:
+- 峰值常驻内存 (peak RSS，每个配置在独立子进程中运行，互不干扰)
+- 耗时
+- 各分位数相对 float64 的漂移 (同一 seed，抽样序列相同，差异只来自精度)
+
+另外可用 --chunk-size 对比分块流式模式 (keep_raw=False) 的峰值内存。
+
+运行:
+    python examples/benchmark_precision.py
+    python examples/benchmark_precision.py --assumptions 40 --n 10000000
+    python examples/benchmark_precision.py --chunk-size 1000000
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+PERCENTILES = (5, 50, 95)
+
+
+def build_model(d: int):
+    """d 个假设，相邻两两相乘后求和 (公式字符串，向量化求值)"""
+    from scripts.monte_carlo import Assumption
+    assumptions = {
+        f"x{i}": Assumption(min=0.5 + i % 3, most_likely=1.0 + i % 3, max=2.0 + i % 3)
+        for i in range(d)
+    }
+    terms = [f"x{i}*x{i + 1}" for i in range(0, d - 1, 2)]
+    if d % 2:
+        terms.append(f"x{d - 1}")
+    return assumptions, " + ".join(terms)
+
+
+def run_once(d: int, n: int, dtype: str, chunk_size) -> dict:
+    """子进程入口: 运行一次模拟，输出分位数、耗时与峰值 RSS"""
+    from scripts.monte_carlo import MonteCarloSimulator
+    assumptions, formula = build_model(d)
+    start = time.perf_counter()
+    result = MonteCarloSimulator(seed=42).run(
+        assumptions, formula, n_simulations=n, run_sensitivity=False,
+        dtype=dtype, chunk_size=chunk_size, keep_raw=chunk_size is None,
+    )
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Linux 单位为 KB
+    return {
+        "percentiles": [result.get_percentile(p) for p in PERCENTILES],
+        "mean": result.mean,
+        "time": elapsed,
+        "peak_mb": peak_kb / 1024 if sys.platform != "darwin" else peak_kb / 1024 / 1024,
+    }
+
+
+def measure(d: int, n: int, dtype: str, chunk_size) -> dict:
+    """在独立子进程中运行，避免不同配置的内存峰值互相影响"""
+    cmd = [sys.executable, __file__, "--worker", dtype, "--assumptions", str(d), "--n", str(n)]
+    if chunk_size:
+        cmd += ["--chunk-size", str(chunk_size)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run_benchmark(d: int, n: int, chunk_size):
+    mode = f"分块 {chunk_size:,} (keep_raw=False)" if chunk_size else "整块 (keep_raw=True)"
+    print("=" * 78)
+    print(f"模型: {d} 个假设 × {n:,} 次模拟  |  {mode}")
+    print(f"理论样本内存: float64 {d * n * 8 / 2**20:,.0f} MB / float32 {d * n * 4 / 2**20:,.0f} MB")
+    print("=" * 78)
+
+    stats = {dtype: measure(d, n, dtype, chunk_size) for dtype in ("float64", "float32")}
+    base = stats["float64"]
+    print(f"{'dtype':>8} {'峰值 RSS':>12} {'耗时':>9} " + " ".join(f"{'P' + str(p):>14}" for p in PERCENTILES))
+    for dtype, s in stats.items():
+        print(f"{dtype:>8} {s['peak_mb']:>9,.0f} MB {s['time']:>8.2f}s "
+              + " ".join(f"{v:>14.6f}" for v in s["percentiles"]))
+
+    drift = [abs(a - b) / abs(b) for a, b in zip(stats["float32"]["percentiles"], base["percentiles"])]
+    mean_drift = abs(stats["float32"]["mean"] - base["mean"]) / abs(base["mean"])
+    print()
+    print(f"峰值内存节省: {1 - stats['float32']['peak_mb'] / base['peak_mb']:.1%}")
+    print("float32 相对漂移: " + "  ".join(f"P{p} {x:.2e}" for p, x in zip(PERCENTILES, drift))
+          + f"  均值 {mean_drift:.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="float64 / float32 峰值内存与精度对比")
+    parser.add_argument("--assumptions", type=int, default=40, help="假设个数")
+    parser.add_argument("--n", type=int, default=2_000_000, help="模拟次数")
+    parser.add_argument("--chunk-size", type=int, default=None, help="分块大小 (默认整块)")
+    parser.add_argument("--worker", choices=["float64", "float32"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_once(args.assumptions, args.n, args.worker, args.chunk_size)))
+    else:
+        run_benchmark(args.assumptions, args.n, args.chunk_size)
@@ -0,0 +1,96 @@
+"""
+Benchmark: 抽样方式收敛速度对比 (random / lhs / sobol)
+
+对两个示例模型，在不同模拟次数下各重复运行 R 次，
+统计 P5 / P50 / P95 估计值在重复之间的标准差 (即 Monte Carlo 误差)。
+
+效率倍数 = (random 的标准差 / 该方式的标准差)²
+含义：伪随机抽样需要多少倍的模拟次数才能达到相同精度。
+
+模型:
+1. 航空活塞发动机 (monte_carlo.py 示例，3 个假设)
+2. 中国 AI 客服软件 (run_ai_cs_market_sizing.py，6 个假设)
+
+运行:
+    python examples/benchmark_sampling_convergence.py
+    python examples/benchmark_sampling_convergence.py --repeats 100 --sizes 256 1024 4096
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from scripts.monte_carlo import MonteCarloSimulator, Assumption, QMC_AVAILABLE
+
+
+MODELS = {
+    "航空活塞发动机": (
+        {
+            "market_total": Assumption(min=20, max=35, most_likely=25.5),
+            "hp_share": Assumption(min=0.35, max=0.55, most_likely=0.45),
+            "target_share": Assumption(min=0.10, max=0.20, most_likely=0.15),
+        },
+        lambda market_total, hp_share, target_share: market_total * hp_share * target_share,
+    ),
+    "AI 客服软件": (
+        {
+            "ka_vol":    Assumption(min=3500,    most_likely=4250,    max=4800),
+            "ka_price":  Assumption(min=1.0e6,   most_likely=1.5e6,   max=2.0e6),
+            "mid_vol":   Assumption(min=80_000,  most_likely=120_000, max=160_000),
+            "mid_price": Assumption(min=30_000,  most_likely=50_000,  max=80_000),
+            "smb_vol":   Assumption(min=500_000, most_likely=800_000, max=1_200_000),
+            "smb_price": Assumption(min=1000,    most_likely=3000,    max=5000),
+        },
+        lambda ka_vol, ka_price, mid_vol, mid_price, smb_vol, smb_price: (
+            ka_vol * ka_price + mid_vol * mid_price + smb_vol * smb_price
+        ) / 1e8,
+    ),
+}
+
+PERCENTILES = (5, 50, 95)
+
+
+def measure(assumptions, formula, sampling: str, n: int, repeats: int) -> dict:
+    """重复运行 repeats 次，返回各分位数估计值的标准差与耗时"""
+    estimates = np.empty((repeats, len(PERCENTILES)))
+    start = time.perf_counter()
+    for r in range(repeats):
+        sim = MonteCarloSimulator(seed=r)
+        result = sim.run(assumptions, formula, n_simulations=n, run_sensitivity=False, sampling=sampling)
+        estimates[r] = np.percentile(result.raw_results, PERCENTILES)
+    elapsed = (time.perf_counter() - start) / repeats
+    return {"std": estimates.std(axis=0, ddof=1), "time": elapsed}
+
+
+def run_benchmark(sizes, repeats: int):
+    modes = ["random", "lhs"] + (["sobol"] if QMC_AVAILABLE else [])
+    if not QMC_AVAILABLE:
+        print("⚠️ 未安装 scipy，跳过 sobol 抽样 (pip install scipy)\n")
+
+    for model_name, (assumptions, formula) in MODELS.items():
+        print("=" * 78)
+        print(f"模型: {model_name}  (重复 {repeats} 次)")
+        print("=" * 78)
+        print(f"{'n':>8} {'抽样':>7} {'σ(P5)':>12} {'σ(P50)':>12} {'σ(P95)':>12} {'效率倍数 P5/P95':>18} {'单次耗时':>10}")
+
+        for n in sizes:
+            stats = {mode: measure(assumptions, formula, mode, n, repeats) for mode in modes}
+            base = stats["random"]["std"]
+            for mode in modes:
+                std = stats[mode]["std"]
+                gain = (base / std) ** 2
+                print(f"{n:>8,} {mode:>7} {std[0]:>12.4g} {std[1]:>12.4g} {std[2]:>12.4g} "
+                      f"{gain[0]:>8.1f}x / {gain[2]:>5.1f}x {stats[mode]['time'] * 1000:>8.1f}ms")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo 抽样方式收敛速度对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 2048, 8192, 32768],
+                        help="模拟次数列表 (sobol 抽样建议使用 2 的幂)")
+    parser.add_argument("--repeats", type=int, default=40, help="每个配置的重复次数")
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.repeats)
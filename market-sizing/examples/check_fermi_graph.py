@@ -0,0 +1,95 @@
+"""
+检查 FermiGraph 与 FermiCalculator 的五种方法结果一致
+
+- 新建图的 result() 与 FermiCalculator 同名方法的 FermiResult 完全相同 (值、步骤、公式、假设)
+- 带 prefix 的多段图中，单段输出的结果同样一致
+- set() 修改输入后重新渲染的结果，与用新参数直接调用 FermiCalculator 一致
+- 非法输入的报错信息一致；grid 的向量化结果与标量方法数值一致
+
+运行: python examples/check_fermi_graph.py
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from fermi_calculator import FermiCalculator, NUMPY_AVAILABLE
+from fermi_graph import FermiGraph
+
+
+# (方法名, 参数, what-if 修改 {参数名: 新值})
+CASES = [
+    ("population_based", dict(base_population=1.4e9, filters=[("城市人口", 0.65), ("咖啡饮用者", 0.15)],
+                              penetration_rate=0.5, average_spend=30, frequency=52,
+                              assumptions_sources={"渗透率": "问卷"}),
+     {"penetration_rate": 0.4}),
+    ("institution_based", dict(institution_count=5000, adoption_rate=0.85, units_per_institution=2,
+                               price_per_unit=1.5e6, unit="美元"),
+     {"adoption_rate": 0.9}),
+    ("substitution_based", dict(existing_market_size=2e10, substitution_rate=0.3),
+     {"price_premium": 1.2}),
+    ("value_chain_based", dict(end_market_size=5e10, value_share=0.12),
+     {"value_share": 0.15}),
+    ("value_based", dict(target_count=1e5, problem_frequency=4, problem_cost=2000, willingness_to_pay_ratio=0.1),
+     {"problem_cost": 2500}),
+]
+
+INVALID = [
+    ("population_based", dict(base_population=1e6, filters=[("城市人口", 1.5)], penetration_rate=0.5, average_spend=1)),
+    ("institution_based", dict(institution_count=5000, adoption_rate=0, units_per_institution=1, price_per_unit=1)),
+]
+
+
+def _error(fn, **kwargs) -> str:
+    try:
+        fn(**kwargs)
+    except ValueError as e:
+        return str(e)
+    return ""
+
+
+def main() -> int:
+    calc = FermiCalculator()
+    failures = []
+    for method, params, what_if in CASES:
+        expected = getattr(calc, method)(**params)
+
+        graph = FermiGraph()
+        single = getattr(graph, method)(**params)
+        if graph.result(single) != expected:
+            failures.append(f"{method}: FermiGraph().result() 与 FermiCalculator 不一致")
+
+        segments = FermiGraph()
+        output = getattr(segments, method)(**params, prefix="a")
+        getattr(segments, method)(**params, prefix="b")
+        if segments.result(output) != expected:
+            failures.append(f"{method}: 带 prefix 的多段图结果不一致")
+
+        for name, value in what_if.items():
+            graph.set(name, value)
+        if graph.result(single) != getattr(calc, method)(**{**params, **what_if}):
+            failures.append(f"{method}: set({what_if}) 后的结果与直接计算不一致")
+
+        if NUMPY_AVAILABLE:
+            grid_params = {k: v for k, v in params.items() if k != "assumptions_sources"}
+            value = float(calc.grid(method, **grid_params).values.ravel()[0])
+            if abs(value - expected.value) > 1e-9 * abs(expected.value):
+                failures.append(f"{method}: grid 值 {value} 与标量方法 {expected.value} 不一致")
+
+    for method, params in INVALID:
+        expected = _error(getattr(calc, method), **params)
+        actual = _error(getattr(FermiGraph(), method), **params)
+        if not expected or actual != expected:
+            failures.append(f"{method}: 报错信息不一致 ({actual!r} / {expected!r})")
+
+    for message in failures:
+        print(f"FAILURE: {message}")
+    if not failures:
+        print(f"SUCCESS: {len(CASES)} 种方法的 FermiGraph 结果与 FermiCalculator 一致")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+检查 Monte Carlo 结果缓存的公式指纹
+
+- 包装不同函数的可调用实例指纹互不相同
+- 同一公式在不同进程 (不同 PYTHONHASHSEED) 中指纹一致
+- convert_units=True (公式被包装为 _ScaledFormula) 时，另一进程重跑同一模型命中缓存
+- Fermi 方法传入 Assumption 时 (公式为 _FermiModel)，另一进程重跑同样命中缓存
+
+运行: python examples/check_result_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from result_cache import formula_fingerprint
+from monte_carlo import Assumption, MonteCarloSimulator
+from fermi_calculator import FermiCalculator
+
+
+class Wrapped:
+    """只有一个属性的可调用实例"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, a):
+        return self.fn(a)
+
+
+FORMULAS = [Wrapped(lambda a: a * 2), Wrapped(lambda a: a * 3), Wrapped(lambda a: a * 4),
+            Wrapped(lambda a: a * 5), Wrapped(lambda a: a * 6)]
+
+
+def fingerprints() -> list:
+    return [formula_fingerprint(f) for f in FORMULAS]
+
+
+def revenue(customers, price):
+    return customers * price
+
+
+def cached_run(cache_dir: str) -> str:
+    """带单位换算的模型跑一次，返回 "命中数 未命中数 中位数" """
+    assumptions = {
+        "customers": Assumption(min=2000, max=8000, most_likely=5000, unit="家"),
+        "price": Assumption(min=5, max=20, most_likely=10, unit="万元"),
+    }
+    sim = MonteCarloSimulator(seed=7, cache=cache_dir)
+    result = sim.run(assumptions, revenue, n_simulations=2000, unit="亿元", convert_units=True)
+    return f"{sim.cache.hits} {sim.cache.misses} {result.median!r}"
+
+
+def cached_fermi(cache_dir: str) -> str:
+    """参数含 Assumption 的 Fermi 估算跑一次，返回 "命中数 未命中数 中位数" """
+    sim = MonteCarloSimulator(seed=7, cache=cache_dir)
+    result = FermiCalculator(n_simulations=2000, simulator=sim).institution_based(
+        institution_count=Assumption(min=3000, max=8000, most_likely=5000),
+        adoption_rate=Assumption(min=0.05, max=0.2, most_likely=0.1),
+        units_per_institution=1,
+        price_per_unit=200_000,
+    )
+    return f"{sim.cache.hits} {sim.cache.misses} {result.distribution.median!r}"
+
+
+def in_subprocess(command: str, hash_seed: str) -> str:
+    """在新进程中以 `python check_result_cache.py <command>` 运行本文件，返回其输出"""
+    env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+    return subprocess.run([sys.executable, __file__, command], env=env, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def main() -> int:
+    failures = []
+    local = fingerprints()
+    if None in local:
+        failures.append("可调用实例无法指纹化")
+    if len(set(local)) != len(local):
+        failures.append(f"不同的包装函数指纹相同: {[f and f[:16] for f in local]}")
+    remote = [in_subprocess("--fingerprints", seed) for seed in ("1", "2")]
+    if not all(r == repr(local) for r in remote):
+        failures.append("跨进程指纹不一致")
+
+    for name, command in (("convert_units 模型", "--cached-run"), ("Fermi 区间估算", "--cached-fermi")):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = in_subprocess(f"{command}={cache_dir}", "1").split()
+            second = in_subprocess(f"{command}={cache_dir}", "2").split()
+        if first[:2] != ["0", "1"] or second[:2] != ["1", "0"] or first[2] != second[2]:
+            failures.append(f"{name}跨进程未命中缓存: {first} / {second}")
+
+    for message in failures:
+        print(f"FAILURE: {message}")
+    if not failures:
+        print("SUCCESS: 公式指纹按内容区分且跨进程稳定")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--fingerprints"]:
+        print(fingerprints())
+        sys.exit(0)
+    if sys.argv[1:2] and sys.argv[1].startswith("--cached-run="):
+        print(cached_run(sys.argv[1].split("=", 1)[1]))
+        sys.exit(0)
+    if sys.argv[1:2] and sys.argv[1].startswith("--cached-fermi="):
+        print(cached_fermi(sys.argv[1].split("=", 1)[1]))
+        sys.exit(0)
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+检查单位解析与换算
+
+- 货币与数量级: 亿元 / M USD / USD m / $bn / 万人
+- 单字母 k / m / b / t 只在与货币相邻时表示数量级，单独出现时是计数/质量单位
+- 质量单位: t、kg、万吨 之间按倍数换算，元/吨 × 吨 得到元
+
+运行: python examples/check_units.py
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from units import Quantity, conversion_factor, format_quantity, parse_unit
+
+
+# (单位, 期望的 scale, 期望的货币代码或 None)
+PARSE_CASES = [
+    ("亿元", 1e8, "CNY"),
+    ("M USD", 1e6, "USD"),
+    ("USD m", 1e6, "USD"),
+    ("$bn", 1e9, "USD"),
+    ("million", 1e6, None),
+    ("万人", 1e4, None),
+    ("t", 1e3, None),
+    ("kg", 1.0, None),
+    ("万吨", 1e7, None),
+]
+
+
+def main() -> int:
+    failures = []
+    for unit, scale, currency in PARSE_CASES:
+        parsed = parse_unit(unit)
+        if abs(parsed.scale - scale) > 1e-9 * scale or parsed.currency != currency:
+            failures.append(f"parse_unit({unit!r}) = scale {parsed.scale}, 货币 {parsed.currency}；"
+                            f"期望 scale {scale}, 货币 {currency}")
+
+    checks = [
+        ("5 t × 100 元/吨", (Quantity(5, "t") * Quantity(100, "元/吨")).to("元").value, 500.0),
+        ("1000 kg → t", Quantity(1000, "kg").to("t").value, 1.0),
+        ("3 万吨 → t", Quantity(3, "万吨").to("t").value, 3e4),
+        ("354 M USD → 亿元 (fx 7.2)", 354 * conversion_factor("M USD", "亿元", fx=7.2), 25.488),
+    ]
+    for name, actual, expected in checks:
+        if abs(actual - expected) > 1e-9 * max(abs(expected), 1):
+            failures.append(f"{name}: {actual}，期望 {expected}")
+
+    text = format_quantity(2e5, "吨")
+    if text != "20.00 万吨":
+        failures.append(f"format_quantity(2e5, '吨') = {text!r}，期望 '20.00 万吨'")
+
+    for message in failures:
+        print(f"FAILURE: {message}")
+    if not failures:
+        print("SUCCESS: 单位解析与换算正确")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
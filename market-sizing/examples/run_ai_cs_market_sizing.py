@@ -18,6 +18,7 @@ from dataclasses import asdict  # still used by FermiResult internally
 from scripts.report_generator import ReportGenerator, MarketSizingData
 from scripts.fermi_calculator import FermiCalculator
 from scripts.monte_carlo import MonteCarloSimulator, Assumption
+from scripts.segment_model import Segment, MarketModel
 
 
 def run_case():
@@ -62,7 +63,7 @@ def run_case():
             "单价": "📚 SaaS入门版定价",
         },
     )
-    tam_value = (res_ka.value + res_mid.value + res_smb.value) / 1e8  # → 亿元
+    tam_value = sum(r.quantity for r in (res_ka, res_mid, res_smb)).to("亿元").value
     # 63.75 + 60.0 + 24.0 = 147.75 亿元
 
     # ================================================================
@@ -158,21 +159,26 @@ def run_case():
     # ================================================================
     sim = MonteCarloSimulator(seed=42)
 
-    def market_model(ka_vol, ka_price, mid_vol, mid_price, smb_vol, smb_price):
-        return (ka_vol * ka_price + mid_vol * mid_price + smb_vol * smb_price) / 1e8
+    # 三段相加；每段给出 P5/P50/P95 拆解。价格以元标注，convert_units 自动换算到亿元
+    market_model = MarketModel([
+        Segment("KA", ["ka_vol", "ka_price"]),
+        Segment("Mid", ["mid_vol", "mid_price"]),
+        Segment("SMB", ["smb_vol", "smb_price"]),
+    ])
 
-    mc_result = sim.run(
+    mc_result = market_model.run_monte_carlo(
+        simulator=sim,
         assumptions={
-            "ka_vol":   Assumption(min=3500,    most_likely=4250,    max=4800),
-            "ka_price": Assumption(min=1.0e6,   most_likely=1.5e6,   max=2.0e6),
-            "mid_vol":  Assumption(min=80_000,   most_likely=120_000, max=160_000),
-            "mid_price":Assumption(min=30_000,   most_likely=50_000,  max=80_000),
-            "smb_vol":  Assumption(min=500_000,  most_likely=800_000, max=1_200_000),
-            "smb_price":Assumption(min=1000,     most_likely=3000,    max=5000),
+            "ka_vol":   Assumption(min=3500,    most_likely=4250,    max=4800,      unit="家"),
+            "ka_price": Assumption(min=1.0e6,   most_likely=1.5e6,   max=2.0e6,     unit="元"),
+            "mid_vol":  Assumption(min=80_000,   most_likely=120_000, max=160_000,  unit="家"),
+            "mid_price":Assumption(min=30_000,   most_likely=50_000,  max=80_000,   unit="元"),
+            "smb_vol":  Assumption(min=500_000,  most_likely=800_000, max=1_200_000, unit="家"),
+            "smb_price":Assumption(min=1000,     most_likely=3000,    max=5000,     unit="元"),
         },
-        formula=market_model,
         n_simulations=5000,
         unit="亿元",
+        convert_units=True,
     )
 
     # ================================================================
@@ -238,6 +244,12 @@ def run_case():
             "result": round(tam_value, 2),
         },
         assumptions=assumptions,
+        # Excel Fermi_Calc 按段生成公式链 (引用核心假设 key；客单价单位为万元 → 亿元 ×1e-4)
+        segments=MarketModel([
+            Segment("KA", ["ka_count", "ka_adopt", "ka_price"]),
+            Segment("Mid", ["mid_count", "mid_adopt", "mid_price"]),
+            Segment("SMB", ["smb_count", "smb_adopt", "smb_price"]),
+        ], scale=1e-4),
         competitors=competitors,
         # 注入 assumptions 到 MC 结果中，供 Excel Monte Carlo Sheet 展示输入假设
         monte_carlo_result={**mc_result.to_dict(), "assumptions": {
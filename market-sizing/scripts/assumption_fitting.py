@@ -0,0 +1,385 @@
+"""
+Assumption Fitting
+==================
+
+把 DataFetcher 取得的历史时间序列拟合为 Monte Carlo 假设 (Assumption)，
+代替手填的 CAGR / 价格区间。
+
+拟合方法 (method):
+- bootstrap: 经验分布，按历史观测值等概率重抽样 (不做任何分布假设)
+- kde: 高斯核密度估计 (Silverman 带宽)，以分段线性 CDF 表示，可在观测值之间平滑插值
+- histogram: 分箱直方图 (numpy 自动选箱)
+- normal: 拟合均值/标准差，截断正态
+- lognormal: 拟合对数均值/标准差，截断对数正态 (要求观测值为正)
+
+序列变换 (transform): level 原值 / pct_change 增长率 / log_return 对数增长率 / diff 差分，
+periods 为间隔期数 (如月度数据 periods=12 得到同比增长率)。
+
+拟合结果按 (序列 ID, 日期区间, 拟合参数) 缓存在内存中，可选写入磁盘 (JSON)，
+批量运行多个市场或多进程场景时同一序列只拟合一次；提供 loader 时未命中才取数。
+
+使用方法:
+    from data_fetcher import DataFetcher
+    from assumption_fitting import AssumptionFitter
+
+    fitter = AssumptionFitter(DataFetcher(), cache_dir=".fit_cache")
+    inflation = fitter.fit_fred("CPIAUCSL", start="2010-01-01", transform="pct_change",
+                                periods=12, method="kde")
+    growth = fitter.fit(revenue_series, method="bootstrap", transform="pct_change")
+"""
+
+import json
+import hashlib
+import dataclasses
+from pathlib import Path
+from typing import Any, Callable, Dict, Literal, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("assumption_fitting 需要 numpy。请安装: pip install numpy")
+
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("请安装 pandas: pip install pandas")
+
+try:
+    from .monte_carlo import Assumption
+except ImportError:
+    from monte_carlo import Assumption
+
+
+FitMethod = Literal["bootstrap", "kde", "histogram", "normal", "lognormal"]
+TransformType = Literal["level", "pct_change", "log_return", "diff"]
+
+# 拟合缓存格式版本，拟合逻辑变化时递增使旧条目失效
+FIT_CACHE_VERSION = 1
+
+# KDE 的 CDF 网格点数
+_KDE_GRID = 512
+
+
+def to_series(data: Union[pd.Series, pd.DataFrame], column: Optional[str] = None) -> pd.Series:
+    """
+    把 DataFetcher 的返回值统一为数值 Series
+
+    DataFrame 需指定 column；未指定时仅在恰好只有一个数值列时自动选用。
+    """
+    if isinstance(data, pd.DataFrame):
+        if column is None:
+            numeric = data.select_dtypes("number").columns
+            if len(numeric) != 1:
+                raise ValueError(f"DataFrame 有多个数值列，请指定 column: {list(data.columns)}")
+            column = numeric[0]
+        data = data[column]
+    elif column is not None:
+        raise ValueError("column 只适用于 DataFrame")
+    return pd.to_numeric(data, errors="coerce")
+
+
+def transform_series(series: pd.Series, transform: TransformType = "level", periods: int = 1) -> np.ndarray:
+    """
+    对序列做变换并去掉缺失值
+
+    Args:
+        series: 按时间排序的序列
+        transform: level / pct_change / log_return / diff
+        periods: 变换的间隔期数 (月度数据 periods=12 即同比)
+    """
+    series = series.astype(float)
+    if transform == "level":
+        values = series
+    elif transform == "pct_change":
+        values = series / series.shift(periods) - 1
+    elif transform == "log_return":
+        if (series.dropna() <= 0).any():
+            raise ValueError("log_return 要求序列为正")
+        values = np.log(series / series.shift(periods))
+    elif transform == "diff":
+        values = series.diff(periods)
+    else:
+        raise ValueError(f"未知变换: {transform}，可选: level, pct_change, log_return, diff")
+    values = values.to_numpy(dtype=float)
+    return values[np.isfinite(values)]
+
+
+def _kde_piecewise(values: np.ndarray, bounds: Optional[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    高斯核密度估计的 CDF 网格 (x, p)
+
+    观测值先分箱到等距网格，再与高斯核卷积，累积得到 CDF；复杂度与观测数无关。
+    """
+    n = len(values)
+    iqr = np.subtract(*np.percentile(values, [75, 25]))
+    spread = min(values.std(ddof=1), iqr / 1.34) if iqr > 0 else values.std(ddof=1)
+    h = 0.9 * spread * n ** -0.2  # Silverman 带宽
+
+    lo, hi = values.min() - 4 * h, values.max() + 4 * h
+    if bounds is not None:
+        lo, hi = max(lo, bounds[0]), min(hi, bounds[1])
+    # 在 [lo - 4h, hi + 4h] 上计算密度，截断到 [lo, hi] 后重新归一化
+    grid = np.linspace(lo - 4 * h, hi + 4 * h, 4 * _KDE_GRID + 1)
+    step = grid[1] - grid[0]
+    counts, _ = np.histogram(values, bins=np.append(grid - step / 2, grid[-1] + step / 2))
+    offsets = np.arange(-int(np.ceil(4 * h / step)), int(np.ceil(4 * h / step)) + 1) * step
+    kernel = np.exp(-0.5 * (offsets / h) ** 2)
+    density = np.convolve(counts, kernel / kernel.sum(), mode="same")
+
+    cdf = np.concatenate([[0.0], np.cumsum((density[1:] + density[:-1]) / 2)])
+    x = np.linspace(lo, hi, _KDE_GRID + 1)
+    p = np.interp(x, grid, cdf)
+    p = (p - p[0]) / (p[-1] - p[0])
+    p[0], p[-1] = 0.0, 1.0
+    return x, np.maximum.accumulate(p)
+
+
+def fit_assumption(
+    values: Union[np.ndarray, pd.Series],
+    method: FitMethod = "kde",
+    bounds: Optional[Tuple[float, float]] = None,
+    tail_sigmas: float = 4.0,
+    bins: Union[int, str] = "auto",
+    unit: str = "",
+    source: str = "",
+) -> Assumption:
+    """
+    把一组观测值拟合为 Assumption
+
+    Args:
+        values: 观测值 (已做过变换)
+        method: bootstrap / kde / histogram / normal / lognormal
+        bounds: 取值范围 (lo, hi)；normal / lognormal 默认为中心 ± tail_sigmas 个标准差，
+            kde 默认为观测范围外扩 4 个带宽
+        tail_sigmas: normal / lognormal 未指定 bounds 时的截断宽度
+        bins: histogram 的分箱 (同 numpy.histogram)
+        unit: 单位
+        source: 数据来源说明
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if bounds is not None:
+        values = values[(values >= bounds[0]) & (values <= bounds[1])]
+    if len(values) < 3:
+        raise ValueError(f"至少需要 3 个有效观测值，当前 {len(values)} 个")
+    kwargs = {"unit": unit, "source": source}
+
+    if method == "bootstrap":
+        return Assumption.empirical(values, **kwargs)
+
+    if method == "kde":
+        if values.std() == 0:
+            return Assumption.empirical(values, **kwargs)
+        x, p = _kde_piecewise(values, bounds)
+        return Assumption.piecewise(x, p, **kwargs)
+
+    if method == "histogram":
+        counts, edges = np.histogram(values, bins=bins)
+        return Assumption.histogram(edges, counts, **kwargs)
+
+    if method == "normal":
+        mean, std = float(values.mean()), float(values.std(ddof=1))
+        if std == 0:
+            return Assumption.empirical(values, **kwargs)
+        lo, hi = bounds if bounds is not None else (mean - tail_sigmas * std, mean + tail_sigmas * std)
+        return Assumption.truncnormal(mean, std, min=lo, max=hi, **kwargs)
+
+    if method == "lognormal":
+        if np.any(values <= 0):
+            raise ValueError("lognormal 拟合要求观测值为正 (增长率请用 transform='log_return' 或 normal)")
+        logs = np.log(values)
+        median, sigma = float(np.exp(logs.mean())), float(logs.std(ddof=1))
+        if sigma == 0:
+            return Assumption.empirical(values, **kwargs)
+        lo, hi = bounds if bounds is not None else (median * np.exp(-tail_sigmas * sigma),
+                                                    median * np.exp(tail_sigmas * sigma))
+        return Assumption.trunclognormal(median, sigma, min=float(lo), max=float(hi), **kwargs)
+
+    raise ValueError(f"未知拟合方法: {method}，可选: bootstrap, kde, histogram, normal, lognormal")
+
+
+class AssumptionFitter:
+    """
+    带缓存的假设拟合器
+
+    缓存键 = (序列 ID, 起止日期, 变换, 拟合方法与参数)；未给序列 ID 时使用序列内容的哈希。
+    同一拟合器 (或共享同一 cache_dir 的多个进程) 对同一序列只拟合一次。
+
+    Args:
+        fetcher: DataFetcher 实例 (fit_fred 等便捷方法需要)
+        cache_dir: 磁盘缓存目录，None 则只在内存中缓存
+
+    Example:
+        >>> fitter = AssumptionFitter(DataFetcher(), cache_dir=".fit_cache")
+        >>> cagr = fitter.fit_company_history("AAPL", period="5y", column="Close",
+        ...                                   transform="pct_change", periods=252)
+    """
+
+    def __init__(self, fetcher: Any = None, cache_dir: Optional[Union[str, Path]] = None):
+        self.fetcher = fetcher
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory: Dict[str, Assumption] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def fit(
+        self,
+        data: Union[pd.Series, pd.DataFrame],
+        method: FitMethod = "kde",
+        transform: TransformType = "level",
+        periods: int = 1,
+        series_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        column: Optional[str] = None,
+        **options,
+    ) -> Assumption:
+        """
+        拟合一个序列
+
+        Args:
+            data: 时间序列 (Series，或配合 column 的 DataFrame)
+            method: 拟合方法
+            transform: 序列变换
+            periods: 变换间隔期数
+            series_id: 序列 ID (用作缓存键)；None 则按内容哈希
+            start, end: 日期区间 (按 DatetimeIndex 截取，包含两端)
+            column: DataFrame 的数值列
+            **options: 传给 fit_assumption (bounds, tail_sigmas, bins, unit, source)
+        """
+        series = _slice_dates(to_series(data, column), start, end)
+        if series_id is None:
+            series_id = "sha256:" + hashlib.sha256(
+                pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes()
+            ).hexdigest()
+        return self._cached(series_id, start, end, column, method, transform, periods, options,
+                            lambda: series)
+
+    def fit_source(
+        self,
+        series_id: str,
+        loader: Callable[[], Union[pd.Series, pd.DataFrame]],
+        method: FitMethod = "kde",
+        transform: TransformType = "level",
+        periods: int = 1,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        column: Optional[str] = None,
+        **options,
+    ) -> Assumption:
+        """
+        按序列 ID 拟合，缓存未命中时才调用 loader 取数
+
+        Args:
+            series_id: 序列 ID (如 "fred:CPIAUCSL")
+            loader: 无参函数，返回原始序列
+            其余参数同 fit
+        """
+        def load() -> pd.Series:
+            return _slice_dates(to_series(loader(), column), start, end)
+
+        return self._cached(series_id, start, end, column, method, transform, periods, options, load)
+
+    def fit_fred(self, series_id: str, start: Optional[str] = None, end: Optional[str] = None,
+                 **kwargs) -> Assumption:
+        """拟合 FRED 序列 (如 "CPIAUCSL"，配合 transform="pct_change", periods=12 得到通胀率)"""
+        kwargs.setdefault("source", f"FRED {series_id}")
+        return self.fit_source(f"fred:{series_id}", lambda: self._require_fetcher().get_fred_series(series_id, start),
+                               start=start, end=end, **kwargs)
+
+    def fit_china_cpi(self, column: str, start: Optional[str] = None, end: Optional[str] = None,
+                      date_column: Optional[str] = None, **kwargs) -> Assumption:
+        """
+        拟合中国 CPI (AkShare)
+
+        Args:
+            column: CPI 数据列名
+            date_column: 日期列名 (需要按 start / end 截取时指定)
+        """
+        kwargs.setdefault("source", f"AkShare 中国 CPI ({column})")
+
+        def loader() -> pd.DataFrame:
+            df = self._require_fetcher().get_china_cpi()
+            if date_column is not None:
+                df = df.set_index(pd.to_datetime(df[date_column])).sort_index()
+            return df
+
+        return self.fit_source(f"akshare:china_cpi:{column}", loader, start=start, end=end,
+                               column=column, **kwargs)
+
+    def fit_company_history(self, ticker: str, period: str = "5y", column: str = "Close",
+                            start: Optional[str] = None, end: Optional[str] = None, **kwargs) -> Assumption:
+        """拟合股价历史 (yfinance) 的某一列"""
+        kwargs.setdefault("source", f"yfinance {ticker} {column}")
+        return self.fit_source(f"yfinance:{ticker}:{period}",
+                               lambda: self._require_fetcher().get_company_history(ticker, period),
+                               start=start, end=end, column=column, **kwargs)
+
+    def clear(self) -> None:
+        """清空内存与磁盘缓存"""
+        self._memory.clear()
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def _require_fetcher(self) -> Any:
+        if self.fetcher is None:
+            raise ValueError("需要 DataFetcher: AssumptionFitter(fetcher=DataFetcher())")
+        return self.fetcher
+
+    def _cached(self, series_id: str, start: Optional[str], end: Optional[str], column: Optional[str],
+                method: str, transform: str, periods: int, options: Dict[str, Any],
+                load: Callable[[], pd.Series]) -> Assumption:
+        key = _fit_key(series_id, start, end, column, method, transform, periods, options)
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+
+        path = self.cache_dir / f"{key}.json" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                assumption = Assumption(**json.loads(path.read_text(encoding="utf-8")))
+            except (ValueError, TypeError):
+                assumption = None  # 写入中断或格式过期，重新拟合
+            if assumption is not None:
+                self._memory[key] = assumption
+                self.hits += 1
+                return assumption
+
+        self.misses += 1
+        values = transform_series(load(), transform, periods)
+        assumption = fit_assumption(values, method=method, **options)
+        self._memory[key] = assumption
+        if path is not None:
+            tmp = path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(_jsonable(dataclasses.asdict(assumption)), ensure_ascii=False),
+                           encoding="utf-8")
+            tmp.replace(path)
+        return assumption
+
+
+def _slice_dates(series: pd.Series, start: Optional[str], end: Optional[str]) -> pd.Series:
+    if start is None and end is None:
+        return series
+    if not isinstance(series.index, pd.DatetimeIndex):
+        raise ValueError("按 start / end 截取需要 DatetimeIndex 的序列")
+    return series.sort_index().loc[start:end]
+
+
+def _fit_key(series_id: str, start: Optional[str], end: Optional[str], column: Optional[str],
+             method: str, transform: str, periods: int, options: Dict[str, Any]) -> str:
+    payload = [FIT_CACHE_VERSION, series_id, start, end, column, method, transform, periods,
+               sorted(options.items())]
+    return hashlib.sha256(json.dumps(_jsonable(payload), default=repr).encode()).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,478 @@
+"""
+Scenario Batch Runner
+=====================
+
+批量测算多个细分市场：一个目录放若干 JSON 场景定义 (假设 + 公式)，
+一次性在共享进程池中完成所有 Monte Carlo / Fermi 计算：
+- 进程池只创建一次，库只导入一次，场景之间并行
+- 每完成一个场景 (含报告渲染) 立即写入汇总表 (CSV 流式追加；.parquet 需要 pyarrow，按行组写入)
+- 报告渲染 (MD/HTML/XLSX) 同样分发到进程池并行执行
+
+场景文件格式 (scenarios/ai_cs.json):
+    {
+        "name": "中国AI客服软件",
+        "unit": "亿元",
+        "formula": "(ka_vol*ka_price + mid_vol*mid_price) / 1e8",
+        "assumptions": {
+            "ka_vol":   {"min": 3500, "most_likely": 4250, "max": 4800},
+            "ka_price": {"min": 1.0e6, "most_likely": 1.5e6, "max": 2.0e6},
+            ...
+        },
+        "n_simulations": 10000,               # 可选，默认 10000
+        "seed": 42,                            # 可选，默认 42
+        "options": {"sampling": "lhs"},        # 可选，透传给 MonteCarloSimulator.run
+        "correlation": [["ka_vol", "mid_vol", 0.5]],  # 可选，[名称, 名称, 秩相关系数] 列表或矩阵
+        "fermi": [                             # 可选，Fermi 点估计 (多段相加)
+            {"method": "institution_based",
+             "args": {"institution_count": 5000, "adoption_rate": 0.85,
+                      "units_per_institution": 1, "price_per_unit": 1.5e6}}
+        ],
+        "fermi_scale": 1e-8,                   # 可选，Fermi 结果换算到 unit 的系数
+        "segments": {"scale": 1e-8, "segments": [   # 可选，细分段模型 (见 segment_model.py)，
+            {"name": "KA", "factors": ["ka_vol", "ka_price"]}, ...]},  # 给出时可省略 formula，结果附分段拆解
+        "report": {"geography": "中国", "base_year": 2024, "forecast_years": 5, "cagr": 0.2}
+                                               # 可选，MarketSizingData 字段；tam 默认取 MC 中位数
+    }
+
+使用方法:
+    python scripts/batch_runner.py scenarios/ --output output/ --workers 8
+    python scripts/batch_runner.py scenarios/ --summary summary.parquet --formats md xlsx
+
+    from batch_runner import BatchRunner
+    runner = BatchRunner(n_workers=8, output_dir="output/")
+    for outcome in runner.run_directory("scenarios/"):
+        print(outcome.name, outcome.summary["p50"])
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+import traceback
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Iterable, Iterator, Any
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from .monte_carlo import MonteCarloSimulator, Assumption
+    from .fermi_calculator import FermiCalculator
+    from .formula_expr import Expression
+    from .segment_model import MarketModel
+    from .units import format_number
+except ImportError:
+    from monte_carlo import MonteCarloSimulator, Assumption
+    from fermi_calculator import FermiCalculator
+    from formula_expr import Expression
+    from segment_model import MarketModel
+    from units import format_number
+
+
+# Fermi 场景可调用的方法 (custom 需要可调用对象，使用 MC 公式即可)
+FERMI_METHODS = ("population_based", "institution_based", "substitution_based",
+                 "value_chain_based", "value_based")
+
+# 汇总表的列 (固定 schema，CSV 与 parquet 一致)
+SUMMARY_COLUMNS = [
+    "scenario", "unit", "n_simulations", "mean", "std",
+    "p5", "p10", "p25", "p50", "p75", "p90", "p95", "min", "max",
+    "fermi_value", "top_driver", "elapsed_s", "error",
+]
+
+
+@dataclass
+class Scenario:
+    """
+    单个场景定义
+
+    Attributes:
+        name: 场景名称 (汇总表主键、报告文件名)
+        assumptions: 假设字典 {假设名: Assumption}
+        formula: 表达式字符串
+        unit: 结果单位
+        n_simulations: 模拟次数
+        seed: 随机种子
+        options: 透传给 MonteCarloSimulator.run 的其他参数
+        fermi: Fermi 方法列表 [{"method": ..., "args": {...}}]
+        fermi_scale: Fermi 结果换算到 unit 的系数
+        report: MarketSizingData 字段 (为空则不生成报告)
+        segments: 细分段模型 (MarketModel.to_dict() 格式)，给出时按段拆解 Monte Carlo 结果
+        path: 来源文件
+    """
+    name: str
+    assumptions: Dict[str, Assumption]
+    formula: str
+    unit: str = "元"
+    n_simulations: int = 10000
+    seed: int = 42
+    options: Dict[str, Any] = field(default_factory=dict)
+    fermi: List[dict] = field(default_factory=list)
+    fermi_scale: float = 1.0
+    report: Optional[dict] = None
+    segments: Optional[dict] = None
+    path: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, spec: dict, path: Optional[str] = None) -> "Scenario":
+        """从 JSON 字典构建场景，并提前校验公式与假设名"""
+        for key in ("name", "assumptions"):
+            if key not in spec:
+                raise ValueError(f"场景缺少字段 '{key}' ({path or spec.get('name', '?')})")
+        formula = spec.get("formula")
+        if spec.get("segments") is not None:
+            formula = formula or MarketModel.from_dict(spec["segments"]).formula
+        if formula is None:
+            raise ValueError(f"场景缺少字段 'formula' 或 'segments' ({path or spec['name']})")
+
+        assumptions = {name: Assumption.from_dict(params) for name, params in spec["assumptions"].items()}
+        missing = [v for v in Expression(formula).variables if v not in assumptions]
+        if missing:
+            raise ValueError(f"场景 '{spec['name']}' 的公式引用了未定义的假设: {', '.join(missing)}")
+
+        fermi = spec.get("fermi") or []
+        if isinstance(fermi, dict):
+            fermi = [fermi]
+        for item in fermi:
+            if item.get("method") not in FERMI_METHODS:
+                raise ValueError(f"不支持的 Fermi 方法: {item.get('method')}，可选: {', '.join(FERMI_METHODS)}")
+
+        options = dict(spec.get("options") or {})
+        if spec.get("correlation") is not None:
+            options["correlation"] = spec["correlation"]
+        correlation = options.get("correlation")
+        if correlation and all(isinstance(row, list) and len(row) == 3 and isinstance(row[0], str)
+                               for row in correlation):
+            # [[名称, 名称, ρ], ...] → {(名称, 名称): ρ}
+            options["correlation"] = {(a, b): rho for a, b, rho in correlation}
+
+        return cls(
+            name=spec["name"],
+            assumptions=assumptions,
+            formula=formula,
+            unit=spec.get("unit", "元"),
+            n_simulations=int(spec.get("n_simulations", 10000)),
+            seed=int(spec.get("seed", 42)),
+            options=options,
+            fermi=fermi,
+            fermi_scale=float(spec.get("fermi_scale", 1.0)),
+            report=spec.get("report"),
+            segments=spec.get("segments"),
+            path=path,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "Scenario":
+        """读取 JSON 场景文件"""
+        path = Path(path)
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), path=str(path))
+
+
+@dataclass
+class ScenarioOutcome:
+    """单个场景的计算结果"""
+    name: str
+    summary: Dict[str, Any]                      # 汇总行 (SUMMARY_COLUMNS)
+    monte_carlo: Optional[dict] = None           # MonteCarloResult.to_dict()
+    fermi: List[dict] = field(default_factory=list)  # FermiResult.to_dict() 列表
+    reports: Dict[str, str] = field(default_factory=dict)  # {格式: 路径}
+    error: Optional[str] = None
+
+
+def _run_scenario(scenario: Scenario) -> ScenarioOutcome:
+    """在工作进程中执行单个场景 (Monte Carlo + Fermi)"""
+    start = time.perf_counter()
+    summary = {column: None for column in SUMMARY_COLUMNS}
+    summary.update(scenario=scenario.name, unit=scenario.unit)
+    try:
+        options = dict(scenario.options)
+        options["n_workers"] = 1  # 场景级并行，单个场景内不再嵌套进程池
+        sim = MonteCarloSimulator(seed=scenario.seed)
+        if scenario.segments is not None:
+            segmented = MarketModel.from_dict(scenario.segments).run_monte_carlo(
+                scenario.assumptions, sim, n_simulations=scenario.n_simulations, unit=scenario.unit, **options)
+            result, mc_dict = segmented.total, segmented.to_dict()
+        else:
+            result = sim.run(scenario.assumptions, scenario.formula,
+                             n_simulations=scenario.n_simulations, unit=scenario.unit, **options)
+            mc_dict = result.to_dict()
+
+        calc = FermiCalculator()
+        fermi = [getattr(calc, item["method"])(**item.get("args", {})) for item in scenario.fermi]
+
+        summary.update(
+            n_simulations=result.n_simulations, mean=result.mean, std=result.std,
+            p5=result.p5, p10=result.p10, p25=result.p25, p50=result.median,
+            p75=result.p75, p90=result.p90, p95=result.p95, min=result.min, max=result.max,
+            fermi_value=sum(r.value for r in fermi) * scenario.fermi_scale if fermi else None,
+            top_driver=max(result.sensitivity, key=result.sensitivity.get) if result.sensitivity else None,
+        )
+        outcome = ScenarioOutcome(scenario.name, summary, mc_dict, [r.to_dict() for r in fermi])
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+        outcome = ScenarioOutcome(scenario.name, summary, error=traceback.format_exc())
+    summary["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return outcome
+
+
+def _report_assumptions(assumptions: Dict[str, Assumption]) -> List[dict]:
+    """场景假设 → MarketSizingData.assumptions (key 即假设名，Excel 据此生成公式链)"""
+    rows = []
+    for name, a in assumptions.items():
+        unit = f" {a.unit}" if a.unit else ""
+        rows.append({
+            "key": name,
+            "name": name,
+            "value": f"{format_number(a.most_likely)}{unit} (区间 {format_number(a.min)}–{format_number(a.max)})",
+            "numeric_value": a.most_likely,
+            "source": a.source or f"⚠️ 假设: {a.distribution} 分布",
+            "type": "📚" if a.source else "⚠️",
+        })
+    return rows
+
+
+def _render_report(scenario: Scenario, outcome: ScenarioOutcome, output_dir: str,
+                   formats: List[str]) -> Dict[str, str]:
+    """在工作进程中渲染单个场景的报告"""
+    try:
+        from .report_generator import ReportGenerator, MarketSizingData
+    except ImportError:
+        from report_generator import ReportGenerator, MarketSizingData
+
+    fields = dict(scenario.report or {})
+    median = outcome.monte_carlo["median"]
+    fields.setdefault("market_name", scenario.name)
+    fields.setdefault("geography", "")
+    fields.setdefault("base_year", time.localtime().tm_year)
+    fields.setdefault("forecast_years", 5)
+    fields.setdefault("tam", median)
+    fields.setdefault("sam", fields["tam"])
+    fields.setdefault("som", fields["sam"])
+    fields.setdefault("unit", scenario.unit)
+    fields.setdefault("cagr", 0.0)
+    fields.setdefault("monte_carlo_result", outcome.monte_carlo)
+    fields.setdefault("assumptions", _report_assumptions(scenario.assumptions))
+    if isinstance(scenario.formula, str):
+        fields.setdefault("tam_formula", scenario.formula)
+    if scenario.segments is not None:
+        fields.setdefault("segments", scenario.segments)
+    if outcome.fermi:
+        fields.setdefault("fermi_result", outcome.fermi[0])
+
+    paths = ReportGenerator().generate(MarketSizingData(**fields), Path(output_dir), formats)
+    return {fmt: str(path) for fmt, path in paths.items()}
+
+
+def _report_failed(outcome: ScenarioOutcome, error: Exception) -> None:
+    """报告渲染失败: 记入 outcome.error 与汇总行的 error 列 (计算结果仍保留)"""
+    outcome.error = f"报告生成失败: {type(error).__name__}: {error}"
+    outcome.summary["error"] = outcome.error
+
+
+class SummaryWriter:
+    """
+    流式汇总表: 每个场景完成后立即追加一行
+
+    - .csv: 逐行写入并 flush (中途中断也保留已完成的场景)
+    - .parquet: 需要 pyarrow，每 row_group_size 行写一个行组
+    """
+
+    def __init__(self, path: Path, row_group_size: int = 64):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self._rows: List[dict] = []
+        self._parquet = self.path.suffix == ".parquet"
+
+        if self._parquet:
+            if not PYARROW_AVAILABLE:
+                raise ImportError("写入 parquet 需要 pyarrow。请安装: pip install pyarrow")
+            schema = pa.schema([
+                (name, pa.string() if name in ("scenario", "unit", "top_driver", "error")
+                 else pa.int64() if name == "n_simulations" else pa.float64())
+                for name in SUMMARY_COLUMNS
+            ])
+            self._writer = pq.ParquetWriter(str(self.path), schema)
+            self._schema = schema
+        else:
+            self._file = open(self.path, "w", newline="", encoding="utf-8-sig")
+            self._writer = csv.DictWriter(self._file, fieldnames=SUMMARY_COLUMNS)
+            self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        if self._parquet:
+            self._rows.append(row)
+            if len(self._rows) >= self.row_group_size:
+                self._flush()
+        else:
+            self._writer.writerow(row)
+            self._file.flush()
+
+    def _flush(self) -> None:
+        if self._rows:
+            columns = {name: [row.get(name) for row in self._rows] for name in SUMMARY_COLUMNS}
+            self._writer.write_table(pa.table(columns, schema=self._schema))
+            self._rows = []
+
+    def close(self) -> None:
+        if self._parquet:
+            self._flush()
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self) -> "SummaryWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BatchRunner:
+    """
+    场景批量执行器
+
+    Args:
+        n_workers: 进程数 (默认 CPU 核数；1 = 在当前进程内顺序执行)
+        output_dir: 报告输出目录 (为空则不生成报告)
+        formats: 报告格式 ["md", "html", "xlsx"]
+        summary_path: 汇总表路径 (.csv 或 .parquet)，为空则不写
+
+    Example:
+        >>> runner = BatchRunner(n_workers=4, summary_path="summary.csv")
+        >>> outcomes = list(runner.run_directory("scenarios/"))
+    """
+
+    def __init__(
+        self,
+        n_workers: Optional[int] = None,
+        output_dir: Optional[str] = None,
+        formats: Optional[List[str]] = None,
+        summary_path: Optional[str] = None,
+    ):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.output_dir = output_dir
+        self.formats = formats or ["md", "html", "xlsx"]
+        self.summary_path = summary_path
+
+    @staticmethod
+    def load_directory(directory: Path, pattern: str = "*.json") -> List[Scenario]:
+        """读取目录下所有场景文件 (按文件名排序)"""
+        paths = sorted(Path(directory).glob(pattern))
+        if not paths:
+            raise FileNotFoundError(f"目录中没有场景文件: {directory}/{pattern}")
+        scenarios = [Scenario.load(p) for p in paths]
+        names = [s.name for s in scenarios]
+        duplicated = sorted({n for n in names if names.count(n) > 1})
+        if duplicated:
+            raise ValueError(f"场景名称重复: {', '.join(duplicated)}")
+        return scenarios
+
+    def run_directory(self, directory: Path, pattern: str = "*.json") -> Iterator[ScenarioOutcome]:
+        """执行目录下的所有场景，按完成顺序产出结果"""
+        return self.run(self.load_directory(directory, pattern))
+
+    def run(self, scenarios: Iterable[Scenario]) -> Iterator[ScenarioOutcome]:
+        """
+        执行一批场景，按完成顺序产出 ScenarioOutcome
+
+        计算与报告渲染共用一个进程池：场景计算完成即提交渲染任务，
+        渲染完成后再写汇总行 (渲染失败记入 error 列) 并产出该场景 (outcome.reports 已填充)。
+        """
+        scenarios = list(scenarios)
+        writer = SummaryWriter(Path(self.summary_path)) if self.summary_path else None
+        try:
+            if self.n_workers == 1:
+                yield from self._run_serial(scenarios, writer)
+            else:
+                yield from self._run_pool(scenarios, writer)
+        finally:
+            if writer:
+                writer.close()
+
+    def _wants_report(self, scenario: Scenario, outcome: ScenarioOutcome) -> bool:
+        return bool(self.output_dir) and outcome.error is None and scenario.report is not None
+
+    def _run_serial(self, scenarios: List[Scenario], writer: Optional[SummaryWriter]) -> Iterator[ScenarioOutcome]:
+        for scenario in scenarios:
+            outcome = _run_scenario(scenario)
+            if self._wants_report(scenario, outcome):
+                # 与进程池模式一致: 渲染失败只记入该场景，不中断整批
+                try:
+                    outcome.reports = _render_report(scenario, outcome, self.output_dir, self.formats)
+                except Exception as e:
+                    _report_failed(outcome, e)
+            if writer:
+                writer.write(outcome.summary)
+            yield outcome
+
+    def _run_pool(self, scenarios: List[Scenario], writer: Optional[SummaryWriter]) -> Iterator[ScenarioOutcome]:
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, max(len(scenarios), 1))) as pool:
+            pending = {pool.submit(_run_scenario, s): ("run", s, None) for s in scenarios}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from self._collect(pool, pending, future, writer)
+
+    def _collect(self, pool: ProcessPoolExecutor, pending: dict, future, writer: Optional[SummaryWriter]) -> Iterator[ScenarioOutcome]:
+        """处理一个完成的任务: 计算完成 → 提交渲染；渲染完成 (或无需渲染) → 写汇总并产出结果"""
+        kind, scenario, outcome = pending.pop(future)
+        if kind == "run":
+            outcome = future.result()
+            if self._wants_report(scenario, outcome):
+                task = pool.submit(_render_report, scenario, outcome, self.output_dir, self.formats)
+                pending[task] = ("report", scenario, outcome)
+                return
+        else:
+            try:
+                outcome.reports = future.result()
+            except Exception as e:
+                _report_failed(outcome, e)
+        if writer:
+            writer.write(outcome.summary)
+        yield outcome
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量执行市场规模场景 (Monte Carlo + Fermi + 报告)")
+    parser.add_argument("directory", help="场景 JSON 文件所在目录")
+    parser.add_argument("--pattern", default="*.json", help="场景文件匹配模式 (默认 *.json)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--output", default=None, help="报告输出目录 (为空则只输出汇总表)")
+    parser.add_argument("--formats", nargs="+", default=["md", "html", "xlsx"], help="报告格式")
+    parser.add_argument("--summary", default=None,
+                        help="汇总表路径 (.csv 或 .parquet，默认 <output>/summary.csv，未指定 --output 时为当前目录)")
+    args = parser.parse_args(argv)
+
+    # 不写入场景目录: 场景目录只放输入 (可能只读或纳入版本管理)
+    summary = args.summary or str(Path(args.output or ".") / "summary.csv")
+    runner = BatchRunner(n_workers=args.workers, output_dir=args.output,
+                         formats=args.formats, summary_path=summary)
+
+    start = time.perf_counter()
+    n_done = n_failed = 0
+    for outcome in runner.run_directory(args.directory, args.pattern):
+        n_done += 1
+        if outcome.summary["error"] or outcome.error:
+            n_failed += 1
+            print(f"❌ {outcome.name}: {outcome.summary['error'] or outcome.error}")
+        else:
+            s = outcome.summary
+            print(f"✅ {outcome.name}: P50 = {s['p50']:,.2f} {s['unit']} "
+                  f"(P5-P95: {s['p5']:,.2f} - {s['p95']:,.2f}, {s['elapsed_s']:.2f}s)")
+
+    print(f"\n完成 {n_done} 个场景 (失败 {n_failed})，耗时 {time.perf_counter() - start:.1f}s")
+    print(f"📄 汇总表: {summary}")
+    return 1 if n_failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
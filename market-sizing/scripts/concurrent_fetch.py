@@ -0,0 +1,183 @@
+"""
+Concurrent Fetch
+================
+
+多数据源并发获取：一份报告同时需要 FRED、世界银行、AkShare、yfinance 数据时，
+总耗时取决于最慢的数据源，而不是各数据源耗时之和。
+
+- 每个数据源的并发上限由进程内全局的信号量保证 (见 DEFAULT_CONCURRENCY / set_concurrency)，
+  多个 fetch_many 同时执行 (如多个线程各自批量取数) 时合计也不超过上限
+- 每次调用按数据源各开一个线程池，一个数据源排队不会占用其他数据源的线程
+- 结果与异常统一放进一个 dict 返回，单个请求失败不影响其他请求
+- 对 DataFetcher 与 CachedFetcher 都适用 (只调用 fetcher 上的同名方法)
+
+使用方法:
+    from data_fetcher import DataFetcher
+
+    results = DataFetcher().fetch_many({
+        "gdp": ("akshare", "get_china_gdp", ()),
+        "us_cpi": ("fred", "get_fred_series", ("CPIAUCSL",), {"start_date": "2015-01-01"}),
+        "pop": ("worldbank", "get_worldbank_indicator", ("CN", "SP.POP.TOTL")),
+        "aapl": ("yfinance", "get_company_financials", ("AAPL",)),
+    })
+    if results["gdp"].ok:
+        gdp = results["gdp"].value
+    else:
+        print(results["gdp"].error)
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple, Union
+
+
+# 各数据源的默认并发上限
+DEFAULT_CONCURRENCY: Dict[str, int] = {
+    "fred": 4,          # 120 次/分钟
+    "worldbank": 4,
+    "akshare": 2,       # 抓取公开网页，并发过高容易被封
+    "baostock": 1,      # 全局单一登录会话，非线程安全
+    "yfinance": 4,
+    "pytrends": 1,      # Google Trends 对并发请求返回 429
+}
+
+# 未在 DEFAULT_CONCURRENCY 中列出的数据源
+FALLBACK_CONCURRENCY = 2
+
+# 各数据源的全局信号量 (进程内所有 fetch_many 调用共享)
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+# (数据源, 方法名, 位置参数) 或 (数据源, 方法名, 位置参数, 关键字参数)
+RequestSpec = Union[Tuple[str, str, Sequence[Any]], Tuple[str, str, Sequence[Any], Dict[str, Any]]]
+
+
+@dataclass
+class FetchResult:
+    """单个请求的结果"""
+    source: str
+    method: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0  # 秒
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> Any:
+        """返回结果，请求失败时重新抛出异常"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def set_concurrency(source: str, limit: int) -> None:
+    """修改数据源的全局并发上限 (对之后开始的请求生效)"""
+    if limit < 1:
+        raise ValueError(f"数据源 {source!r} 的并发上限必须 >= 1，当前为 {limit}")
+    with _semaphores_lock:
+        DEFAULT_CONCURRENCY[source] = limit
+        _semaphores[source] = threading.BoundedSemaphore(limit)
+
+
+def _semaphore(source: str) -> threading.BoundedSemaphore:
+    with _semaphores_lock:
+        semaphore = _semaphores.get(source)
+        if semaphore is None:
+            limit = DEFAULT_CONCURRENCY.get(source, FALLBACK_CONCURRENCY)
+            semaphore = _semaphores[source] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+
+def fetch_many(
+    fetcher: Any,
+    requests: Union[Mapping[Hashable, RequestSpec], Sequence[RequestSpec]],
+    concurrency: Optional[Dict[str, int]] = None,
+    timeout: Optional[float] = None,
+) -> Dict[Hashable, FetchResult]:
+    """
+    并发执行一批数据请求
+
+    Args:
+        fetcher: 数据获取器 (DataFetcher / CachedFetcher)
+        requests: {名称: 请求} 或请求列表 (结果以列表下标为键)；
+            请求为 (数据源, 方法名, 位置参数[, 关键字参数])
+        concurrency: {数据源: 本次调用最多使用的线程数}；数据源的全局上限
+            (DEFAULT_CONCURRENCY，可用 set_concurrency 修改) 始终生效，这里只能进一步收紧
+        timeout: 整批请求的超时 (秒)；超时未完成 (含仍在等待全局配额) 的请求记为 TimeoutError
+
+    Returns:
+        {名称: FetchResult}，顺序与 requests 一致
+    """
+    items = list(requests.items() if isinstance(requests, Mapping) else enumerate(requests))
+    concurrency = dict(concurrency or {})
+
+    parsed = {}
+    for key, spec in items:
+        if len(spec) not in (3, 4):
+            raise ValueError(f"请求 {key!r} 应为 (数据源, 方法名, 位置参数[, 关键字参数])，实际为 {spec!r}")
+        source, method, args = spec[:3]
+        kwargs = spec[3] if len(spec) == 4 else {}
+        if isinstance(args, str):
+            raise ValueError(f"请求 {key!r}: 位置参数应为元组，如 ({args!r},)")
+        if not callable(getattr(fetcher, method, None)):
+            raise ValueError(f"请求 {key!r}: {type(fetcher).__name__} 没有方法 {method!r}")
+        known = getattr(fetcher, "SOURCES", {}).get(method)
+        if known is not None and known != source:
+            raise ValueError(f"请求 {key!r}: {method} 属于数据源 {known!r}，不是 {source!r}")
+        parsed[key] = (source, method, tuple(args), dict(kwargs))
+
+    counts: Dict[str, int] = {}
+    for source, *_ in parsed.values():
+        counts[source] = counts.get(source, 0) + 1
+    for source, limit in concurrency.items():
+        if limit < 1:
+            raise ValueError(f"数据源 {source!r} 的并发上限必须 >= 1，当前为 {limit}")
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pools: Dict[str, ThreadPoolExecutor] = {}
+    try:
+        for source, count in counts.items():
+            limit = min(concurrency.get(source, count), DEFAULT_CONCURRENCY.get(source, FALLBACK_CONCURRENCY), count)
+            pools[source] = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"fetch-{source}")
+
+        futures = {
+            key: pools[source].submit(_timed_call, getattr(fetcher, method), args, kwargs,
+                                      _semaphore(source), deadline)
+            for key, (source, method, args, kwargs) in parsed.items()
+        }
+        wait(futures.values(), timeout=timeout)
+
+        results: Dict[Hashable, FetchResult] = {}
+        for key, future in futures.items():
+            source, method = parsed[key][:2]
+            if not future.done():
+                future.cancel()
+                results[key] = FetchResult(source, method, error=TimeoutError(f"{method} 超过 {timeout} 秒未完成"))
+                continue
+            value, error, elapsed = future.result()
+            results[key] = FetchResult(source, method, value=value, error=error, elapsed=elapsed)
+        return results
+    finally:
+        # 超时时不等待仍在运行的请求 (线程结束后自行退出)
+        for pool in pools.values():
+            pool.shutdown(wait=timeout is None, cancel_futures=True)
+
+
+def _timed_call(fn: Any, args: tuple, kwargs: dict, semaphore: threading.BoundedSemaphore,
+                deadline: Optional[float]) -> Tuple[Any, Optional[BaseException], float]:
+    """占用数据源的全局配额后调用 fn；超过 deadline 仍未拿到配额则不再发起请求"""
+    wait_s = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+    if not semaphore.acquire(timeout=wait_s):
+        return None, TimeoutError(f"{getattr(fn, '__name__', fn)} 等待数据源并发配额超时"), 0.0
+    start = time.perf_counter()
+    try:
+        value = fn(*args, **kwargs)
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+    finally:
+        semaphore.release()
+    return value, None, time.perf_counter() - start
@@ -14,10 +14,22 @@ Market Sizing Data Fetcher
     from data_fetcher import DataFetcher
     df = DataFetcher()
     gdp = df.get_china_gdp()
+
+磁盘缓存 (见 fetch_cache.py，批量生成报告时避免重复下载):
+    from data_fetcher import get_data_fetcher
+    df = get_data_fetcher(cache_dir=".fetch_cache")               # 按数据源的有效期缓存
+    df = get_data_fetcher(cache_dir=".fetch_cache", offline=True) # 只读缓存
+
+并发获取多个数据源 (见 concurrent_fetch.py，总耗时取决于最慢的数据源):
+    results = df.fetch_many({
+        "gdp": ("akshare", "get_china_gdp", ()),
+        "us_gdp": ("fred", "get_fred_series", ("GDP",)),
+    })
+    gdp = results["gdp"].unwrap()
 """
 
 import os
-from typing import Optional, Union
+from typing import Dict, Hashable, Mapping, Optional, Sequence, Union
 from datetime import datetime, timedelta
 import warnings
 
@@ -71,6 +83,13 @@ try:
 except ImportError:
     pass
 
+try:
+    from .fetch_cache import CachedFetcher
+    from .concurrent_fetch import FetchResult, RequestSpec, fetch_many
+except ImportError:
+    from fetch_cache import CachedFetcher
+    from concurrent_fetch import FetchResult, RequestSpec, fetch_many
+
 
 class DataFetcher:
     """
@@ -84,6 +103,23 @@ class DataFetcher:
         >>> gdp = df.get_china_gdp()
         >>> print(gdp.tail())
     """
+
+    # 访问网络的方法 -> 数据源 (CachedFetcher 据此缓存并选择有效期)
+    SOURCES = {
+        "get_fred_series": "fred",
+        "get_worldbank_indicator": "worldbank",
+        "get_china_gdp": "akshare",
+        "get_china_cpi": "akshare",
+        "get_china_pmi": "akshare",
+        "get_china_money_supply": "akshare",
+        "get_china_industry_data": "akshare",
+        "get_a_share_financials": "baostock",
+        "get_a_share_history": "baostock",
+        "get_company_financials": "yfinance",
+        "get_company_history": "yfinance",
+        "get_search_trend": "pytrends",
+        "compare_search_trends": "pytrends",
+    }
     
     def __init__(self, fred_api_key: Optional[str] = None):
         """
@@ -391,6 +427,31 @@ class DataFetcher:
         pytrends.build_payload(keywords, cat=0, timeframe=timeframe, geo=geo)
         return pytrends.interest_over_time()
     
+    # ==================== 批量获取 ====================
+
+    def fetch_many(
+        self,
+        requests: Union[Mapping[Hashable, RequestSpec], Sequence[RequestSpec]],
+        concurrency: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[Hashable, FetchResult]:
+        """
+        并发执行一批数据请求，按数据源限制并发数
+
+        Args:
+            requests: {名称: (数据源, 方法名, 位置参数[, 关键字参数])} 或请求列表
+            concurrency: {数据源: 本次调用最多使用的线程数}，不超过全局上限 (concurrent_fetch.DEFAULT_CONCURRENCY)
+            timeout: 整批请求的超时 (秒)
+
+        Returns:
+            {名称: FetchResult}，失败的请求 error 字段为异常，不影响其他请求
+
+        Example:
+            >>> results = df.fetch_many([("akshare", "get_china_cpi", ()), ("fred", "get_fred_series", ("UNRATE",))])
+            >>> cpi = results[0].unwrap()
+        """
+        return fetch_many(self, requests, concurrency=concurrency, timeout=timeout)
+
     # ==================== 清理 ====================
     
     def close(self):
@@ -401,9 +462,24 @@ class DataFetcher:
 
 
 # 快捷函数
-def get_data_fetcher() -> DataFetcher:
-    """获取 DataFetcher 单例"""
-    return DataFetcher()
+def get_data_fetcher(
+    cache_dir: Optional[str] = None,
+    offline: bool = False,
+    ttl: Union[None, float, dict] = None,
+) -> Union[DataFetcher, CachedFetcher]:
+    """
+    获取 DataFetcher 实例
+
+    Args:
+        cache_dir: 磁盘缓存目录；为 None 时不缓存
+        offline: 离线模式，只从缓存读取 (需要 cache_dir)
+        ttl: 有效期 (秒)，数字或 {数据源: 秒}，默认见 fetch_cache.DEFAULT_TTL
+    """
+    if cache_dir is None:
+        if offline:
+            raise ValueError("离线模式需要指定 cache_dir")
+        return DataFetcher()
+    return CachedFetcher(DataFetcher(), cache_dir=cache_dir, ttl=ttl, offline=offline)
 
 
 if __name__ == "__main__":
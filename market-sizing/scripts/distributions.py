@@ -0,0 +1,327 @@
+"""
+Distributions
+=============
+
+Monte Carlo 假设使用的概率分布，每种分布都提供向量化的逆 CDF (ppf)，
+因此伪随机、拉丁超立方、Sobol 准随机抽样以及增量重算都使用同一套定义。
+
+| 分布            | 参数 (Assumption.params)                    | 说明                              |
+|-----------------|---------------------------------------------|-----------------------------------|
+| uniform         | -                                           | [min, max] 均匀                   |
+| triangular      | -                                           | min / most_likely / max 三角      |
+| normal          | -                                           | most_likely ± 2σ = [min, max]，裁剪 (旧行为) |
+| lognormal       | -                                           | 中位数 most_likely，裁剪 (旧行为) |
+| pert            | lamb (默认 4)                               | Beta-PERT，众数 most_likely       |
+| truncnormal     | mean, std (默认 most_likely, (max-min)/4)   | 截断正态，不在边界堆积概率        |
+| trunclognormal  | median, sigma (默认 most_likely, ln(max/min)/4) | 截断对数正态                  |
+| discrete        | values, probabilities (默认等概率)          | 离散取值                          |
+| empirical       | data                                        | 经验分布 (按观测值重抽样)         |
+| histogram       | edges, weights                              | 分箱直方图，箱内均匀              |
+| piecewise       | x, p                                        | 分段线性 CDF (专家给出的分位点)   |
+
+normal / lognormal 为兼容旧结果保留裁剪行为 (超出范围的概率堆积在 min/max 上)，
+需要无偏的尾部分位数时请改用 truncnormal / trunclognormal。
+
+使用方法:
+    from monte_carlo import Assumption
+
+    Assumption.pert(min=0.05, most_likely=0.10, max=0.25)
+    Assumption.truncnormal(mean=100, std=30, min=0, max=200)
+    Assumption.discrete(values=[1, 2, 3], probabilities=[0.2, 0.5, 0.3])
+    Assumption.empirical(data=historical_prices)
+    Assumption.piecewise(x=[30, 50, 80, 120, 160], p=[0, 0.1, 0.5, 0.9, 1])
+"""
+
+import math
+from typing import Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("distributions 需要 numpy。请安装: pip install numpy")
+
+
+DISTRIBUTIONS = (
+    "uniform", "triangular", "normal", "lognormal",
+    "pert", "truncnormal", "trunclognormal",
+    "discrete", "empirical", "histogram", "piecewise",
+)
+
+# 由 params 中的数据决定取值范围的分布 (min / max / most_likely 可由 params 推出)
+DATA_DISTRIBUTIONS = ("discrete", "empirical", "histogram", "piecewise")
+
+# 与取值同单位的参数 (单位换算时随 min / max 一起缩放；lamb、sigma、概率与权重不变)
+_VALUE_PARAMS = ("mean", "std", "median", "values", "data", "edges", "x")
+
+# PERT 逆 CDF 查表的网格点数 (余弦网格，两端加密)
+_PERT_GRID = 8193
+
+
+def norm_ppf(u: np.ndarray) -> np.ndarray:
+    """
+    标准正态分布的逆 CDF (Acklam 有理逼近，相对误差 < 1.2e-9)，向量化
+    """
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+
+    u = np.clip(np.asarray(u, dtype=float), 1e-300, 1 - 1e-16)
+    x = np.empty_like(u)
+    p_low = 0.02425
+
+    lower = u < p_low
+    upper = u > 1 - p_low
+    central = ~(lower | upper)
+
+    q = np.sqrt(-2 * np.log(u[lower]))
+    x[lower] = (((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
+               ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1)
+
+    q = np.sqrt(-2 * np.log(1 - u[upper]))
+    x[upper] = -(((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
+                ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1)
+
+    q = u[central] - 0.5
+    r = q * q
+    x[central] = (((((a[0]*r + a[1])*r + a[2])*r + a[3])*r + a[4])*r + a[5]) * q / \
+                 (((((b[0]*r + b[1])*r + b[2])*r + b[3])*r + b[4])*r + 1)
+    return x
+
+
+def _norm_cdf(z: float) -> float:
+    """标准正态 CDF (标量，仅用于截断边界)"""
+    return 0.5 * math.erfc(-z / math.sqrt(2))
+
+
+def norm_cdf(z: np.ndarray) -> np.ndarray:
+    """
+    标准正态分布的 CDF (erfc 的 Chebyshev 逼近，相对误差 < 1.2e-7)，向量化
+
+    用于把相关的正态变量映射为均匀随机数 (高斯 copula)。
+    """
+    x = np.abs(np.asarray(z, dtype=float)) / math.sqrt(2)
+    t = 1.0 / (1.0 + 0.5 * x)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    tail = 0.5 * t * np.exp(-x * x + poly)  # 0.5 * erfc(|z| / √2)
+    return np.where(np.asarray(z) >= 0, 1.0 - tail, tail)
+
+
+def _truncated_standard_ppf(u: np.ndarray, a: float, b: float) -> np.ndarray:
+    """
+    截断在 [a, b] 的标准正态的逆 CDF
+
+    下界在均值右侧时按对称性翻转计算，避免 Φ(a)、Φ(b) 都接近 1 时的相消误差。
+    """
+    if a > 0:
+        return -_truncated_standard_ppf(1 - u, -b, -a)
+    lo, hi = _norm_cdf(a), _norm_cdf(b)
+    return np.clip(norm_ppf(lo + u * (hi - lo)), a, b)
+
+
+def pert_shape(lo: float, mode: float, hi: float, lamb: float = 4.0) -> Tuple[float, float]:
+    """Beta-PERT 的 Beta(α, β) 形状参数"""
+    width = hi - lo
+    alpha = 1 + lamb * (mode - lo) / width
+    beta = 1 + lamb * (hi - mode) / width
+    return alpha, beta
+
+
+def _beta_ppf(u: np.ndarray, alpha: float, beta: float) -> np.ndarray:
+    """
+    Beta(α, β) (α, β ≥ 1) 的逆 CDF：在两端加密的网格上对密度做梯形积分得到 CDF，
+    再线性插值求逆。每次只需 O(网格) 的准备，对样本数是 O(n log 网格)。
+    """
+    t = np.linspace(0.0, 1.0, _PERT_GRID)
+    x = (1 - np.cos(np.pi * t)) / 2
+    pdf = x ** (alpha - 1) * (1 - x) ** (beta - 1)  # 未归一化，α, β ≥ 1 时在 [0, 1] 上有界
+    cdf = np.concatenate([[0.0], np.cumsum((pdf[1:] + pdf[:-1]) / 2 * np.diff(x))])
+    cdf /= cdf[-1]
+    return np.interp(u, cdf, x)
+
+
+def _probabilities(params: dict, k: int) -> np.ndarray:
+    probs = params.get("probabilities")
+    return np.ones(k) if probs is None else np.asarray(probs, dtype=float)
+
+
+def _discrete_table(params: dict) -> Tuple[np.ndarray, np.ndarray]:
+    values = np.asarray(params["values"], dtype=float)
+    probs = _probabilities(params, len(values))
+    order = np.argsort(values, kind="stable")
+    values, probs = values[order], probs[order]
+    return values, np.cumsum(probs) / probs.sum()
+
+
+def _histogram_cdf(params: dict) -> Tuple[np.ndarray, np.ndarray]:
+    edges = np.asarray(params["edges"], dtype=float)
+    weights = np.asarray(params["weights"], dtype=float)
+    return edges, np.concatenate([[0.0], np.cumsum(weights) / weights.sum()])
+
+
+def validate(distribution: str, lo: float, mode: float, hi: float, params: Dict) -> None:
+    """校验分布参数，不合法时抛出 ValueError"""
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"未知分布类型: {distribution}，可选: {', '.join(DISTRIBUTIONS)}")
+
+    if distribution == "pert" and params.get("lamb", 4.0) <= 0:
+        raise ValueError("pert 的 lamb 必须为正数")
+    elif distribution == "truncnormal" and params.get("std", 1.0) <= 0:
+        raise ValueError("truncnormal 的 std 必须为正数")
+    elif distribution == "trunclognormal":
+        if hi <= 0:
+            raise ValueError("trunclognormal 的取值范围必须包含正数")
+        if params.get("median", 1.0) <= 0 or params.get("sigma", 1.0) <= 0:
+            raise ValueError("trunclognormal 的 median / sigma 必须为正数")
+        # 未给出时 sigma 默认 ln(max/min)/4、median 默认 most_likely，均需在对数域有定义
+        if "sigma" not in params and not 0 < lo < hi:
+            raise ValueError(f"trunclognormal 未给出 params['sigma'] 时需要 0 < min < max，当前 min={lo}, max={hi}")
+        if "median" not in params and mode <= 0:
+            raise ValueError(f"trunclognormal 未给出 params['median'] 时 most_likely 必须为正数，当前值: {mode}")
+    elif distribution == "discrete":
+        values, probs = params.get("values"), params.get("probabilities")
+        if values is None or len(values) == 0:
+            raise ValueError("discrete 分布需要 params['values']")
+        if probs is not None:
+            probs = np.asarray(probs, dtype=float)
+            if len(probs) != len(values) or probs.min() < 0 or probs.sum() <= 0:
+                raise ValueError("discrete 的 probabilities 必须与 values 等长、非负且和为正")
+    elif distribution == "empirical":
+        if params.get("data") is None or len(params["data"]) == 0:
+            raise ValueError("empirical 分布需要非空的 params['data']")
+    elif distribution == "histogram":
+        edges, weights = params.get("edges"), params.get("weights")
+        if edges is None or weights is None or len(edges) != len(weights) + 1:
+            raise ValueError("histogram 需要 params['edges'] (k+1 个) 与 params['weights'] (k 个)")
+        weights = np.asarray(weights, dtype=float)
+        if np.any(np.diff(edges) <= 0) or weights.min() < 0 or weights.sum() <= 0:
+            raise ValueError("histogram 的 edges 必须严格递增，weights 非负且和为正")
+    elif distribution == "piecewise":
+        x, p = params.get("x"), params.get("p")
+        if x is None or p is None or len(x) != len(p) or len(x) < 2:
+            raise ValueError("piecewise 需要等长的 params['x'] 与 params['p'] (至少 2 个点)")
+        if np.any(np.diff(x) < 0) or np.any(np.diff(p) < 0) or p[0] != 0 or p[-1] != 1:
+            raise ValueError("piecewise 的 x、p 必须非递减，且 p 从 0 开始到 1 结束")
+
+
+def support(distribution: str, params: Dict) -> Tuple[float, float, float]:
+    """
+    由 params 推出数据型分布的 (min, most_likely, max)
+
+    most_likely 作为敏感性分析的基准值: discrete 取概率最大的值，
+    empirical / piecewise 取中位数，histogram 取密度最高的箱的中点。
+    """
+    if distribution == "discrete":
+        values = np.asarray(params["values"], dtype=float)
+        probs = _probabilities(params, len(values))
+        return float(values.min()), float(values[np.argmax(probs)]), float(values.max())
+    if distribution == "empirical":
+        data = np.asarray(params["data"], dtype=float)
+        return float(data.min()), float(np.median(data)), float(data.max())
+    if distribution == "histogram":
+        edges = np.asarray(params["edges"], dtype=float)
+        density = np.asarray(params["weights"], dtype=float) / np.diff(edges)
+        k = int(np.argmax(density))
+        return float(edges[0]), float((edges[k] + edges[k + 1]) / 2), float(edges[-1])
+    if distribution == "piecewise":
+        x, p = np.asarray(params["x"], dtype=float), np.asarray(params["p"], dtype=float)
+        return float(x[0]), float(np.interp(0.5, p, x)), float(x[-1])
+    raise ValueError(f"{distribution} 不是数据型分布")
+
+
+def scale_params(params: Dict, factor: float) -> Dict:
+    """
+    取值整体乘以正数 factor 后的 params (单位换算用)
+
+    所有分布都对取值的正比例缩放封闭: 缩放后的分布等于原分布的样本乘以 factor。
+    """
+    if not factor > 0:
+        raise ValueError(f"factor 必须为正数，当前值: {factor}")
+    scaled = dict(params)
+    for key in _VALUE_PARAMS:
+        if key in scaled and scaled[key] is not None:
+            value = scaled[key]
+            if isinstance(value, (list, tuple, np.ndarray)):
+                scaled[key] = (np.asarray(value, dtype=float) * factor).tolist()
+            else:
+                scaled[key] = value * factor
+    return scaled
+
+
+def inverse_cdf(distribution: str, lo: float, mode: float, hi: float, params: Dict,
+                u: np.ndarray) -> np.ndarray:
+    """
+    逆 CDF 变换：把 [0, 1) 均匀样本映射为指定分布
+
+    Args:
+        distribution: 分布类型 (见 DISTRIBUTIONS)
+        lo / mode / hi: Assumption 的 min / most_likely / max
+        params: Assumption.params
+        u: 均匀样本数组
+    """
+    u = np.asarray(u, dtype=float)
+
+    if distribution == "uniform":
+        return lo + u * (hi - lo)
+
+    if distribution == "triangular":
+        width = hi - lo
+        if width == 0:
+            return np.full(len(u), float(lo))
+        split = (mode - lo) / width
+        left = lo + np.sqrt(u * width * (mode - lo))
+        right = hi - np.sqrt((1 - u) * width * (hi - mode))
+        return np.where(u < split, left, right)
+
+    if distribution == "normal":
+        # 使用 min/max 作为 ±2σ，裁剪到范围内
+        std = (hi - lo) / 4
+        return np.clip(mode + std * norm_ppf(u), lo, hi)
+
+    if distribution == "lognormal":
+        log_std = (np.log(hi) - np.log(lo)) / 4
+        return np.clip(np.exp(np.log(mode) + log_std * norm_ppf(u)), lo, hi)
+
+    if distribution == "pert":
+        if hi == lo:
+            return np.full(len(u), float(lo))
+        alpha, beta = pert_shape(lo, mode, hi, params.get("lamb", 4.0))
+        return lo + (hi - lo) * _beta_ppf(u, alpha, beta)
+
+    if distribution == "truncnormal":
+        if hi == lo:
+            return np.full(len(u), float(lo))
+        mean = params.get("mean", mode)
+        std = params.get("std", (hi - lo) / 4)
+        z = _truncated_standard_ppf(u, (lo - mean) / std, (hi - mean) / std)
+        return np.clip(mean + std * z, lo, hi)
+
+    if distribution == "trunclognormal":
+        mu = math.log(params.get("median", mode))
+        sigma = params["sigma"] if "sigma" in params else (math.log(hi) - math.log(lo)) / 4
+        a = (math.log(lo) - mu) / sigma if lo > 0 else -math.inf
+        z = _truncated_standard_ppf(u, a, (math.log(hi) - mu) / sigma)
+        return np.clip(np.exp(mu + sigma * z), lo, hi)
+
+    if distribution == "discrete":
+        values, cdf = _discrete_table(params)
+        return values[np.minimum(np.searchsorted(cdf, u, side="right"), len(values) - 1)]
+
+    if distribution == "empirical":
+        data = np.sort(np.asarray(params["data"], dtype=float))
+        return data[np.minimum((u * len(data)).astype(np.int64), len(data) - 1)]
+
+    if distribution == "histogram":
+        edges, cdf = _histogram_cdf(params)
+        return np.interp(u, cdf, edges)
+
+    if distribution == "piecewise":
+        return np.interp(u, np.asarray(params["p"], dtype=float), np.asarray(params["x"], dtype=float))
+
+    raise ValueError(f"未知分布类型: {distribution}")
@@ -9,6 +9,13 @@ Fermi 估算计算引擎，支持多种分解模式：
 4. 价值链法: 终端产品市场 × 该环节价值占比
 5. 频率法: 目标用户数 × 使用频率 × 单次价值
 
+参数网格 (grid，需要 numpy): 任意参数传入数组即成为一个维度，一次向量化计算整个结果立方体，
+逐格的计算步骤只在查看该格时才生成。
+
+不确定性 (需要 numpy): 五种方法的数值参数 (含筛选占比) 都可以直接传入 Assumption 区间，
+结果同时包含以 most_likely 计算的点估计 (计算步骤) 和 Monte Carlo 分布 (result.distribution)，
+模型只需写一次。
+
 使用方法:
     from fermi_calculator import FermiCalculator
     
@@ -21,12 +28,96 @@ Fermi 估算计算引擎，支持多种分解模式：
         frequency=52  # 周均消费次数
     )
     print(result)
+    
+    cube = calc.grid(
+        "population_based",
+        base_population=1.4e9,
+        filters=[("城市人口", 0.65), ("咖啡饮用者", 0.15)],
+        penetration_rate=np.linspace(0.1, 0.6, 20),
+        average_spend=np.arange(20, 40),
+        frequency=[12, 24, 52],
+    )
+    cube.values.shape               # (20, 20, 3)
+    print(cube.sel(penetration_rate=0.1, average_spend=25, frequency=52))
+    
+    result = FermiCalculator(n_simulations=100_000).institution_based(
+        institution_count=5000,
+        adoption_rate=Assumption(min=0.7, most_likely=0.85, max=0.95),
+        units_per_institution=1,
+        price_per_unit=Assumption(min=1e6, most_likely=1.5e6, max=2e6),
+    )
+    result.value                    # 点估计 (most_likely)
+    result.distribution.p5          # Monte Carlo 分布 (MonteCarloResult)
 """
 
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Callable
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Optional, Callable, Union
+import functools
+import inspect
 import math
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    from .formula_expr import Expression, compile_formula
+    from .units import Quantity, format_number, format_quantity
+except ImportError:
+    from formula_expr import Expression, compile_formula
+    from units import Quantity, format_number, format_quantity
+
+# 可选: Monte Carlo 模块 (参数为 Assumption 区间时需要；依赖 numpy)
+MONTE_CARLO_AVAILABLE = False
+try:
+    try:
+        from .monte_carlo import Assumption, MonteCarloSimulator
+    except ImportError:
+        from monte_carlo import Assumption, MonteCarloSimulator
+    MONTE_CARLO_AVAILABLE = True
+except ImportError:
+    Assumption = MonteCarloSimulator = None
+
+
+# grid() 支持的方法: {方法名: {参数名: 校验规则}}
+# 校验规则与标量方法一致: "positive" 必须为正数, "rate" 必须在 (0, 1] 内, None 不校验
+_GRID_METHODS = {
+    "population_based": {
+        "base_population": "positive", "penetration_rate": "rate",
+        "average_spend": "positive", "frequency": "positive",
+    },
+    "institution_based": {
+        "institution_count": "positive", "adoption_rate": "rate",
+        "units_per_institution": "positive", "price_per_unit": "positive",
+    },
+    "substitution_based": {"existing_market_size": None, "substitution_rate": None, "price_premium": None},
+    "value_chain_based": {"end_market_size": None, "value_share": None},
+    "value_based": {
+        "target_count": None, "problem_frequency": None,
+        "problem_cost": None, "willingness_to_pay_ratio": None,
+    },
+}
+
+# 参数名 → assumptions_sources 中的假设名 (与各标量方法一致)
+_SOURCE_KEYS = {
+    "base_population": "基础人口", "penetration_rate": "渗透率", "average_spend": "客单价", "frequency": "频率",
+    "institution_count": "机构数量", "adoption_rate": "采用率", "units_per_institution": "每机构用量",
+    "price_per_unit": "单价",
+    "existing_market_size": "现有市场", "substitution_rate": "替代率", "price_premium": "价格系数",
+    "end_market_size": "终端市场", "value_share": "价值链占比",
+    "target_count": "目标客户", "problem_frequency": "问题频率", "problem_cost": "问题成本",
+    "willingness_to_pay_ratio": "愿付比例",
+}
+
 
 @dataclass
 class FermiResult:
@@ -37,11 +128,12 @@ class FermiResult:
     formula: str                          # 计算公式
     method: str                           # 使用的方法
     assumptions: List[Tuple[str, float, str]]  # 假设列表 [(假设名, 值, 来源)]
+    distribution: Optional[Any] = None    # 参数含 Assumption 区间时的 Monte Carlo 分布 (MonteCarloResult)
     
     def __str__(self) -> str:
         lines = [f"== Fermi 估算结果 =="]
         lines.append(f"方法: {self.method}")
-        lines.append(f"结果: {self._format_number(self.value)} {self.unit}")
+        lines.append(f"结果: {format_quantity(self.value, self.unit)}")
         lines.append(f"\n公式: {self.formula}")
         lines.append(f"\n计算步骤:")
         for i, (desc, val, basis) in enumerate(self.steps, 1):
@@ -49,19 +141,41 @@ class FermiResult:
         lines.append(f"\n关键假设:")
         for name, val, source in self.assumptions:
             lines.append(f"  - {name}: {val} (来源: {source})")
+        if self.distribution is not None:
+            d = self.distribution
+            lines.append(f"\nMonte Carlo ({d.n_simulations:,} 次):")
+            lines.append(f"  P50: {format_quantity(d.median, self.unit)}")
+            lines.append(f"  90% CI: [{format_quantity(d.p5, self.unit)}, {format_quantity(d.p95, self.unit)}]")
         return "\n".join(lines)
     
-    @staticmethod
-    def _format_number(n: float) -> str:
-        """格式化大数字"""
-        if n >= 1e12:
-            return f"{n/1e12:.2f} 万亿"
-        elif n >= 1e8:
-            return f"{n/1e8:.2f} 亿"
-        elif n >= 1e4:
-            return f"{n/1e4:.2f} 万"
-        else:
-            return f"{n:.2f}"
+    _format_number = staticmethod(format_number)
+    
+    @property
+    def quantity(self) -> Quantity:
+        """带单位的结果值，可直接相加或换算 (如各段结果求和后 .to("亿元"))"""
+        return Quantity(self.value, self.unit)
+    
+    def to(self, unit: str, fx: Any = None) -> "FermiResult":
+        """
+        换算结果单位 (value 与 distribution)；计算步骤保持原单位
+        
+        Args:
+            unit: 目标单位 (如 "亿元")
+            fx: 跨币种汇率，见 units.conversion_factor
+        """
+        factor = Quantity(1.0, self.unit).to(unit, fx).value
+        distribution = self.distribution
+        if distribution is not None:
+            distribution = distribution.scaled(factor, unit)
+        return FermiResult(
+            value=self.value * factor,
+            unit=unit,
+            steps=self.steps,
+            formula=self.formula,
+            method=self.method,
+            assumptions=self.assumptions,
+            distribution=distribution,
+        )
     
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -72,9 +186,174 @@ class FermiResult:
             "formula": self.formula,
             "method": self.method,
             "assumptions": self.assumptions,
+            "distribution": self.distribution.to_dict() if self.distribution is not None else None,
         }
 
 
+@dataclass
+class FermiGrid:
+    """
+    Fermi 参数网格的结果立方体 (由 FermiCalculator.grid 生成)
+    
+    values 的每个维度对应 dims 中的一个参数，坐标在 coords 中；
+    某一格的 FermiResult (计算步骤、假设列表) 在 cell / sel 访问时才构建并缓存。
+    """
+    method: str                           # 方法名 (如 "population_based")
+    unit: str                             # 单位
+    dims: List[str]                       # 维度名 (参数名或筛选条件名；逐元素模式为 ["cell"])
+    coords: Dict[str, Any]                # 各维度坐标 {维度名: 数组}
+    values: Any                           # 结果立方体 (numpy 数组)
+    _calculator: Any = field(default=None, repr=False)
+    _inputs: Dict[str, Any] = field(default_factory=dict, repr=False)       # 已广播到 values 形状的参数
+    _filter_names: List[str] = field(default_factory=list, repr=False)
+    _options: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _cells: Dict[Tuple[int, ...], FermiResult] = field(default_factory=dict, repr=False)
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.values.shape
+    
+    def cell(self, *index: int) -> FermiResult:
+        """按整数下标取某一格的完整 FermiResult"""
+        if len(index) != len(self.shape):
+            raise IndexError(f"需要 {len(self.shape)} 个下标 ({', '.join(self.dims)})，当前为 {len(index)} 个")
+        index = tuple(int(i) % n if -n <= int(i) < n else _raise_index(i, n) for i, n in zip(index, self.shape))
+        if index not in self._cells:
+            params = {name: _scalar(array[index]) for name, array in self._inputs.items()}
+            if self.method == "population_based":
+                params["filters"] = [(name, params.pop(name)) for name in self._filter_names]
+            method = getattr(self._calculator, self.method)
+            self._cells[index] = method(**params, **self._options)
+        return self._cells[index]
+    
+    def sel(self, **coords: float) -> FermiResult:
+        """按坐标值取某一格 (每个维度都需给出，按最接近的坐标匹配)"""
+        missing = [d for d in self.dims if d not in coords]
+        if missing:
+            raise KeyError(f"缺少维度坐标: {', '.join(missing)}，维度为: {', '.join(self.dims)}")
+        return self.cell(*(int(np.argmin(np.abs(np.asarray(self.coords[d], dtype=float) - coords[d])))
+                           for d in self.dims))
+    
+    def idxmax(self) -> Dict[str, float]:
+        """最大值所在格的坐标"""
+        return self._coords_at(np.unravel_index(int(np.argmax(self.values)), self.shape))
+    
+    def idxmin(self) -> Dict[str, float]:
+        """最小值所在格的坐标"""
+        return self._coords_at(np.unravel_index(int(np.argmin(self.values)), self.shape))
+    
+    def _coords_at(self, index: Tuple[int, ...]) -> Dict[str, float]:
+        return {d: _scalar(self.coords[d][i]) for d, i in zip(self.dims, index)}
+    
+    def to_dataframe(self) -> "pd.DataFrame":
+        """转换为长表 (每格一行，维度列 + value 列；需要 pandas)"""
+        if not PANDAS_AVAILABLE:
+            raise ImportError("to_dataframe 需要 pandas。请安装: pip install pandas")
+        index = pd.MultiIndex.from_product([self.coords[d] for d in self.dims], names=self.dims)
+        return pd.DataFrame({"value": self.values.ravel()}, index=index).reset_index()
+
+
+def _raise_index(i: int, n: int) -> None:
+    raise IndexError(f"下标 {i} 超出范围 (维度长度 {n})")
+
+
+def _scalar(value: Any) -> Any:
+    """numpy 标量 → Python 数值"""
+    return value.item() if hasattr(value, "item") else value
+
+
+class _FermiModel:
+    """
+    把 Fermi 方法包装成 Monte Carlo 公式: 关键字参数为各个不确定参数的样本，
+    其余参数取固定值，经 FermiCalculator.grid 向量化计算 (与点估计共用同一套定义与校验)
+    
+    只保存 method / fixed / filters: 结果缓存按实例属性指纹化，grid 不依赖计算器状态，
+    不保存计算器 (含模拟器、随机数生成器) 才能跨进程命中缓存
+    """
+    
+    def __init__(self, method: str, fixed: Dict[str, Any], filters: Optional[List[Tuple[str, Any]]]):
+        self.method = method
+        self.fixed = fixed
+        self.filters = filters
+    
+    def __call__(self, **samples: Any) -> Any:
+        params = {**self.fixed, **{k: v for k, v in samples.items() if k in self.fixed}}
+        if self.filters is not None:
+            params["filters"] = [(name, samples.get(name, rate)) for name, rate in self.filters]
+        outer = not any(np.ndim(v) for v in samples.values())
+        return FermiCalculator().grid(self.method, outer=outer, **params).values
+
+
+def _accepts_assumptions(method: Callable[..., "FermiResult"]) -> Callable[..., "FermiResult"]:
+    """
+    让 Fermi 方法的数值参数 (及 population_based 的筛选占比) 接受 Assumption
+    
+    有 Assumption 时: 以 most_likely 计算点估计，并以同一方法定义向量化求 Monte Carlo 分布，
+    结果放在 FermiResult.distribution；Assumption.source 作为未显式给出的假设来源。
+    """
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self: "FermiCalculator", *args: Any, **kwargs: Any) -> "FermiResult":
+        if not any(_is_assumption(v) or (isinstance(v, list) and any(_is_assumption(f[1]) for f in v))
+                   for v in (*args, *kwargs.values())):
+            return method(self, *args, **kwargs)  # 全部为确定值: 保持原有的标量调用开销
+        bound = signature.bind(self, *args, **kwargs)
+        params = {k: v for k, v in bound.arguments.items() if k != "self"}
+        filters = params.get("filters")
+        uncertain = {k: v for k, v in params.items() if _is_assumption(v)}
+        uncertain.update({name: rate for name, rate in (filters or []) if _is_assumption(rate)})
+        
+        point = {k: (v.most_likely if _is_assumption(v) else v) for k, v in params.items()}
+        if filters is not None:
+            point["filters"] = [(name, rate.most_likely if _is_assumption(rate) else rate) for name, rate in filters]
+        sources = dict(params.get("assumptions_sources") or {})
+        for name, assumption in uncertain.items():
+            if assumption.source:
+                sources.setdefault(_SOURCE_KEYS.get(name, name), assumption.source)
+        point["assumptions_sources"] = sources
+        result = method(self, **point)
+        
+        # 区间端点先按方法规则整体校验一次 (如 min 为 0 的渗透率)，报错信息与标量方法一致
+        fixed = {k: v for k, v in point.items() if k not in ("unit", "assumptions_sources", "filters")}
+        model = _FermiModel(method.__name__, fixed, point.get("filters"))
+        model(**{name: np.array([a.min, a.max], dtype=float) for name, a in uncertain.items()})
+        
+        simulator = self.simulator if self.simulator is not None else MonteCarloSimulator(seed=self.seed)
+        result.distribution = simulator.run(
+            uncertain, model, n_simulations=self.n_simulations, unit=point.get("unit", "元"),
+            **self.mc_options,
+        )
+        return result
+    
+    return wrapper
+
+
+def _graph_result(method: str, **params: Any) -> FermiResult:
+    """
+    用 FermiGraph 的同名构建器求值并渲染 FermiResult
+    
+    五种方法的计算、校验、步骤与假设只在 fermi_graph 中定义一次，标量方法与依赖图共用
+    """
+    try:
+        from .fermi_graph import FermiGraph
+    except ImportError:
+        from fermi_graph import FermiGraph
+    graph = FermiGraph()
+    return graph.result(getattr(graph, method)(**params))
+
+
+def _is_assumption(value: Any) -> bool:
+    if MONTE_CARLO_AVAILABLE and isinstance(value, Assumption):
+        return True
+    if type(value).__name__ == "Assumption" and hasattr(value, "most_likely"):
+        # 以另一种导入方式 (scripts.monte_carlo / monte_carlo) 创建的 Assumption
+        if not MONTE_CARLO_AVAILABLE:
+            raise ImportError("参数为 Assumption 时需要 numpy。请安装: pip install numpy")
+        return True
+    return False
+
+
 class FermiCalculator:
     """
     Fermi 估算计算器
@@ -89,8 +368,27 @@ class FermiCalculator:
         ...     frequency=100
         ... )
         >>> print(result)
+    
+    Args:
+        n_simulations: 参数含 Assumption 区间时的 Monte Carlo 模拟次数
+        seed: 随机种子 (未提供 simulator 时使用)
+        simulator: 共享的 MonteCarloSimulator (可带结果缓存)
+        mc_options: 透传给 MonteCarloSimulator.run 的其他参数 (如 {"sampling": "lhs"})
     """
     
+    def __init__(
+        self,
+        n_simulations: int = 10000,
+        seed: Optional[int] = None,
+        simulator: Any = None,
+        mc_options: Optional[dict] = None
+    ):
+        self.n_simulations = n_simulations
+        self.seed = seed
+        self.simulator = simulator
+        self.mc_options = dict(mc_options or {})
+    
+    @_accepts_assumptions
     def population_based(
         self,
         base_population: float,
@@ -115,58 +413,13 @@ class FermiCalculator:
             unit: 金额单位
             assumptions_sources: 假设来源 {假设名: 来源}
         """
-        assumptions_sources = assumptions_sources or {}
-        steps = []
-        assumptions = []
-        
-        # 输入校验
-        if base_population <= 0:
-            raise ValueError(f"base_population 必须为正数，当前值: {base_population}")
-        if not 0 < penetration_rate <= 1:
-            raise ValueError(f"penetration_rate 必须在 (0, 1] 范围内，当前值: {penetration_rate}")
-        if average_spend <= 0:
-            raise ValueError(f"average_spend 必须为正数，当前值: {average_spend}")
-        if frequency <= 0:
-            raise ValueError(f"frequency 必须为正数，当前值: {frequency}")
-        for name, rate in filters:
-            if not 0 < rate <= 1:
-                raise ValueError(f"筛选条件 '{name}' 的占比必须在 (0, 1] 范围内，当前值: {rate}")
-        
-        # Step 1: 基础人口
-        current = base_population
-        steps.append(("基础人口", current, "基数"))
-        assumptions.append(("基础人口", base_population, assumptions_sources.get("基础人口", "统计局/估算")))
-        
-        # Step 2: 各层筛选
-        for name, rate in filters:
-            current = current * rate
-            steps.append((f"筛选: {name} ({rate*100:.1f}%)", current, f"剩余 {self._format_number(current)} 人"))
-            assumptions.append((name, rate, assumptions_sources.get(name, "估算")))
-        
-        # Step 3: 渗透率
-        target_users = current * penetration_rate
-        steps.append((f"渗透率 ({penetration_rate*100:.1f}%)", target_users, f"目标用户 {self._format_number(target_users)} 人"))
-        assumptions.append(("渗透率", penetration_rate, assumptions_sources.get("渗透率", "估算")))
-        
-        # Step 4: 消费频率和客单价
-        total_value = target_users * average_spend * frequency
-        steps.append((f"年消费 (客单价 {average_spend}{unit} × 频率 {frequency})", total_value, "年市场规模"))
-        assumptions.append(("客单价", average_spend, assumptions_sources.get("客单价", "市场调研")))
-        assumptions.append(("年消费频率", frequency, assumptions_sources.get("频率", "估算")))
-        
-        # 构建公式
-        filter_str = " × ".join([f"{name}({rate})" for name, rate in filters])
-        formula = f"基数 × {filter_str} × 渗透率 × 客单价 × 频率"
-        
-        return FermiResult(
-            value=total_value,
-            unit=unit,
-            steps=steps,
-            formula=formula,
-            method="人口基数法",
-            assumptions=assumptions
+        return _graph_result(
+            "population_based", base_population=base_population, filters=filters, penetration_rate=penetration_rate,
+            average_spend=average_spend, frequency=frequency,
+            unit=unit, assumptions_sources=assumptions_sources,
         )
     
+    @_accepts_assumptions
     def institution_based(
         self,
         institution_count: float,
@@ -187,50 +440,13 @@ class FermiCalculator:
             units_per_institution: 每个机构的用量
             price_per_unit: 单位价格
         """
-        assumptions_sources = assumptions_sources or {}
-        steps = []
-        assumptions = []
-        
-        # 输入校验
-        if institution_count <= 0:
-            raise ValueError(f"institution_count 必须为正数，当前值: {institution_count}")
-        if not 0 < adoption_rate <= 1:
-            raise ValueError(f"adoption_rate 必须在 (0, 1] 范围内，当前值: {adoption_rate}")
-        if units_per_institution <= 0:
-            raise ValueError(f"units_per_institution 必须为正数，当前值: {units_per_institution}")
-        if price_per_unit <= 0:
-            raise ValueError(f"price_per_unit 必须为正数，当前值: {price_per_unit}")
-        
-        # Step 1: 机构数
-        steps.append(("目标机构数", institution_count, "基数"))
-        assumptions.append(("机构数量", institution_count, assumptions_sources.get("机构数量", "工商数据")))
-        
-        # Step 2: 采用率
-        adopters = institution_count * adoption_rate
-        steps.append((f"采用率 ({adoption_rate*100:.1f}%)", adopters, f"{self._format_number(adopters)} 机构"))
-        assumptions.append(("采用率", adoption_rate, assumptions_sources.get("采用率", "行业报告")))
-        
-        # Step 3: 每机构用量
-        total_units = adopters * units_per_institution
-        steps.append((f"每机构用量 ({units_per_institution})", total_units, f"总用量 {self._format_number(total_units)}"))
-        assumptions.append(("每机构用量", units_per_institution, assumptions_sources.get("每机构用量", "估算")))
-        
-        # Step 4: 单价
-        total_value = total_units * price_per_unit
-        steps.append((f"单价 ({price_per_unit} {unit})", total_value, "市场规模"))
-        assumptions.append(("单价", price_per_unit, assumptions_sources.get("单价", "市场调研")))
-        
-        formula = "机构数 × 采用率 × 每机构用量 × 单价"
-        
-        return FermiResult(
-            value=total_value,
-            unit=unit,
-            steps=steps,
-            formula=formula,
-            method="机构基数法",
-            assumptions=assumptions
+        return _graph_result(
+            "institution_based", institution_count=institution_count, adoption_rate=adoption_rate,
+            units_per_institution=units_per_institution, price_per_unit=price_per_unit,
+            unit=unit, assumptions_sources=assumptions_sources,
         )
     
+    @_accepts_assumptions
     def substitution_based(
         self,
         existing_market_size: float,
@@ -251,33 +467,13 @@ class FermiCalculator:
             substitution_rate: 预期替代率
             price_premium: 价格系数 (>1 表示溢价, <1 表示折价)
         """
-        assumptions_sources = assumptions_sources or {}
-        steps = []
-        assumptions = []
-        
-        steps.append(("现有市场规模", existing_market_size, "基数"))
-        assumptions.append(("现有市场", existing_market_size, assumptions_sources.get("现有市场", "行业报告")))
-        
-        substituted = existing_market_size * substitution_rate
-        steps.append((f"替代率 ({substitution_rate*100:.1f}%)", substituted, "可替代市场"))
-        assumptions.append(("替代率", substitution_rate, assumptions_sources.get("替代率", "技术分析")))
-        
-        total_value = substituted * price_premium
-        if price_premium != 1.0:
-            steps.append((f"价格系数 ({price_premium}x)", total_value, "市场规模"))
-            assumptions.append(("价格系数", price_premium, assumptions_sources.get("价格系数", "定价策略")))
-        
-        formula = "现有市场 × 替代率" + (f" × 价格系数({price_premium})" if price_premium != 1.0 else "")
-        
-        return FermiResult(
-            value=total_value,
-            unit=unit,
-            steps=steps,
-            formula=formula,
-            method="替代法",
-            assumptions=assumptions
+        return _graph_result(
+            "substitution_based", existing_market_size=existing_market_size, substitution_rate=substitution_rate,
+            price_premium=price_premium,
+            unit=unit, assumptions_sources=assumptions_sources,
         )
     
+    @_accepts_assumptions
     def value_chain_based(
         self,
         end_market_size: float,
@@ -296,28 +492,12 @@ class FermiCalculator:
             end_market_size: 终端产品/服务的市场规模
             value_share: 该环节在价值链中的占比
         """
-        assumptions_sources = assumptions_sources or {}
-        steps = []
-        assumptions = []
-        
-        steps.append(("终端市场规模", end_market_size, "下游市场"))
-        assumptions.append(("终端市场", end_market_size, assumptions_sources.get("终端市场", "行业报告")))
-        
-        total_value = end_market_size * value_share
-        steps.append((f"价值链占比 ({value_share*100:.1f}%)", total_value, "本环节市场"))
-        assumptions.append(("价值链占比", value_share, assumptions_sources.get("价值链占比", "产业分析")))
-        
-        formula = "终端市场 × 价值链占比"
-        
-        return FermiResult(
-            value=total_value,
-            unit=unit,
-            steps=steps,
-            formula=formula,
-            method="价值链法",
-            assumptions=assumptions
+        return _graph_result(
+            "value_chain_based", end_market_size=end_market_size, value_share=value_share,
+            unit=unit, assumptions_sources=assumptions_sources,
         )
     
+    @_accepts_assumptions
     def value_based(
         self,
         target_count: float,
@@ -340,36 +520,124 @@ class FermiCalculator:
             problem_cost: 每次问题的成本
             willingness_to_pay_ratio: 客户愿意为解决方案支付的比例
         """
-        assumptions_sources = assumptions_sources or {}
-        steps = []
-        assumptions = []
-        
-        steps.append(("目标客户数", target_count, "基数"))
-        assumptions.append(("目标客户", target_count, assumptions_sources.get("目标客户", "市场调研")))
-        
-        annual_problem_value = target_count * problem_frequency * problem_cost
-        steps.append((f"问题总成本 (频率 {problem_frequency} × 成本 {problem_cost})", annual_problem_value, "可解决的价值"))
-        assumptions.append(("问题频率", problem_frequency, assumptions_sources.get("问题频率", "客户调研")))
-        assumptions.append(("问题成本", problem_cost, assumptions_sources.get("问题成本", "财务数据")))
-        
-        total_value = annual_problem_value * willingness_to_pay_ratio
-        steps.append((f"愿付比例 ({willingness_to_pay_ratio*100:.1f}%)", total_value, "市场规模"))
-        assumptions.append(("愿付比例", willingness_to_pay_ratio, assumptions_sources.get("愿付比例", "定价调研")))
+        return _graph_result(
+            "value_based", target_count=target_count, problem_frequency=problem_frequency, problem_cost=problem_cost,
+            willingness_to_pay_ratio=willingness_to_pay_ratio,
+            unit=unit, assumptions_sources=assumptions_sources,
+        )
+    
+    def grid(
+        self,
+        method: str,
+        unit: str = "元",
+        assumptions_sources: Optional[dict] = None,
+        outer: bool = True,
+        **params: Any
+    ) -> FermiGrid:
+        """
+        参数网格上的批量 Fermi 估算 (需要 numpy)
         
-        formula = "目标客户 × 问题频率 × 问题成本 × 愿付比例"
+        任意参数 (population_based 的筛选占比亦可) 传入列表/数组即成为一个维度，
+        整个结果立方体一次向量化计算；校验同样向量化，报告第一个不合法的值。
+        逐格的计算步骤与假设列表不预先生成，只在 cell / sel 访问时构建。
         
-        return FermiResult(
-            value=total_value,
+        Args:
+            method: population_based / institution_based / substitution_based /
+                value_chain_based / value_based
+            unit / assumptions_sources: 同对应的标量方法
+            outer: True (默认) 各数组参数取笛卡尔积，维度顺序同参数顺序；
+                False 时各数组按 numpy 规则广播后逐元素计算 (如传入 Monte Carlo 样本)，维度为 ["cell"]
+            **params: 对应标量方法的参数，标量或一维数组
+            
+        Example:
+            >>> cube = calc.grid("institution_based", institution_count=5000,
+            ...                  adoption_rate=np.linspace(0.5, 0.9, 20), units_per_institution=1,
+            ...                  price_per_unit=[1e6, 1.5e6, 2e6])
+            >>> cube.values.shape                       # (20, 3)
+            >>> cube.cell(0, 2)                          # 该格的完整 FermiResult
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("grid 需要 numpy。请安装: pip install numpy")
+        if method not in _GRID_METHODS:
+            raise ValueError(f"不支持的方法: {method}，可选: {', '.join(_GRID_METHODS)}")
+        
+        rules = dict(_GRID_METHODS[method])
+        signature = inspect.signature(getattr(self, method)).parameters
+        unknown = [name for name in params if name not in signature or name in ("unit", "assumptions_sources")]
+        if unknown:
+            raise TypeError(f"{method} 不接受参数: {', '.join(unknown)}")
+        inputs: Dict[str, Any] = {}
+        for name in rules:
+            if name in params:
+                inputs[name] = params[name]
+            elif signature[name].default is not inspect.Parameter.empty:
+                inputs[name] = signature[name].default
+            else:
+                raise TypeError(f"{method} 缺少参数: {name}")
+        
+        filter_names = []
+        if method == "population_based":
+            # 筛选条件紧跟基础人口，连乘顺序与标量方法一致
+            base = {"base_population": inputs.pop("base_population")}
+            for name, rate in params.get("filters") or []:
+                if name in inputs or name in base:
+                    raise ValueError(f"筛选条件名 '{name}' 与参数名冲突")
+                base[name] = rate
+                rules[name] = "rate"
+                filter_names.append(name)
+            inputs = {**base, **inputs}
+        
+        # 保留原始 dtype 供逐格 FermiResult 使用 (整数频率仍显示为整数)，计算统一用 float
+        arrays = {name: np.asarray(value) for name, value in inputs.items()}
+        for name, array in arrays.items():
+            if array.ndim > 1:
+                raise ValueError(f"参数 {name} 必须是标量或一维数组，当前形状: {array.shape}")
+        
+        if outer:
+            dims = [name for name, array in arrays.items() if array.ndim == 1]
+            coords = {name: arrays[name].astype(float) for name in dims}
+            shape = tuple(len(coords[d]) for d in dims)
+            for axis, name in enumerate(dims):
+                arrays[name] = arrays[name].reshape([-1 if k == axis else 1 for k in range(len(dims))])
+        else:
+            shape = np.broadcast_shapes(*(array.shape for array in arrays.values()))
+            if len(shape) != 1:
+                raise ValueError("outer=False 需要至少一个一维数组参数")
+            dims, coords = ["cell"], {"cell": np.arange(shape[0])}
+        
+        # 向量化校验 (与标量方法的规则一致)
+        for name, array in arrays.items():
+            array = array.astype(float)
+            rule = rules[name]
+            if rule == "positive":
+                bad = array[~(array > 0)]
+                if bad.size:
+                    raise ValueError(f"{name} 必须为正数，当前值: {_scalar(bad.flat[0])}")
+            elif rule == "rate":
+                bad = array[~((array > 0) & (array <= 1))]
+                if bad.size:
+                    label = f"筛选条件 '{name}' 的占比" if name in filter_names else f"{name} "
+                    raise ValueError(f"{label}必须在 (0, 1] 范围内，当前值: {_scalar(bad.flat[0])}")
+        
+        values = np.ones(shape)
+        for array in arrays.values():
+            values = values * array.astype(float)  # 各方法均为参数连乘
+        
+        return FermiGrid(
+            method=method,
             unit=unit,
-            steps=steps,
-            formula=formula,
-            method="价值基础法",
-            assumptions=assumptions
+            dims=dims,
+            coords=coords,
+            values=values,
+            _calculator=self,
+            _inputs={name: np.broadcast_to(array, shape) for name, array in arrays.items()},
+            _filter_names=filter_names,
+            _options={"unit": unit, "assumptions_sources": assumptions_sources},
         )
     
     def custom(
         self,
-        formula_fn: Callable[..., float],
+        formula_fn: Union[Callable[..., float], str, Expression],
         inputs: dict,
         method_name: str = "自定义方法",
         unit: str = "元",
@@ -379,13 +647,17 @@ class FermiCalculator:
         自定义 Fermi 估算
         
         Args:
-            formula_fn: 计算函数，接收 inputs 作为关键字参数
+            formula_fn: 计算函数，接收 inputs 作为关键字参数；
+                也可以是表达式字符串 / Expression (如 "users * rate * price")
             inputs: 输入参数字典 {参数名: 值}
             method_name: 方法名称
         """
         assumptions_sources = assumptions_sources or {}
         
+        formula_fn = compile_formula(formula_fn)
         result = formula_fn(**inputs)
+        if isinstance(formula_fn, Expression):
+            result = float(result)
         
         steps = []
         assumptions = []
@@ -398,20 +670,12 @@ class FermiCalculator:
             value=result,
             unit=unit,
             steps=steps,
-            formula=method_name,
+            formula=formula_fn.source if isinstance(formula_fn, Expression) else method_name,
             method=method_name,
             assumptions=assumptions
         )
     
-    @staticmethod
-    def _format_number(n: float) -> str:
-        """格式化数字"""
-        if n >= 1e8:
-            return f"{n/1e8:.2f}亿"
-        elif n >= 1e4:
-            return f"{n/1e4:.2f}万"
-        else:
-            return f"{n:.0f}"
+    _format_number = staticmethod(format_number)
 
 
 # 便捷函数
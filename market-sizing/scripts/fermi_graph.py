@@ -0,0 +1,433 @@
+"""
+Fermi Graph
+===========
+
+惰性求值的 Fermi 依赖图：每个输入与中间步骤都是一个节点，节点值与步骤文字都按需计算并缓存。
+修改某个输入只会使其下游节点失效，其余节点 (包括已格式化的步骤文字) 原样复用，
+适合在多段大模型上反复做 what-if 调整。
+
+- 节点: input (输入/假设) 与 node (由依赖节点计算)，可附带步骤渲染函数
+- 构建器: population_based / institution_based / substitution_based / value_chain_based /
+  value_based 是五种方法的唯一定义，FermiCalculator 的同名方法即构建一张图再渲染结果；
+  prefix 参数让多个段共存于同一张图，再用 sum 汇总
+- result(output): 渲染该输出节点的 FermiResult，只包含其上游的步骤与假设
+
+使用方法:
+    from fermi_graph import FermiGraph
+
+    g = FermiGraph()
+    ka = g.institution_based(5000, 0.85, 1, 1_500_000, prefix="ka")
+    mid = g.institution_based(300_000, 0.40, 1, 50_000, prefix="mid")
+    tam = g.sum("tam", [ka, mid], label="TAM")
+
+    g[tam]                          # 惰性求值
+    g.set("ka.adoption_rate", 0.9)  # 只有 ka.* 与 tam 失效
+    g.result(tam).steps             # 未失效的步骤文字直接复用
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .fermi_calculator import FermiResult
+    from .units import format_number as _format_number
+except ImportError:
+    from fermi_calculator import FermiResult
+    from units import format_number as _format_number
+
+# 步骤渲染函数: (节点值, *依赖值) → (描述, 依据)，返回 None 时该步骤不显示
+StepRenderer = Callable[..., Optional[Tuple[str, str]]]
+
+
+@dataclass
+class _Node:
+    """图节点 (输入节点的 compute 为 None)"""
+    name: str
+    compute: Optional[Callable[..., Any]] = None
+    deps: Tuple[str, ...] = ()
+    step: Optional[StepRenderer] = None
+    assumption: Optional[Tuple[str, str]] = None   # 输入节点作为假设时的 (假设名, 来源)
+    rule: Optional[str] = None                      # 输入校验规则: "positive" / "rate" / None
+    shown: Optional[Callable[[Any], bool]] = None   # 按当前值决定假设是否显示 (默认总是显示)
+    label: str = ""
+    value: Any = None
+    valid: bool = False
+    rendered: Optional[Tuple[Any, ...]] = None     # 缓存的步骤: ((描述, 值, 依据),) 或 () 表示不显示
+
+
+@dataclass
+class _Output:
+    """输出节点的元数据 (用于渲染 FermiResult)"""
+    method: str
+    unit: str
+    formula: Union[str, Callable[[], str]]
+
+
+class FermiGraph:
+    """
+    惰性、带缓存的 Fermi 依赖图
+
+    Attributes:
+        evaluations: 累计的节点求值次数 (用于确认修改只触发了下游重算)
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, _Node] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self._outputs: Dict[str, _Output] = {}
+        self.evaluations = 0
+
+    # ==================== 图构建 ====================
+
+    def input(self, name: str, value: Any, label: str = "", assumption: Optional[Tuple[str, str]] = None,
+              rule: Optional[str] = None, step: Optional[StepRenderer] = None,
+              shown: Optional[Callable[[Any], bool]] = None) -> str:
+        """
+        添加输入节点
+
+        Args:
+            name: 节点名
+            value: 初始值
+            label: 校验报错信息的前缀 (默认为 "name ")
+            assumption: (假设名, 来源)，给出时出现在 FermiResult.assumptions 中
+            rule: 校验规则 "positive" (必须为正数) / "rate" (必须在 (0, 1] 内)
+            step: 步骤渲染函数 (值) → (描述, 依据)
+            shown: 按当前值决定假设是否显示 (如价格系数为 1.0 时省略)
+        """
+        node = _Node(name, deps=(), step=step, assumption=assumption, rule=rule,
+                     label=label or f"{name} ", shown=shown)
+        _check(node.label, value, rule)
+        self._add(node)
+        node.value, node.valid = value, True
+        return name
+
+    def node(self, name: str, compute: Callable[..., Any], deps: Sequence[str],
+             step: Optional[StepRenderer] = None) -> str:
+        """
+        添加计算节点
+
+        Args:
+            name: 节点名
+            compute: 计算函数，按 deps 顺序接收依赖节点的值
+            deps: 依赖节点名
+            step: 步骤渲染函数 (值, *依赖值) → (描述, 依据)
+        """
+        missing = [d for d in deps if d not in self._nodes]
+        if missing:
+            raise KeyError(f"节点 '{name}' 依赖未定义的节点: {', '.join(missing)}")
+        self._add(_Node(name, compute=compute, deps=tuple(deps), step=step))
+        for dep in deps:
+            self._dependents[dep].append(name)
+        return name
+
+    def sum(self, name: str, deps: Sequence[str], label: str = "合计", unit: str = "元") -> str:
+        """添加求和节点 (如多段 TAM = KA + Mid + SMB)，可直接作为 result() 的输出"""
+        labels = " + ".join(deps)
+        self.node(name, lambda *values: sum(values), deps, step=lambda value, *_: (f"{label} = {labels}", "汇总"))
+        self._outputs[name] = _Output("汇总", unit, f"{label} = {labels}")
+        return name
+
+    def _add(self, node: _Node) -> None:
+        if node.name in self._nodes:
+            raise ValueError(f"节点已存在: {node.name}")
+        self._nodes[node.name] = node
+        self._dependents[node.name] = []
+
+    # ==================== 求值与修改 ====================
+
+    def set(self, name: str, value: Any) -> None:
+        """修改输入值，使其下游节点失效"""
+        node = self._nodes[name]
+        if node.compute is not None:
+            raise ValueError(f"'{name}' 是计算节点，只能修改输入节点")
+        _check(node.label, value, node.rule)
+        node.value, node.valid, node.rendered = value, True, None
+        self._invalidate_downstream(name)
+
+    def update(self, **values: Any) -> None:
+        """批量修改输入 (节点名含 '.' 时请使用 set 或 update(**{"ka.adoption_rate": 0.9}))"""
+        for name, value in values.items():
+            self.set(name, value)
+
+    def _invalidate_downstream(self, name: str) -> None:
+        queue = deque(self._dependents[name])
+        while queue:
+            node = self._nodes[queue.popleft()]
+            if node.valid or node.rendered is not None:
+                node.valid, node.rendered = False, None
+                queue.extend(self._dependents[node.name])
+
+    def get(self, name: str) -> Any:
+        """节点值 (失效时按需重算上游)"""
+        node = self._nodes[name]
+        if not node.valid:
+            # 显式栈做后序遍历，避免长链递归过深
+            stack = [(node, False)]
+            while stack:
+                current, expanded = stack.pop()
+                if current.valid:
+                    continue
+                if expanded:
+                    current.value = current.compute(*(self._nodes[d].value for d in current.deps))
+                    current.valid = True
+                    self.evaluations += 1
+                else:
+                    stack.append((current, True))
+                    stack.extend((self._nodes[d], False) for d in current.deps if not self._nodes[d].valid)
+        return node.value
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self.set(name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._nodes
+
+    # ==================== 渲染 ====================
+
+    def _ancestors(self, name: str) -> set:
+        seen, stack = set(), [name]
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self._nodes[current].deps)
+        return seen
+
+    def steps(self, output: str) -> List[Tuple[str, Any, str]]:
+        """output 上游的计算步骤 (按节点添加顺序)，未失效节点的步骤文字直接复用"""
+        upstream = self._ancestors(output)
+        steps = []
+        for name, node in self._nodes.items():
+            if name not in upstream or node.step is None:
+                continue
+            if node.rendered is None:
+                value = self.get(name)
+                rendered = node.step(value, *(self.get(d) for d in node.deps))
+                node.rendered = () if rendered is None else ((rendered[0], value, rendered[1]),)
+            steps.extend(node.rendered)
+        return steps
+
+    def assumptions(self, output: str) -> List[Tuple[str, Any, str]]:
+        """output 上游的假设 [(假设名, 当前值, 来源)]"""
+        upstream = self._ancestors(output)
+        return [(node.assumption[0], node.value, node.assumption[1])
+                for name, node in self._nodes.items()
+                if name in upstream and node.assumption and (node.shown is None or node.shown(node.value))]
+
+    def result(self, output: str) -> FermiResult:
+        """渲染输出节点的 FermiResult"""
+        meta = self._outputs.get(output)
+        if meta is None:
+            raise KeyError(f"'{output}' 不是输出节点，可选: {', '.join(self._outputs)}")
+        return FermiResult(
+            value=self.get(output),
+            unit=meta.unit,
+            steps=self.steps(output),
+            formula=meta.formula() if callable(meta.formula) else meta.formula,
+            method=meta.method,
+            assumptions=self.assumptions(output),
+        )
+
+    # ==================== 构建器 (FermiCalculator 同名方法的定义) ====================
+
+    def population_based(
+        self,
+        base_population: float,
+        filters: List[Tuple[str, float]],
+        penetration_rate: float,
+        average_spend: float,
+        frequency: int = 1,
+        unit: str = "元",
+        assumptions_sources: Optional[dict] = None,
+        prefix: str = ""
+    ) -> str:
+        """
+        人口基数法 (FermiCalculator.population_based 的定义)
+
+        输入节点: {prefix}.base_population / {prefix}.filter.{条件名} / {prefix}.penetration_rate /
+        {prefix}.average_spend / {prefix}.frequency；返回输出节点名 {prefix}.value
+        """
+        src = assumptions_sources or {}
+        p = _prefix(prefix)
+        current = self.input(f"{p}base_population", base_population, "base_population ",
+                             ("基础人口", src.get("基础人口", "统计局/估算")), "positive",
+                             step=lambda v: ("基础人口", "基数"))
+        filter_nodes = []
+        for name, rate in filters:
+            rate_node = self.input(f"{p}filter.{name}", rate, f"筛选条件 '{name}' 的占比",
+                                   (name, src.get(name, "估算")), "rate")
+            current = self.node(
+                f"{p}filtered.{name}", lambda c, r: c * r, [current, rate_node],
+                step=lambda v, c, r, name=name: (f"筛选: {name} ({r*100:.1f}%)", f"剩余 {_format_number(v)} 人"),
+            )
+            filter_nodes.append((name, rate_node))
+        pen = self.input(f"{p}penetration_rate", penetration_rate, "penetration_rate ",
+                         ("渗透率", src.get("渗透率", "估算")), "rate")
+        users = self.node(
+            f"{p}target_users", lambda c, r: c * r, [current, pen],
+            step=lambda v, c, r: (f"渗透率 ({r*100:.1f}%)", f"目标用户 {_format_number(v)} 人"),
+        )
+        spend = self.input(f"{p}average_spend", average_spend, "average_spend ",
+                           ("客单价", src.get("客单价", "市场调研")), "positive")
+        freq = self.input(f"{p}frequency", frequency, "frequency ",
+                          ("年消费频率", src.get("频率", "估算")), "positive")
+        value = self.node(
+            f"{p}value", lambda u, s, f: u * s * f, [users, spend, freq],
+            step=lambda v, u, s, f: (f"年消费 (客单价 {s}{unit} × 频率 {f})", "年市场规模"),
+        )
+
+        def formula() -> str:
+            filter_str = " × ".join(f"{name}({self.get(node)})" for name, node in filter_nodes)
+            return f"基数 × {filter_str} × 渗透率 × 客单价 × 频率"
+
+        self._outputs[value] = _Output("人口基数法", unit, formula)
+        return value
+
+    def institution_based(
+        self,
+        institution_count: float,
+        adoption_rate: float,
+        units_per_institution: float,
+        price_per_unit: float,
+        unit: str = "元",
+        assumptions_sources: Optional[dict] = None,
+        prefix: str = ""
+    ) -> str:
+        """机构基数法 (FermiCalculator.institution_based 的定义)，返回输出节点名 {prefix}.value"""
+        src = assumptions_sources or {}
+        p = _prefix(prefix)
+        count = self.input(f"{p}institution_count", institution_count, "institution_count ",
+                           ("机构数量", src.get("机构数量", "工商数据")), "positive",
+                           step=lambda v: ("目标机构数", "基数"))
+        adopt = self.input(f"{p}adoption_rate", adoption_rate, "adoption_rate ",
+                           ("采用率", src.get("采用率", "行业报告")), "rate")
+        adopters = self.node(
+            f"{p}adopters", lambda c, r: c * r, [count, adopt],
+            step=lambda v, c, r: (f"采用率 ({r*100:.1f}%)", f"{_format_number(v)} 机构"),
+        )
+        per = self.input(f"{p}units_per_institution", units_per_institution, "units_per_institution ",
+                         ("每机构用量", src.get("每机构用量", "估算")), "positive")
+        total_units = self.node(
+            f"{p}total_units", lambda a, u: a * u, [adopters, per],
+            step=lambda v, a, u: (f"每机构用量 ({u})", f"总用量 {_format_number(v)}"),
+        )
+        price = self.input(f"{p}price_per_unit", price_per_unit, "price_per_unit ",
+                           ("单价", src.get("单价", "市场调研")), "positive")
+        value = self.node(
+            f"{p}value", lambda t, pr: t * pr, [total_units, price],
+            step=lambda v, t, pr: (f"单价 ({pr} {unit})", "市场规模"),
+        )
+        self._outputs[value] = _Output("机构基数法", unit, "机构数 × 采用率 × 每机构用量 × 单价")
+        return value
+
+    def substitution_based(
+        self,
+        existing_market_size: float,
+        substitution_rate: float,
+        price_premium: float = 1.0,
+        unit: str = "元",
+        assumptions_sources: Optional[dict] = None,
+        prefix: str = ""
+    ) -> str:
+        """
+        替代法 (FermiCalculator.substitution_based 的定义)，返回输出节点名 {prefix}.value
+
+        价格系数始终是一个输入节点 (为 1.0 时不显示步骤与假设)，之后修改为其他值无需重建图。
+        """
+        src = assumptions_sources or {}
+        p = _prefix(prefix)
+        market = self.input(f"{p}existing_market_size", existing_market_size, "existing_market_size ",
+                            ("现有市场", src.get("现有市场", "行业报告")),
+                            step=lambda v: ("现有市场规模", "基数"))
+        rate = self.input(f"{p}substitution_rate", substitution_rate, "substitution_rate ",
+                          ("替代率", src.get("替代率", "技术分析")))
+        substituted = self.node(
+            f"{p}substituted", lambda m, r: m * r, [market, rate],
+            step=lambda v, m, r: (f"替代率 ({r*100:.1f}%)", "可替代市场"),
+        )
+        premium = self.input(f"{p}price_premium", price_premium, "price_premium ",
+                             ("价格系数", src.get("价格系数", "定价策略")), shown=lambda k: k != 1.0)
+        # 价格系数为 1.0 时不显示该步骤与假设
+        value = self.node(
+            f"{p}value", lambda s, k: s * k, [substituted, premium],
+            step=lambda v, s, k: (f"价格系数 ({k}x)", "市场规模") if k != 1.0 else None,
+        )
+
+        def formula() -> str:
+            k = self.get(premium)
+            return "现有市场 × 替代率" + (f" × 价格系数({k})" if k != 1.0 else "")
+
+        self._outputs[value] = _Output("替代法", unit, formula)
+        return value
+
+    def value_chain_based(
+        self,
+        end_market_size: float,
+        value_share: float,
+        unit: str = "元",
+        assumptions_sources: Optional[dict] = None,
+        prefix: str = ""
+    ) -> str:
+        """价值链法 (FermiCalculator.value_chain_based 的定义)，返回输出节点名 {prefix}.value"""
+        src = assumptions_sources or {}
+        p = _prefix(prefix)
+        market = self.input(f"{p}end_market_size", end_market_size, "end_market_size ",
+                            ("终端市场", src.get("终端市场", "行业报告")),
+                            step=lambda v: ("终端市场规模", "下游市场"))
+        share = self.input(f"{p}value_share", value_share, "value_share ",
+                           ("价值链占比", src.get("价值链占比", "产业分析")))
+        value = self.node(
+            f"{p}value", lambda m, s: m * s, [market, share],
+            step=lambda v, m, s: (f"价值链占比 ({s*100:.1f}%)", "本环节市场"),
+        )
+        self._outputs[value] = _Output("价值链法", unit, "终端市场 × 价值链占比")
+        return value
+
+    def value_based(
+        self,
+        target_count: float,
+        problem_frequency: float,
+        problem_cost: float,
+        willingness_to_pay_ratio: float,
+        unit: str = "元",
+        assumptions_sources: Optional[dict] = None,
+        prefix: str = ""
+    ) -> str:
+        """价值基础法 (FermiCalculator.value_based 的定义)，返回输出节点名 {prefix}.value"""
+        src = assumptions_sources or {}
+        p = _prefix(prefix)
+        target = self.input(f"{p}target_count", target_count, "target_count ",
+                            ("目标客户", src.get("目标客户", "市场调研")),
+                            step=lambda v: ("目标客户数", "基数"))
+        freq = self.input(f"{p}problem_frequency", problem_frequency, "problem_frequency ",
+                          ("问题频率", src.get("问题频率", "客户调研")))
+        cost = self.input(f"{p}problem_cost", problem_cost, "problem_cost ",
+                          ("问题成本", src.get("问题成本", "财务数据")))
+        problem = self.node(
+            f"{p}problem_value", lambda t, f, c: t * f * c, [target, freq, cost],
+            step=lambda v, t, f, c: (f"问题总成本 (频率 {f} × 成本 {c})", "可解决的价值"),
+        )
+        wtp = self.input(f"{p}willingness_to_pay_ratio", willingness_to_pay_ratio, "willingness_to_pay_ratio ",
+                         ("愿付比例", src.get("愿付比例", "定价调研")))
+        value = self.node(
+            f"{p}value", lambda pv, w: pv * w, [problem, wtp],
+            step=lambda v, pv, w: (f"愿付比例 ({w*100:.1f}%)", "市场规模"),
+        )
+        self._outputs[value] = _Output("价值基础法", unit, "目标客户 × 问题频率 × 问题成本 × 愿付比例")
+        return value
+
+
+def _prefix(prefix: str) -> str:
+    return f"{prefix}." if prefix else ""
+
+
+def _check(label: str, value: Any, rule: Optional[str]) -> None:
+    """输入校验 (规则同 fermi_calculator._GRID_METHODS，grid 以向量化方式执行同样的校验)"""
+    if rule == "positive" and not value > 0:
+        raise ValueError(f"{label}必须为正数，当前值: {value}")
+    if rule == "rate" and not 0 < value <= 1:
+        raise ValueError(f"{label}必须在 (0, 1] 范围内，当前值: {value}")
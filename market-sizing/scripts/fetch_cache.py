@@ -0,0 +1,383 @@
+"""
+Fetch Cache
+===========
+
+DataFetcher 接口调用的持久化磁盘缓存：批量生成报告时同一 GDP/CPI 序列只下载一次。
+
+缓存键 = SHA-256(方法名, 绑定默认值后的参数)，因此 get_china_gdp() 与显式传入
+默认参数的调用命中同一条目。
+
+- DataFrame / Series 存为 Parquet (需要 pyarrow 或 fastparquet)，不可用或列类型
+  不受支持时退回 pickle；dict 存为 JSON
+- 按数据源设置有效期 (TTL)：年度的世界银行数据可以缓存一个月，股价只缓存几小时
+- 离线模式只读缓存 (忽略有效期)，未命中抛出 CacheMissError
+- 在线时若条目过期且重新获取失败，默认退回过期数据并给出警告
+
+使用方法:
+    from data_fetcher import DataFetcher
+    from fetch_cache import CachedFetcher
+
+    fetcher = CachedFetcher(DataFetcher(), cache_dir=".fetch_cache")
+    gdp = fetcher.get_china_gdp()          # 首次联网
+    gdp = fetcher.get_china_gdp()          # 命中缓存
+
+    offline = CachedFetcher(DataFetcher(), cache_dir=".fetch_cache", offline=True)
+
+CachedFetcher 只要求后端对象有同名方法，测试时可以传入本地伪造的后端:
+
+    class FakeBackend:
+        SOURCES = {"get_china_gdp": "akshare"}
+        def get_china_gdp(self):
+            return pd.DataFrame({"季度": ["2024年第1季度"], "国内生产总值-绝对值": [296299.0]})
+
+    fetcher = CachedFetcher(FakeBackend(), cache_dir=tmp_path)
+"""
+
+import os
+import json
+import time
+import uuid
+import pickle
+import hashlib
+import inspect
+import warnings
+import threading
+import functools
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Sequence, Union
+
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("fetch_cache 需要 pandas。请安装: pip install pandas")
+
+# 可选依赖: Parquet 引擎
+PARQUET_AVAILABLE = False
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    try:
+        import fastparquet  # noqa: F401
+        PARQUET_AVAILABLE = True
+    except ImportError:
+        pass
+
+try:
+    from .concurrent_fetch import FetchResult, RequestSpec, fetch_many
+except ImportError:
+    from concurrent_fetch import FetchResult, RequestSpec, fetch_many
+
+
+# 缓存格式版本，格式变化时递增使旧条目失效
+CACHE_VERSION = 1
+
+_HOUR = 3600
+_DAY = 24 * _HOUR
+
+# 各数据源的默认有效期 (秒)，None 表示永不过期
+DEFAULT_TTL: Dict[str, Optional[float]] = {
+    "fred": _DAY,
+    "worldbank": 30 * _DAY,
+    "akshare": _DAY,
+    "baostock": 12 * _HOUR,
+    "yfinance": 6 * _HOUR,
+    "pytrends": _DAY,
+}
+
+# 未在 DEFAULT_TTL 中列出的数据源
+FALLBACK_TTL = _DAY
+
+# Series 转为单列 DataFrame 存储时使用的列名
+_SERIES_COLUMN = "__value__"
+
+
+class CacheMissError(LookupError):
+    """离线模式下缓存未命中"""
+
+
+class FetchCache:
+    """
+    接口调用结果的磁盘缓存
+
+    每个条目包含:
+    - <key>.parquet / <key>.pkl / <key>.dict.json: 数据本身
+    - <key>.meta.json: 方法名、参数、数据源、获取时间与存储格式 (最后写入，存在即完整)
+
+    Args:
+        directory: 缓存目录
+        ttl: 有效期 (秒)。数字对所有数据源生效；dict 按数据源覆盖 DEFAULT_TTL
+        offline: 离线模式，只从缓存读取
+        stale_if_error: 在线获取失败时是否退回过期条目
+
+    Example:
+        >>> cache = FetchCache(".fetch_cache", ttl={"akshare": 3600})
+        >>> gdp = cache.call("akshare", "get_china_gdp", ak.macro_china_gdp)
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = ".fetch_cache",
+        ttl: Union[None, float, Dict[str, Optional[float]]] = None,
+        offline: bool = False,
+        stale_if_error: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = dict(DEFAULT_TTL)
+        self.default_ttl: Optional[float] = FALLBACK_TTL
+        if isinstance(ttl, dict):
+            self.ttl.update(ttl)
+        elif ttl is not None:
+            self.ttl = {source: ttl for source in self.ttl}
+            self.default_ttl = ttl
+        self.offline = offline
+        self.stale_if_error = stale_if_error
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # fetch_many 多线程共享计数
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def make_key(method: str, arguments: Dict[str, Any]) -> str:
+        """由方法名和 (已绑定默认值的) 参数计算缓存键"""
+        payload = {"version": CACHE_VERSION, "method": method, "arguments": arguments}
+        text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=repr)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def ttl_for(self, source: str) -> Optional[float]:
+        """数据源的有效期 (秒)"""
+        return self.ttl.get(source, self.default_ttl)
+
+    def call(
+        self,
+        source: str,
+        method: str,
+        fetch: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        带缓存地调用 fetch(*args, **kwargs)
+
+        Args:
+            source: 数据源名称 (决定有效期)
+            method: 方法名 (参与缓存键)
+            fetch: 实际获取数据的函数
+
+        Raises:
+            CacheMissError: 离线模式下未命中
+        """
+        arguments = _bind_arguments(fetch, args, kwargs)
+        key = self.make_key(method, arguments)
+        meta = self._read_meta(key)
+
+        if meta is not None and (self.offline or not self._expired(meta, source)):
+            value = self._load(key, meta)
+            if value is not None:
+                self._count(hit=True)
+                return value
+
+        self._count(hit=False)
+        if self.offline:
+            raise CacheMissError(f"离线模式下缓存未命中: {method}({_format_arguments(arguments)})")
+
+        try:
+            value = fetch(*args, **kwargs)
+        except Exception as e:
+            stale = self._load(key, meta) if meta is not None and self.stale_if_error else None
+            if stale is None:
+                raise
+            age = (time.time() - meta["fetched_at"]) / _HOUR
+            warnings.warn(f"{method} 获取失败 ({e})，使用 {age:.1f} 小时前的缓存数据")
+            return stale
+
+        self.put(key, value, source=source, method=method, arguments=arguments)
+        return value
+
+    def _expired(self, meta: dict, source: str) -> bool:
+        ttl = self.ttl_for(source)
+        return ttl is not None and time.time() - meta["fetched_at"] > ttl
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / f"{key}{suffix}"
+
+    def _read_meta(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key, ".meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _load(self, key: str, meta: dict) -> Any:
+        """读取数据文件；文件缺失或损坏返回 None"""
+        fmt, kind = meta["format"], meta["kind"]
+        try:
+            if fmt == "parquet":
+                value = pd.read_parquet(self._path(key, ".parquet"))
+            elif fmt == "json":
+                with open(self._path(key, ".dict.json"), encoding="utf-8") as f:
+                    return json.load(f)
+            else:
+                with open(self._path(key, ".pkl"), "rb") as f:
+                    return pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, ImportError):
+            return None
+        if kind == "series":
+            value = value[_SERIES_COLUMN].rename(meta.get("name"))
+        return value
+
+    def put(self, key: str, value: Any, source: str, method: str, arguments: Dict[str, Any]) -> None:
+        """写入缓存条目 (先写数据文件，再原子替换元数据)"""
+        meta = {
+            "version": CACHE_VERSION,
+            "method": method,
+            "source": source,
+            "arguments": json.loads(json.dumps(arguments, ensure_ascii=False, default=repr)),
+            "fetched_at": time.time(),
+        }
+        meta.update(self._write_data(key, value))
+        tmp = self._path(key, f".meta.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._path(key, ".meta.json"))
+
+    def _write_data(self, key: str, value: Any) -> dict:
+        """写入数据文件，返回 {"format", "kind", "name"}"""
+        kind = "other"
+        frame = None
+        if isinstance(value, pd.DataFrame):
+            kind, frame = "frame", value
+        elif isinstance(value, pd.Series):
+            kind, frame = "series", value.to_frame(_SERIES_COLUMN)
+
+        if frame is not None and PARQUET_AVAILABLE:
+            tmp = self._path(key, f".parquet.{uuid.uuid4().hex}.tmp")
+            try:
+                frame.to_parquet(tmp)
+            except Exception:
+                # 混合类型的 object 列、非字符串列名等 Parquet 不支持，退回 pickle
+                tmp.unlink(missing_ok=True)
+            else:
+                os.replace(tmp, self._path(key, ".parquet"))
+                name = value.name if kind == "series" else None
+                return {"format": "parquet", "kind": kind, "name": name if isinstance(name, str) else None}
+
+        if isinstance(value, dict):
+            try:
+                text = json.dumps(value, ensure_ascii=False, indent=2, allow_nan=True)
+            except TypeError:
+                pass
+            else:
+                tmp = self._path(key, f".dict.json.{uuid.uuid4().hex}.tmp")
+                tmp.write_text(text, encoding="utf-8")
+                os.replace(tmp, self._path(key, ".dict.json"))
+                return {"format": "json", "kind": "dict", "name": None}
+
+        tmp = self._path(key, f".pkl.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key, ".pkl"))
+        return {"format": "pickle", "kind": kind if kind != "series" else "other", "name": None}
+
+    def entries(self) -> Dict[str, dict]:
+        """{key: 元数据}"""
+        entries = {}
+        for path in self.directory.glob("*.meta.json"):
+            key = path.name.split(".", 1)[0]
+            meta = self._read_meta(key)
+            if meta is not None:
+                entries[key] = meta
+        return entries
+
+    def _remove(self, key: str) -> None:
+        for path in self.directory.glob(f"{key}.*"):
+            path.unlink(missing_ok=True)
+
+    def clear(self, source: Optional[str] = None) -> int:
+        """清空缓存 (可只清某个数据源)，返回删除的条目数"""
+        removed = 0
+        for key, meta in self.entries().items():
+            if source is None or meta["source"] == source:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+
+class CachedFetcher:
+    """
+    为数据获取器加上透明的磁盘缓存
+
+    后端的 SOURCES ({方法名: 数据源}) 中列出的方法经过缓存，其余属性原样转发。
+
+    Args:
+        backend: 后端数据获取器 (DataFetcher 或任何有同名方法的对象)
+        cache: FetchCache 实例；为 None 时按 cache_dir / ttl / offline 创建
+        sources: {方法名: 数据源}，默认取 backend.SOURCES
+
+    Example:
+        >>> fetcher = CachedFetcher(DataFetcher(), cache_dir=".fetch_cache")
+        >>> fetcher.get_fred_series("GDP")
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        cache: Optional[FetchCache] = None,
+        sources: Optional[Dict[str, str]] = None,
+        cache_dir: Union[str, Path] = ".fetch_cache",
+        ttl: Union[None, float, Dict[str, Optional[float]]] = None,
+        offline: bool = False,
+    ):
+        self.backend = backend
+        self.cache = cache if cache is not None else FetchCache(cache_dir, ttl=ttl, offline=offline)
+        self.sources = dict(sources if sources is not None else getattr(backend, "SOURCES", {}))
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.backend, name)
+        source = self.sources.get(name)
+        if source is None or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def cached(*args, **kwargs):
+            return self.cache.call(source, name, attr, *args, **kwargs)
+
+        return cached
+
+    def fetch_many(
+        self,
+        requests: Union[Mapping[Hashable, RequestSpec], Sequence[RequestSpec]],
+        concurrency: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[Hashable, FetchResult]:
+        """经过缓存的并发批量获取，参数见 concurrent_fetch.fetch_many"""
+        return fetch_many(self, requests, concurrency=concurrency, timeout=timeout)
+
+    def __repr__(self) -> str:
+        mode = "offline" if self.cache.offline else "online"
+        return f"CachedFetcher({self.backend!r}, cache={str(self.cache.directory)!r}, {mode})"
+
+
+def _bind_arguments(fetch: Callable[..., Any], args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """把位置参数与关键字参数统一为 {参数名: 值}，并补上默认值"""
+    try:
+        bound = inspect.signature(fetch).bind(*args, **kwargs)
+    except (TypeError, ValueError):
+        return {"args": list(args), "kwargs": kwargs}
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _format_arguments(arguments: Dict[str, Any]) -> str:
+    return ", ".join(f"{name}={value!r}" for name, value in arguments.items())
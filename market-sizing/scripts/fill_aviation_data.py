@@ -13,8 +13,32 @@ except ImportError:
     print("错误: 请先安装 openpyxl: pip install openpyxl")
     sys.exit(1)
 
-def fill_aviation_market_data(template_path, output_path):
+# IndexBox 2024 以美元口径给出 ($354M)，按 2024 年人民币兑美元年均汇率换算为亿元
+PISTON_MARKET_2024_MUSD = 354
+USD_CNY_2024 = 7.2  # 未提供汇率缓存时使用的 2024 年均汇率
+
+
+def piston_market_2024(fx_csv=None):
+    """
+    2024 年中国活塞发动机总规模 (亿元)
+
+    Args:
+        fx_csv: 汇率缓存 CSV (FXTable.to_csv / FXTable.from_fetcher(cache_dir=...) 生成)；
+            给出时取其中 2024 年均汇率 (需要 numpy/pandas)，否则使用 USD_CNY_2024
+    """
+    if fx_csv is None:
+        return round(PISTON_MARKET_2024_MUSD * USD_CNY_2024 / 100, 1)  # 百万美元 → 亿元
+    try:
+        from .fx import FXTable
+    except ImportError:
+        from fx import FXTable
+    fx_2024 = FXTable.from_csv(fx_csv).average(2024)
+    return round(fx_2024.convert(PISTON_MARKET_2024_MUSD, "M USD", "亿元"), 1)
+
+
+def fill_aviation_market_data(template_path, output_path, fx_csv=None):
     wb = load_workbook(template_path)
+    market_2024 = piston_market_2024(fx_csv)
     
     # ---------------------------------------------------------
     # Sheet 1: 核心假设 (Assumptions)
@@ -23,7 +47,7 @@ def fill_aviation_market_data(template_path, output_path):
     
     # Update assumptions based on research
     # Data points:
-    # 1. Total China Piston Engine Market: $354M (2024) -> ~25.5亿 RMB
+    # 1. Total China Piston Engine Market: $354M (2024) -> market_2024 亿元 (见 piston_market_2024)
     # 2. 200-500HP Segment share: Global is dominant, China estimate 40-50% (Lycoming O-540 is 230-300HP)
     # 3. Target Audience: Flight schools, private owners, sterile UAVs
     # 4. Growth: 1.8亿美元 revenue for piston aircraft by 2026? 
@@ -31,7 +55,7 @@ def fill_aviation_market_data(template_path, output_path):
     #    But low-altitude economy is booming (26% growth in Wuhu). Let's take a balanced CAGR of 8%.
     
     updates = [
-        (6, "中国活塞发动机总规模", 25.5, "亿元", "IndexBox 2024 ($354M)"),
+        (6, "中国活塞发动机总规模", market_2024, "亿元", "IndexBox 2024 ($354M)"),
         (7, "200-500HP 细分占比", 0.45, "%", "主力机型(SR20/R44)占比推算"),
         (8, "国产化/区域占比", 1.0, "%", "分析中国整体市场"),
         (9, "潜在替代渗透率", 0.20, "%", "重油/混合动力替代潜力"),
@@ -86,4 +110,5 @@ if __name__ == "__main__":
     output = Path(r"C:\Users\lenovo\.gemini\antigravity\skills\market-sizing\assets\China_Aviation_Piston_Engine_200-500HP.xlsx")
     output.parent.mkdir(exist_ok=True)
     
-    fill_aviation_market_data(template, output)
+    # 可选参数: 汇率缓存 CSV 路径 (取 2024 年均汇率)
+    fill_aviation_market_data(template, output, fx_csv=sys.argv[1] if len(sys.argv) > 1 else None)
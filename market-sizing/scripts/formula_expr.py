@@ -0,0 +1,413 @@
+"""
+Formula Expressions
+===================
+
+市场规模模型的公式表达式：一次编译，多处复用。
+- 解析: 基于 Python ast，只允许四则运算、乘方、比较和少量白名单函数
+- 编译: 生成 numpy 向量化内核，标量/数组输入都可直接调用
+- 导出: 转换为 Excel 公式 (引用假设单元格)，驱动活的电子表格
+- 指纹: 规范化 AST 的哈希，可用于缓存与序列化
+- 增量求值: CachedEvaluator 缓存子表达式，只有部分变量改变时只重算受影响的部分
+
+支持的函数:
+    min(a, b, ...)  max(a, b, ...)  abs(x)  sqrt(x)  log(x)  exp(x)
+    where(条件, 真值, 假值)   # Excel 中为 IF
+
+使用方法:
+    from formula_expr import Expression
+
+    expr = Expression("ka_vol*ka_price + mid_vol*mid_price")
+    expr.variables                      # ('ka_vol', 'ka_price', 'mid_vol', 'mid_price')
+    expr(ka_vol=4250, ka_price=1.5e6, mid_vol=1.2e5, mid_price=5e4)
+    expr.to_excel({"ka_vol": "B5", "ka_price": "B6", "mid_vol": "B7", "mid_price": "B8"})
+    # '=B5*B6+B7*B8'
+
+    # 直接作为 MonteCarloSimulator.run / FermiCalculator.custom 的公式
+    sim.run(assumptions, formula="ka_vol*ka_price + mid_vol*mid_price")
+"""
+
+import ast
+import math
+import hashlib
+from functools import reduce
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+
+# 白名单函数: 名称 -> 实现 (有 numpy 时为向量化版本，否则为标量版本)
+if NUMPY_AVAILABLE:
+    _VECTOR_FUNCTIONS = {
+        "min": lambda *args: reduce(np.minimum, args),
+        "max": lambda *args: reduce(np.maximum, args),
+        "abs": np.abs,
+        "sqrt": np.sqrt,
+        "log": np.log,
+        "exp": np.exp,
+        "where": np.where,
+    }
+else:
+    _VECTOR_FUNCTIONS = {
+        "min": min,
+        "max": max,
+        "abs": abs,
+        "sqrt": math.sqrt,
+        "log": math.log,
+        "exp": math.exp,
+        "where": lambda cond, a, b: a if cond else b,
+    }
+
+# 名称 -> (Excel 函数名, 参数个数，None 表示不限)
+_EXCEL_FUNCTIONS = {
+    "min": ("MIN", None),
+    "max": ("MAX", None),
+    "abs": ("ABS", 1),
+    "sqrt": ("SQRT", 1),
+    "log": ("LN", 1),
+    "exp": ("EXP", 1),
+    "where": ("IF", 3),
+}
+
+_BINARY_OPS = {
+    ast.Add: ("+", 1),
+    ast.Sub: ("-", 1),
+    ast.Mult: ("*", 2),
+    ast.Div: ("/", 2),
+    ast.Pow: ("^", 4),
+}
+
+_COMPARE_OPS = {
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+    ast.Eq: "=",
+    ast.NotEq: "<>",
+}
+
+
+class ExpressionError(ValueError):
+    """公式表达式不合法"""
+
+
+class Expression:
+    """
+    编译后的公式表达式
+
+    Attributes:
+        source: 原始表达式字符串
+        variables: 表达式引用的变量名 (按首次出现顺序)
+        fingerprint: 规范化 AST 的 SHA-256 (空白、冗余括号不影响)
+
+    Example:
+        >>> expr = Expression("users * conversion * price")
+        >>> expr(users=1000, conversion=0.5, price=20)
+        10000.0
+    """
+
+    def __init__(self, source: str):
+        if isinstance(source, Expression):
+            source = source.source
+        self.source = source.strip()
+        try:
+            tree = ast.parse(self.source, mode="eval")
+        except SyntaxError as e:
+            raise ExpressionError(f"公式语法错误: {self.source!r} ({e.msg})")
+
+        self._tree = tree.body
+        names = []
+        self._check(self._tree, names)
+        self.variables: Tuple[str, ...] = tuple(dict.fromkeys(names))
+        self.fingerprint = hashlib.sha256(ast.dump(self._tree).encode("utf-8")).hexdigest()
+        self._kernel = self._compile()
+
+    def _check(self, node: ast.AST, names: list) -> None:
+        """校验 AST 只包含白名单节点，并收集变量名"""
+        if isinstance(node, ast.Name):
+            if node.id in _VECTOR_FUNCTIONS:
+                raise ExpressionError(f"'{node.id}' 是函数名，不能用作变量")
+            names.append(node.id)
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ExpressionError(f"只支持数值常量，当前为: {node.value!r}")
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINARY_OPS:
+                raise ExpressionError(f"不支持的运算符: {type(node.op).__name__}")
+            self._check(node.left, names)
+            self._check(node.right, names)
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, (ast.USub, ast.UAdd)):
+                raise ExpressionError(f"不支持的一元运算符: {type(node.op).__name__}")
+            self._check(node.operand, names)
+        elif isinstance(node, ast.Compare):
+            if len(node.ops) != 1 or type(node.ops[0]) not in _COMPARE_OPS:
+                raise ExpressionError("比较只支持单个 <, <=, >, >=, ==, != 运算")
+            self._check(node.left, names)
+            self._check(node.comparators[0], names)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _VECTOR_FUNCTIONS:
+                raise ExpressionError(f"不支持的函数: {ast.unparse(node.func)}，可用函数: {', '.join(_VECTOR_FUNCTIONS)}")
+            if node.keywords:
+                raise ExpressionError(f"函数 {node.func.id} 不支持关键字参数")
+            arity = _EXCEL_FUNCTIONS[node.func.id][1]
+            if (arity is not None and len(node.args) != arity) or not node.args:
+                raise ExpressionError(f"函数 {node.func.id} 的参数个数不正确")
+            for arg in node.args:
+                self._check(arg, names)
+        else:
+            raise ExpressionError(f"不支持的语法: {ast.unparse(node)}")
+
+    def _compile(self) -> Callable[..., object]:
+        """编译为内核函数: 变量作为关键字参数，忽略多余参数"""
+        tree = ast.parse(self.source, mode="eval")
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                node.func.id = f"_fn_{node.func.id}"
+        params = ", ".join(self.variables + ("**_unused",))
+        code = compile(f"lambda {params}: {ast.unparse(tree.body)}", f"<expr {self.source}>", "eval")
+        namespace = {f"_fn_{name}": fn for name, fn in _VECTOR_FUNCTIONS.items()}
+        namespace["__builtins__"] = {}
+        return eval(code, namespace)
+
+    def __call__(self, **values):
+        """
+        求值。values 可以是标量或等长的 numpy 数组 (向量化)，多余的变量会被忽略
+        """
+        missing = [v for v in self.variables if v not in values]
+        if missing:
+            raise ExpressionError(f"缺少变量: {', '.join(missing)} (公式: {self.source})")
+        return self._kernel(**values)
+
+    def to_excel(self, cell_map: Dict[str, str]) -> str:
+        """
+        转换为 Excel 公式
+
+        Args:
+            cell_map: {变量名: 单元格引用}，如 {"ka_vol": "'核心假设'!B5"}
+
+        Returns:
+            以 "=" 开头的 Excel 公式字符串
+        """
+        missing = [v for v in self.variables if v not in cell_map]
+        if missing:
+            raise ExpressionError(f"以下变量没有对应单元格: {', '.join(missing)}")
+        return "=" + self._excel(self._tree, cell_map)[0]
+
+    def _excel(self, node: ast.AST, cells: Dict[str, str]) -> Tuple[str, int]:
+        """返回 (Excel 片段, 优先级)，按优先级补括号"""
+        if isinstance(node, ast.Name):
+            return cells[node.id], 9
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+                value = int(value)
+            return repr(value), 9
+        if isinstance(node, ast.UnaryOp):
+            text, prec = self._excel(node.operand, cells)
+            # Excel 中一元负号优先于 ^ (-2^2 = 4)，与 Python 相反，需显式括号
+            if prec < 9:
+                text = f"({text})"
+            return ("-" if isinstance(node.op, ast.USub) else "") + text, 5
+        if isinstance(node, ast.BinOp):
+            symbol, prec = _BINARY_OPS[type(node.op)]
+            left, left_prec = self._excel(node.left, cells)
+            right, right_prec = self._excel(node.right, cells)
+            if isinstance(node.op, ast.Pow):
+                # Python 的 ** 右结合，Excel 的 ^ 左结合
+                if left_prec <= prec:
+                    left = f"({left})"
+                if right_prec < 9:
+                    right = f"({right})"
+            else:
+                if left_prec < prec:
+                    left = f"({left})"
+                if right_prec < prec or (right_prec == prec and isinstance(node.op, (ast.Sub, ast.Div))):
+                    right = f"({right})"
+            return f"{left}{symbol}{right}", prec
+        if isinstance(node, ast.Compare):
+            left = self._excel(node.left, cells)[0]
+            right = self._excel(node.comparators[0], cells)[0]
+            return f"{left}{_COMPARE_OPS[type(node.ops[0])]}{right}", 0
+        if isinstance(node, ast.Call):
+            name = _EXCEL_FUNCTIONS[node.func.id][0]
+            args = ",".join(self._excel(arg, cells)[0] for arg in node.args)
+            return f"{name}({args})", 9
+        raise ExpressionError(f"无法转换为 Excel 公式: {ast.unparse(node)}")
+
+    def __reduce__(self):
+        # 编译后的内核不可 pickle，按源码重建 (多进程模式可直接传递表达式)
+        return (Expression, (self.source,))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Expression) and other.fingerprint == self.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def __str__(self) -> str:
+        return self.source
+
+    def __repr__(self) -> str:
+        return f"Expression({self.source!r})"
+
+
+class _Node:
+    """CachedEvaluator 的表达式树节点"""
+    __slots__ = ("kind", "deps", "children", "op", "name", "value", "partials")
+
+    def __init__(self, kind: str, deps: frozenset, children=(), op=None, name=None, value=None):
+        self.kind = kind            # "var" / "const" / "sum" / "product" / "apply"
+        self.deps = deps            # 依赖的变量名
+        self.children = list(children)
+        self.op = op                # sum/product: 每个子项的符号 (+1/-1，乘/除)；apply: 运算函数
+        self.name = name
+        self.value = value          # 缓存的求值结果
+        self.partials = {}          # sum/product: {受影响子项下标: 其余子项的合并值}
+
+
+class CachedEvaluator:
+    """
+    增量求值器: 缓存每个子表达式的结果，只重算依赖已改变变量的部分
+
+    连加 (a + b - c) 与连乘 (a * b / c) 会被展开为多元节点。某一项改变时，
+    其余各项的合并值 (部分和 / 部分积) 只计算一次并缓存，之后反复修改同一个
+    变量只需一次加法或乘法。结果与完整求值在浮点舍入误差内一致。
+
+    内存: 每个非叶子节点缓存一个与样本等长的数组。
+
+    Example:
+        >>> ev = CachedEvaluator(Expression("a * b * c + d"))
+        >>> ev.evaluate({"a": xa, "b": xb, "c": xc, "d": xd})         # 完整求值
+        >>> ev.evaluate({"a": xa, "b": xb, "c": xc2, "d": xd}, {"c"})  # 只重算 c 相关部分
+    """
+
+    _MAX_PARTIALS = 4  # 每个多元节点保留的部分和/积个数
+
+    def __init__(self, expression: Union[str, Expression]):
+        self.expression = Expression(expression) if isinstance(expression, str) else expression
+        self.root = self._build(self.expression._tree)
+        self._ready = False
+
+    def _build(self, node: ast.AST) -> _Node:
+        if isinstance(node, ast.Name):
+            return _Node("var", frozenset([node.id]), name=node.id)
+        if isinstance(node, ast.Constant):
+            return _Node("const", frozenset(), value=node.value)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div)):
+            kind = "sum" if isinstance(node.op, (ast.Add, ast.Sub)) else "product"
+            terms = []
+            self._flatten(node, kind, 1, terms)
+            children = [self._build(term) for term, _ in terms]
+            return _Node(kind, frozenset().union(*(c.deps for c in children)),
+                         children, op=[sign for _, sign in terms])
+        if isinstance(node, ast.BinOp):  # Pow
+            children = [self._build(node.left), self._build(node.right)]
+            return _Node("apply", children[0].deps | children[1].deps, children, op=lambda a, b: a ** b)
+        if isinstance(node, ast.UnaryOp):
+            child = self._build(node.operand)
+            op = (lambda a: -a) if isinstance(node.op, ast.USub) else (lambda a: +a)
+            return _Node("apply", child.deps, [child], op=op)
+        if isinstance(node, ast.Compare):
+            children = [self._build(node.left), self._build(node.comparators[0])]
+            fn = {ast.Lt: lambda a, b: a < b, ast.LtE: lambda a, b: a <= b,
+                  ast.Gt: lambda a, b: a > b, ast.GtE: lambda a, b: a >= b,
+                  ast.Eq: lambda a, b: a == b, ast.NotEq: lambda a, b: a != b}[type(node.ops[0])]
+            return _Node("apply", children[0].deps | children[1].deps, children, op=fn)
+        # ast.Call (已由 Expression 校验为白名单函数)
+        children = [self._build(arg) for arg in node.args]
+        return _Node("apply", frozenset().union(*(c.deps for c in children)), children,
+                     op=_VECTOR_FUNCTIONS[node.func.id])
+
+    @staticmethod
+    def _flatten(node: ast.AST, kind: str, sign: int, terms: list) -> None:
+        """把同类二元运算链展开为 [(子表达式, 符号)]，减法/除法记为 -1"""
+        ops = (ast.Add, ast.Sub) if kind == "sum" else (ast.Mult, ast.Div)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ops):
+            CachedEvaluator._flatten(node.left, kind, sign, terms)
+            inverse = isinstance(node.op, (ast.Sub, ast.Div))
+            CachedEvaluator._flatten(node.right, kind, -sign if inverse else sign, terms)
+        else:
+            terms.append((node, sign))
+
+    def evaluate(self, values: Dict[str, object], changed: Optional[Iterable[str]] = None):
+        """
+        求值
+
+        Args:
+            values: 全部变量的当前取值 (标量或等长数组)
+            changed: 自上次求值以来改变的变量；None 表示全部重算
+        """
+        missing = [v for v in self.expression.variables if v not in values]
+        if missing:
+            raise ExpressionError(f"缺少变量: {', '.join(missing)} (公式: {self.expression.source})")
+        if changed is None or not self._ready:
+            changed = frozenset(self.expression.variables)
+            full = True
+        else:
+            changed = frozenset(changed)
+            full = False
+        result = self._eval(self.root, values, changed, full)
+        self._ready = True
+        return result
+
+    def _eval(self, node: _Node, values: Dict[str, object], changed: frozenset, full: bool):
+        if node.kind == "var":
+            return values[node.name]
+        if node.kind == "const":
+            return node.value
+        if not full and node.value is not None and not (node.deps & changed):
+            return node.value
+
+        if node.kind == "apply":
+            node.value = node.op(*(self._eval(c, values, changed, full) for c in node.children))
+            return node.value
+
+        affected = tuple(i for i, c in enumerate(node.children) if full or c.deps & changed)
+        # 其余子项的值未变: 部分和/积若不含本次受影响的子项则失效
+        node.partials = {k: v for k, v in node.partials.items() if set(affected) <= set(k)}
+        if full or len(affected) == len(node.children):
+            rest = None
+        elif affected in node.partials:
+            rest = node.partials[affected]
+        else:
+            unaffected = [i for i in range(len(node.children)) if i not in affected]
+            rest = self._combine(node, unaffected,
+                                 {i: self._eval(node.children[i], values, changed, full) for i in unaffected})
+            node.partials[affected] = rest
+            while len(node.partials) > self._MAX_PARTIALS:
+                node.partials.pop(next(iter(node.partials)))
+
+        child_values = {i: self._eval(node.children[i], values, changed, full) for i in affected}
+        result = self._combine(node, list(affected), child_values, start=rest)
+        node.value = result
+        return result
+
+    @staticmethod
+    def _combine(node: _Node, indices: List[int], child_values, start=None):
+        """按节点类型合并指定子项 (sum: 加减；product: 乘除)"""
+        result = start
+        for i in indices:
+            value, sign = child_values[i], node.op[i]
+            if node.kind == "sum":
+                term = value if sign > 0 else -value
+                result = term if result is None else result + term
+            else:
+                if result is None:
+                    result = value if sign > 0 else 1.0 / value
+                else:
+                    result = result * value if sign > 0 else result / value
+        return 0.0 if result is None else result
+
+
+def compile_formula(formula: Union[str, Expression, Callable[..., float]]) -> Callable[..., float]:
+    """
+    统一公式入口: 字符串编译为 Expression，Expression 与普通函数原样返回
+    """
+    if isinstance(formula, str):
+        return Expression(formula)
+    return formula
@@ -0,0 +1,313 @@
+"""
+FX Rates
+========
+
+汇率表：历史汇率一次载入为按日期排序的数组，之后的换算都是向量化查表。
+- 载入: CSV / DataFrame、DataFetcher (FRED 日度汇率，可缓存到本地 CSV)、固定汇率
+- 查表: 按日期 as-of (取该日或之前最近一个交易日，np.searchsorted)，或按年取年均汇率
+- 换算: 标量、整列样本数组、带日期的数组、pandas 序列 (DatetimeIndex 按日，整数年份索引按年均)
+- 与 units 配合: FXTable 提供 rate(from, to)，可直接作为 fx 传给 Quantity.to、Assumption.to、
+  FermiResult.to、MonteCarloSimulator.run(convert_units=True) 与 MarketSizingData.converted
+
+表内存储 "每 1 单位外币折合多少 base 货币" (base 默认 CNY)，任意两币种的汇率由两列相除得到。
+币种可以写 ISO 代码或中文名 (USD / 美元 / 元)。
+
+使用方法:
+    from fx import FXTable
+
+    fx = FXTable.from_fetcher(DataFetcher(), currencies=("USD", "EUR"), start="2015-01-01",
+                              cache_dir=".fx_cache")          # 第二次运行直接读本地缓存
+    fx = FXTable.from_csv("rates.csv")                        # date, USD, EUR ... 列
+    fx = FXTable.constant({"USD": 7.2})                       # 固定汇率
+
+    fx.rate("USD", "CNY")                                     # 最新汇率
+    fx.convert(samples, "USD", "CNY", dates=sample_dates)     # 逐元素按日期换算
+    fx.convert_series(worldbank_gdp_usd, "USD", "CNY")        # 年度序列按年均汇率换算
+    Quantity(354, "M USD").to("亿元", fx=fx.average(2024))    # 约 25.5 亿元
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("fx 需要 numpy。请安装: pip install numpy")
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+    pd = None
+
+try:
+    from .units import parse_unit
+except ImportError:
+    from units import parse_unit
+
+
+# FRED 日度汇率序列: 币种 -> (序列 ID, 报价方式)
+# "usd_per_unit" 表示每 1 单位该币种折合多少美元，"per_usd" 表示每 1 美元折合多少该币种
+_FRED_SERIES = {
+    "CNY": ("DEXCHUS", "per_usd"),
+    "JPY": ("DEXJPUS", "per_usd"),
+    "HKD": ("DEXHKUS", "per_usd"),
+    "EUR": ("DEXUSEU", "usd_per_unit"),
+    "GBP": ("DEXUSUK", "usd_per_unit"),
+}
+
+# constant() 使用的起始日期 (早于任何实际查询日期)
+_EPOCH = np.datetime64("1900-01-01", "D")
+
+
+def currency_code(currency: str) -> str:
+    """币种名称统一为 ISO 代码 ("美元" / "$" / "usd" → "USD")"""
+    unit = parse_unit(currency)
+    if unit.currency:
+        return unit.currency
+    code = str(currency).strip().upper()
+    if not code.isalpha() or len(code) != 3:
+        raise ValueError(f"无法识别的币种: {currency!r}")
+    return code
+
+
+def _split_unit(unit: str):
+    """金额单位拆为 (币种代码, 数量级)，如 "M USD" → ("USD", 1e6)、"亿元" → ("CNY", 1e8)"""
+    parsed = parse_unit(unit)
+    return parsed.currency or currency_code(parsed.base or unit), parsed.scale
+
+
+def _to_dates(dates: Any) -> np.ndarray:
+    """日期 (字符串 / datetime / numpy / pandas，标量或数组) 统一为 datetime64[D]"""
+    if PANDAS_AVAILABLE and isinstance(dates, (pd.Index, pd.Series)):
+        return pd.to_datetime(dates).values.astype("datetime64[D]")
+    return np.asarray(dates, dtype="datetime64[D]")
+
+
+@dataclass
+class FXTable:
+    """
+    按日期索引的汇率表
+
+    Attributes:
+        dates: 升序日期 (datetime64[D])
+        rates: {币种代码: 与 dates 等长的数组}，每 1 单位该币种折合多少 base 货币
+        base: 基准货币 (其汇率恒为 1，不必出现在 rates 中)
+        source: 数据来源说明
+    """
+    dates: np.ndarray
+    rates: Dict[str, np.ndarray]
+    base: str = "CNY"
+    source: str = ""
+    _years: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.base = currency_code(self.base)
+        dates = _to_dates(self.dates).ravel()
+        if dates.size == 0:
+            raise ValueError("汇率表为空")
+        order = np.argsort(dates, kind="stable")
+        self.dates = dates[order]
+        rates = {}
+        for currency, values in self.rates.items():
+            values = np.asarray(values, dtype=float).ravel()
+            if values.shape != dates.shape:
+                raise ValueError(f"{currency} 汇率长度 {values.size} 与日期长度 {dates.size} 不一致")
+            values = values[order]
+            if np.any(~np.isfinite(values)) or np.any(values <= 0):
+                raise ValueError(f"{currency} 汇率含缺失值或非正数，请先前向填充或删除")
+            rates[currency_code(currency)] = values
+        rates.pop(self.base, None)
+        self.rates = rates
+        self._years = self.dates.astype("datetime64[Y]").astype(np.int64) + 1970
+
+    # ==================== 构造 ====================
+
+    @classmethod
+    def constant(cls, rates: Dict[str, float], base: str = "CNY") -> "FXTable":
+        """固定汇率表 (如 {"USD": 7.2} 表示 1 美元 = 7.2 元)，任何日期都使用同一汇率"""
+        return cls(np.array([_EPOCH]), {c: [r] for c, r in rates.items()}, base, source="固定汇率")
+
+    @classmethod
+    def from_frame(cls, frame: "pd.DataFrame", base: str = "CNY", date_column: Optional[str] = None,
+                   source: str = "") -> "FXTable":
+        """
+        从 DataFrame 构造: 每列一个币种 (每 1 单位折合多少 base)，日期为索引或 date_column 列
+
+        缺失值按日期前向填充，开头仍缺失的行删除。
+        """
+        if not PANDAS_AVAILABLE:
+            raise ImportError("请安装 pandas: pip install pandas")
+        frame = frame.set_index(date_column) if date_column else frame
+        frame = frame.sort_index().apply(pd.to_numeric, errors="coerce").ffill().dropna()
+        return cls(frame.index, {c: frame[c].to_numpy() for c in frame.columns}, base, source)
+
+    @classmethod
+    def from_csv(cls, path: Union[str, Path], base: str = "CNY", date_column: str = "date") -> "FXTable":
+        """从 CSV 载入 (date 列 + 各币种列)，格式与 to_csv 一致"""
+        if not PANDAS_AVAILABLE:
+            raise ImportError("请安装 pandas: pip install pandas")
+        frame = pd.read_csv(path, parse_dates=[date_column])
+        return cls.from_frame(frame, base, date_column, source=str(path))
+
+    def to_csv(self, path: Union[str, Path]) -> str:
+        """保存为 CSV (date 列 + 各币种列)"""
+        if not PANDAS_AVAILABLE:
+            raise ImportError("请安装 pandas: pip install pandas")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = pd.DataFrame(self.rates, index=pd.Index(self.dates, name="date"))
+        frame.to_csv(path)
+        return str(path)
+
+    @classmethod
+    def from_fetcher(
+        cls,
+        fetcher: Any,
+        currencies: Iterable[str] = ("USD",),
+        base: str = "CNY",
+        start: Optional[str] = None,
+        cache_dir: Optional[Union[str, Path]] = None,
+        refresh: bool = False,
+    ) -> "FXTable":
+        """
+        通过 DataFetcher 取 FRED 日度汇率 (需要 FRED API Key)
+
+        所有币种先换算成 "每单位折合多少美元"，再除以 base 的同一值得到交叉汇率；
+        各序列按日期外连接并前向填充。
+
+        Args:
+            fetcher: DataFetcher 实例
+            currencies: 需要的币种 (支持 USD / CNY / EUR / JPY / HKD / GBP)
+            base: 基准货币
+            start: 起始日期 (YYYY-MM-DD)
+            cache_dir: 本地缓存目录；命中时不再联网 (按币种、base、start 区分)
+            refresh: 忽略缓存重新取数
+        """
+        base = currency_code(base)
+        codes = sorted({currency_code(c) for c in currencies} - {base})
+        cache_path = None
+        if cache_dir is not None:
+            key = hashlib.sha256(repr(("fred", codes, base, start)).encode("utf-8")).hexdigest()[:16]
+            cache_path = Path(cache_dir) / f"fx_{key}.csv"
+            if cache_path.exists() and not refresh:
+                return cls.from_csv(cache_path, base)
+
+        usd_per_unit = {}
+        for code in sorted(set(codes) | {base}):
+            if code == "USD":
+                continue
+            if code not in _FRED_SERIES:
+                raise ValueError(f"FRED 没有 {code} 的汇率序列，可选: {', '.join(sorted(_FRED_SERIES))}")
+            series_id, quote = _FRED_SERIES[code]
+            series = fetcher.get_fred_series(series_id, start_date=start)
+            usd_per_unit[code] = series if quote == "usd_per_unit" else 1.0 / series
+
+        frame = pd.DataFrame(usd_per_unit).sort_index().ffill().dropna()
+        frame["USD"] = 1.0
+        table = cls.from_frame(frame[codes].div(frame[base], axis=0), base,
+                               source="FRED (" + ", ".join(_FRED_SERIES[c][0] for c in usd_per_unit) + ")")
+        if cache_path is not None:
+            table.to_csv(cache_path)
+        return table
+
+    # ==================== 查表 ====================
+
+    @property
+    def currencies(self) -> list:
+        """表内可换算的币种 (含 base)"""
+        return [self.base] + list(self.rates)
+
+    def _column(self, currency: str) -> np.ndarray:
+        code = currency_code(currency)
+        if code == self.base:
+            return np.ones(self.dates.size)
+        if code not in self.rates:
+            raise KeyError(f"汇率表没有 {code}，可选: {', '.join(self.currencies)}")
+        return self.rates[code]
+
+    def index(self, dates: Any) -> np.ndarray:
+        """各日期对应的行号 (该日或之前最近的一行，as-of)"""
+        dates = _to_dates(dates)
+        idx = np.searchsorted(self.dates, dates, side="right") - 1
+        if np.any(idx < 0):
+            earliest = dates.min() if dates.ndim else dates
+            raise ValueError(f"日期 {earliest} 早于汇率表起始日期 {self.dates[0]}")
+        return idx
+
+    def rate(self, source: str, target: str, date: Any = None) -> Union[float, np.ndarray]:
+        """
+        汇率: 1 单位 source = rate 单位 target
+
+        Args:
+            date: 日期 (标量或数组)；None 为表内最新汇率
+        """
+        if currency_code(source) == currency_code(target):
+            return 1.0 if date is None else np.ones(np.shape(_to_dates(date)))
+        src, dst = self._column(source), self._column(target)
+        if date is None:
+            return float(src[-1] / dst[-1])
+        idx = self.index(date)
+        result = src[idx] / dst[idx]
+        return float(result) if np.ndim(result) == 0 else result
+
+    def annual(self, source: str, target: str, years: Any) -> Union[float, np.ndarray]:
+        """年均汇率 (表内该年所有行的算术平均)，years 为标量或数组"""
+        years_arr = np.asarray(years, dtype=np.int64)
+        ratio = self._column(source) / self._column(target)
+        cumulative = np.concatenate([[0.0], np.cumsum(ratio)])
+        lo = np.searchsorted(self._years, years_arr, side="left")
+        hi = np.searchsorted(self._years, years_arr, side="right")
+        if np.any(hi == lo):
+            missing = np.atleast_1d(years_arr)[np.atleast_1d(hi == lo)]
+            raise ValueError(f"汇率表没有 {missing.tolist()} 年的数据")
+        result = (cumulative[hi] - cumulative[lo]) / (hi - lo)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def at(self, date: Any) -> "FXTable":
+        """固定在某一日期的单行汇率表 (作为 fx 传入时所有换算都使用该日汇率)"""
+        i = int(self.index(date))
+        return FXTable(self.dates[i:i + 1], {c: r[i:i + 1] for c, r in self.rates.items()},
+                       self.base, f"{self.source} @ {self.dates[i]}")
+
+    def average(self, year: int) -> "FXTable":
+        """固定为某年年均汇率的单行汇率表"""
+        rates = {c: [self.annual(c, self.base, year)] for c in self.rates}
+        return FXTable(np.array([np.datetime64(f"{int(year)}-01-01", "D")]), rates,
+                       self.base, f"{self.source} {year} 年均")
+
+    # ==================== 换算 ====================
+
+    def convert(self, values: Any, source: str, target: str, dates: Any = None) -> Any:
+        """
+        换算金额 (标量或数组，一次向量化完成)
+
+        Args:
+            values: 金额
+            source / target: 币种 (也可以是带数量级的单位，如 "M USD" → "亿元")
+            dates: 与 values 可广播的日期；None 时使用最新汇率
+        """
+        (src, src_scale), (dst, dst_scale) = _split_unit(source), _split_unit(target)
+        result = np.multiply(values, self.rate(src, dst, dates) * (src_scale / dst_scale))
+        return float(result) if np.ndim(result) == 0 else result
+
+    def convert_series(self, series: "pd.Series", source: str, target: str) -> "pd.Series":
+        """
+        换算 pandas 序列: DatetimeIndex 按日 as-of 汇率，整数年份索引 (如 World Bank) 按年均汇率
+        """
+        if not PANDAS_AVAILABLE:
+            raise ImportError("请安装 pandas: pip install pandas")
+        index = series.index
+        (src, src_scale), (dst, dst_scale) = _split_unit(source), _split_unit(target)
+        if pd.api.types.is_integer_dtype(index) or (index.dtype == object and all(str(v).isdigit() for v in index)):
+            rates = self.annual(src, dst, np.asarray(index, dtype=np.int64))
+        else:
+            rates = self.rate(src, dst, pd.to_datetime(index).values)
+        return series * (np.asarray(rates) * (src_scale / dst_scale))
+
+    def __repr__(self) -> str:
+        return (f"FXTable(base={self.base!r}, currencies={list(self.rates)}, "
+                f"{self.dates[0]} ~ {self.dates[-1]}, rows={self.dates.size})")
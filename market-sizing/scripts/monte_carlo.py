@@ -6,6 +6,21 @@ Monte Carlo Simulation for Market Sizing
 - 支持多种概率分布
 - 输出置信区间而非单点估计
 - 敏感性分析 (Tornado Chart)
+- 向量化求值 (formula 直接接收整列 numpy 数组，不支持时自动回退逐次循环)
+- Sobol 全局敏感性 (Saltelli 一阶 / 总效应指数，可复用 run() 已抽取的样本)
+- 分块流式模拟 (chunk_size + keep_raw=False，内存占用与模拟次数无关)
+- 多进程并行 (n_workers，SeedSequence.spawn 派生子随机流，结果可复现)
+- 分层 / 准随机抽样 (sampling="lhs" 拉丁超立方, "sobol" 加扰 Sobol 序列)
+- 相关假设 (correlation，Iman-Conover 秩相关，边际分布保持不变)
+- 自适应停止 (run_adaptive，按目标精度或时间预算自动决定模拟次数)
+- 字符串公式 (formula="ka_vol*ka_price + ...")，编译为 numpy 内核，见 formula_expr.py
+- 单精度模式 (dtype="float32"，样本与结果内存减半；每块样本在该块求值后释放)
+- 抽样结果持久化 (save_draws / load_draws，.npy + JSON 元数据，内存映射零拷贝重新加载)
+- 结果缓存 (cache=ResultCache(...)，按假设、公式、参数与随机状态寻址，见 result_cache.py)
+- 增量重算 (run_incremental，只重新生成被修改的假设列，表达式公式只重算受影响的子表达式)
+- 更多分布 (PERT、截断正态/对数正态、离散、经验、直方图、分段线性)，均有向量化逆 CDF，见 distributions.py
+- 多年增长路径 (run_paths，逐年随机增长率，可 AR(1) 自相关，输出逐年扇形图分位数)
+- 单位换算 (convert_units=True，按 Assumption.unit 推断结果单位并换算到 unit，见 units.py)
 
 使用方法:
     from monte_carlo import MonteCarloSimulator, Assumption
@@ -25,8 +40,17 @@ Monte Carlo Simulation for Market Sizing
     print(result)
 """
 
-from dataclasses import dataclass
-from typing import Dict, Callable, List, Tuple, Optional, Literal
+import os
+import json
+import math
+import time
+import pickle
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Callable, List, Tuple, Optional, Literal, Union
 from collections import OrderedDict
 
 try:
@@ -42,8 +66,36 @@ if not NUMPY_AVAILABLE:
         "如果不需要 Monte Carlo 功能，可以只使用 fermi_calculator.py"
     )
 
+# 可选依赖: scipy 提供加扰 Sobol 序列 (sampling="sobol")
+QMC_AVAILABLE = False
+try:
+    from scipy.stats import qmc
+    QMC_AVAILABLE = True
+except ImportError:
+    qmc = None
+
+try:
+    from .streaming_stats import RunningMoments, TDigest
+    from .formula_expr import Expression, CachedEvaluator, compile_formula
+    from .result_cache import ResultCache
+    from . import distributions
+    from .units import conversion_factor, format_number, format_quantity, resolve_units, scale_expression
+except ImportError:
+    from streaming_stats import RunningMoments, TDigest
+    from formula_expr import Expression, CachedEvaluator, compile_formula
+    from result_cache import ResultCache
+    import distributions
+    from units import conversion_factor, format_number, format_quantity, resolve_units, scale_expression
+
 
-DistributionType = Literal["uniform", "triangular", "normal", "lognormal"]
+DistributionType = Literal[
+    "uniform", "triangular", "normal", "lognormal",
+    "pert", "truncnormal", "trunclognormal",
+    "discrete", "empirical", "histogram", "piecewise",
+]
+SamplingMethod = Literal["random", "lhs", "sobol"]
+PrecisionType = Literal["float64", "float32"]
+CorrelationSpec = Union[Dict[Tuple[str, str], float], "np.ndarray", List[List[float]]]
 
 
 @dataclass
@@ -54,10 +106,14 @@ class Assumption:
     Attributes:
         min: 最小值
         max: 最大值
-        most_likely: 最可能值 (用于 triangular 分布)
-        distribution: 分布类型
+        most_likely: 最可能值 (triangular / pert 的众数；敏感性分析的基准值)
+        distribution: 分布类型 (见 distributions.py)
         unit: 单位 (可选)
         source: 数据来源 (可选)
+        params: 分布的额外参数 (如 pert 的 lamb、discrete 的 values)
+    
+    数据型分布 (discrete / empirical / histogram / piecewise) 建议使用同名类方法构造，
+    min / most_likely / max 由数据自动推出。
     """
     min: float
     max: float
@@ -65,6 +121,7 @@ class Assumption:
     distribution: DistributionType = "triangular"
     unit: str = ""
     source: str = ""
+    params: Dict[str, Any] = field(default_factory=dict)
     
     def __post_init__(self):
         if self.most_likely is None:
@@ -75,6 +132,81 @@ class Assumption:
             raise ValueError(f"min ({self.min}) 不能大于 max ({self.max})")
         if not (self.min <= self.most_likely <= self.max):
             raise ValueError(f"most_likely ({self.most_likely}) 必须在 [{self.min}, {self.max}] 范围内")
+        distributions.validate(self.distribution, self.min, self.most_likely, self.max, self.params)
+    
+    @classmethod
+    def _from_data(cls, distribution: str, params: Dict[str, Any], **kwargs) -> "Assumption":
+        lo, mode, hi = distributions.support(distribution, params)
+        return cls(min=lo, max=hi, most_likely=mode, distribution=distribution, params=params, **kwargs)
+    
+    @classmethod
+    def pert(cls, min: float, most_likely: float, max: float, lamb: float = 4.0, **kwargs) -> "Assumption":
+        """Beta-PERT 分布 (lamb 越大越集中于众数，默认 4)"""
+        return cls(min=min, max=max, most_likely=most_likely, distribution="pert",
+                   params={"lamb": lamb}, **kwargs)
+    
+    @classmethod
+    def truncnormal(cls, mean: float, std: float, min: float, max: float, **kwargs) -> "Assumption":
+        """截断正态分布 N(mean, std²) 限制在 [min, max]"""
+        return cls(min=min, max=max, most_likely=float(np.clip(mean, min, max)), distribution="truncnormal",
+                   params={"mean": mean, "std": std}, **kwargs)
+    
+    @classmethod
+    def trunclognormal(cls, median: float, sigma: float, min: float, max: float, **kwargs) -> "Assumption":
+        """截断对数正态分布 (ln X ~ N(ln median, sigma²)) 限制在 [min, max]"""
+        return cls(min=min, max=max, most_likely=float(np.clip(median, min, max)), distribution="trunclognormal",
+                   params={"median": median, "sigma": sigma}, **kwargs)
+    
+    @classmethod
+    def discrete(cls, values: List[float], probabilities: Optional[List[float]] = None, **kwargs) -> "Assumption":
+        """离散分布 (probabilities 缺省为等概率)"""
+        params = {"values": list(values)}
+        if probabilities is not None:
+            params["probabilities"] = list(probabilities)
+        return cls._from_data("discrete", params, **kwargs)
+    
+    @classmethod
+    def empirical(cls, data: List[float], **kwargs) -> "Assumption":
+        """经验分布：按观测值等概率重抽样"""
+        return cls._from_data("empirical", {"data": list(np.asarray(data, dtype=float))}, **kwargs)
+    
+    @classmethod
+    def histogram(cls, edges: List[float], weights: List[float], **kwargs) -> "Assumption":
+        """直方图分布：落在各箱的概率与 weights 成正比，箱内均匀"""
+        return cls._from_data("histogram", {"edges": list(edges), "weights": list(weights)}, **kwargs)
+    
+    @classmethod
+    def piecewise(cls, x: List[float], p: List[float], **kwargs) -> "Assumption":
+        """分段线性 CDF：P(X ≤ x[i]) = p[i]，p 从 0 到 1 (如专家给出的 P10/P50/P90 加上下限)"""
+        return cls._from_data("piecewise", {"x": list(x), "p": list(p)}, **kwargs)
+    
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "Assumption":
+        """
+        从字典构造 (JSON 场景文件)；数据型分布可省略 min / max，由 params 推出
+        """
+        spec = dict(spec)
+        distribution = spec.get("distribution", "triangular")
+        if distribution in distributions.DATA_DISTRIBUTIONS and ("min" not in spec or "max" not in spec):
+            params = spec.pop("params", {})
+            spec.pop("distribution")
+            return cls._from_data(distribution, params, **spec)
+        return cls(**spec)
+    
+    def to(self, unit: str, fx: Any = None) -> "Assumption":
+        """
+        换算到另一单位 (如 "M USD" → "亿元")，分布形状不变
+        
+        Args:
+            unit: 目标单位
+            fx: 跨币种汇率 (数字或 fx.FXTable，见 units.conversion_factor)
+        """
+        factor = conversion_factor(self.unit, unit, fx)
+        return replace(
+            self, unit=unit,
+            min=self.min * factor, max=self.max * factor, most_likely=self.most_likely * factor,
+            params=distributions.scale_params(self.params, factor),
+        )
 
 
 @dataclass
@@ -92,11 +224,18 @@ class MonteCarloResult:
     min: float                            # 最小值
     max: float                            # 最大值
     n_simulations: int                    # 模拟次数
-    raw_results: np.ndarray               # 原始结果 (用于绘图)
+    raw_results: Optional[np.ndarray]     # 原始结果 (用于绘图；流式模式 keep_raw=False 时为 None)
     sensitivity: Dict[str, float]         # 敏感性分析结果
     unit: str                             # 单位
+    sensitivity_detail: Dict[str, Dict[str, float]] = field(default_factory=dict)  # 双侧敏感性 {假设名: {"low": %, "high": %}}
+    sobol: Dict[str, Dict[str, float]] = field(default_factory=dict)  # Sobol 指数 {假设名: {"S1": 一阶, "ST": 总效应}}
+    quantile_sketch: Optional[TDigest] = None  # 分位数草图 (未保留原始结果时用于 get_percentile)
+    convergence: Dict[str, object] = field(default_factory=dict)  # 自适应模式的收敛信息 (实际精度、停止原因等)
+    samples: Optional[Dict[str, np.ndarray]] = None  # 输入样本 {假设名: 数组} (keep_samples=True 时保留)
+    draws_path: Optional[str] = None      # save_draws 写出的元数据文件路径
     
     def __str__(self) -> str:
+        q = lambda n: format_quantity(n, self.unit)
         lines = [
             "="*50,
             "Monte Carlo 模拟结果",
@@ -104,16 +243,16 @@ class MonteCarloResult:
             f"模拟次数: {self.n_simulations:,}",
             "",
             "📊 汇总统计:",
-            f"  均值:   {self._format(self.mean)} {self.unit}",
-            f"  中位数: {self._format(self.median)} {self.unit}",
-            f"  标准差: {self._format(self.std)} {self.unit}",
+            f"  均值:   {q(self.mean)}",
+            f"  中位数: {q(self.median)}",
+            f"  标准差: {q(self.std)}",
             "",
             "📈 置信区间:",
-            f"  90% CI: [{self._format(self.p5)}, {self._format(self.p95)}] {self.unit}",
-            f"  80% CI: [{self._format(self.p10)}, {self._format(self.p90)}] {self.unit}",
-            f"  50% CI: [{self._format(self.p25)}, {self._format(self.p75)}] {self.unit}",
+            f"  90% CI: [{q(self.p5)}, {q(self.p95)}]",
+            f"  80% CI: [{q(self.p10)}, {q(self.p90)}]",
+            f"  50% CI: [{q(self.p25)}, {q(self.p75)}]",
             "",
-            f"  范围:   [{self._format(self.min)}, {self._format(self.max)}] {self.unit}",
+            f"  范围:   [{q(self.min)}, {q(self.max)}]",
         ]
         
         if self.sensitivity:
@@ -123,21 +262,47 @@ class MonteCarloResult:
             for name, impact in sorted_sens:
                 bar_len = int(abs(impact) / max(abs(v) for v in self.sensitivity.values()) * 20)
                 bar = "█" * bar_len
-                lines.append(f"  {name}: {bar} ({impact:+.1f}%)")
+                detail = self.sensitivity_detail.get(name)
+                if detail:
+                    lines.append(f"  {name}: {bar} (低 {detail['low']:+.1f}% / 高 {detail['high']:+.1f}%)")
+                else:
+                    lines.append(f"  {name}: {bar} ({impact:+.1f}%)")
+        
+        if self.convergence:
+            c = self.convergence
+            status = "已收敛" if c.get("converged") else f"未收敛 (停止原因: {c.get('stop_reason')})"
+            lines.append("")
+            lines.append(f"⏱️ 自适应模拟: {status}，用时 {c.get('elapsed_seconds', 0):.2f}s")
+            lines.append(f"  均值 95% CI 相对半宽: {c.get('mean_rel_halfwidth', float('nan')) * 100:.3f}%")
+            for key, width in c.get("percentile_rel_halfwidth", {}).items():
+                lines.append(f"  {key} 95% CI 相对半宽: {width * 100:.3f}%")
+        
+        if self.sobol:
+            lines.append("")
+            lines.append("🎯 Sobol 全局敏感性 (S1 一阶 / ST 总效应):")
+            sorted_sobol = sorted(self.sobol.items(), key=lambda x: x[1]["ST"], reverse=True)
+            for name, idx in sorted_sobol:
+                lines.append(f"  {name}: S1={idx['S1']:.3f}  ST={idx['ST']:.3f}")
         
         return "\n".join(lines)
     
-    @staticmethod
-    def _format(n: float) -> str:
-        """格式化数字"""
-        if n >= 1e12:
-            return f"{n/1e12:.2f}万亿"
-        elif n >= 1e8:
-            return f"{n/1e8:.2f}亿"
-        elif n >= 1e4:
-            return f"{n/1e4:.2f}万"
-        else:
-            return f"{n:.2f}"
+    _format = staticmethod(format_number)
+    
+    def scaled(self, factor: float, unit: str) -> "MonteCarloResult":
+        """
+        结果整体乘以正数 factor 并改为 unit (单位换算，如 元 → 亿元 时 factor=1e-8)
+        
+        敏感性 / Sobol 为相对量，保持不变；输入样本不变。
+        """
+        if not factor > 0:
+            raise ValueError(f"factor 必须为正数，当前值: {factor}")
+        stats = {name: getattr(self, name) * factor for name in
+                 ("mean", "median", "std", "p5", "p10", "p25", "p75", "p90", "p95", "min", "max")}
+        return replace(
+            self, unit=unit, **stats,
+            raw_results=self.raw_results * factor if self.raw_results is not None else None,
+            quantile_sketch=self.quantile_sketch.scaled(factor) if self.quantile_sketch is not None else None,
+        )
     
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -155,14 +320,335 @@ class MonteCarloResult:
             "max": self.max,
             "n_simulations": self.n_simulations,
             "sensitivity": self.sensitivity,
+            "sensitivity_detail": self.sensitivity_detail,
+            "sobol": self.sobol,
+            "convergence": self.convergence,
             "unit": self.unit,
+            "draws_path": self.draws_path,
         }
     
+    def save_draws(self, path: Union[str, Path], include_samples: bool = True) -> Path:
+        """
+        把原始抽样结果 (及输入样本) 保存到磁盘，之后可零拷贝重新加载
+        
+        生成文件 (path 为不含扩展名的前缀，如报告同名前缀):
+        - <path>.draws.npy: 模拟结果 (n,)
+        - <path>.samples.npy: 输入样本 (d, n)，每行一个假设，加载后每列是连续的视图
+        - <path>.draws.json: 汇总统计量与元数据 (to_dict() + 文件名、假设名)
+        
+        Args:
+            path: 文件前缀
+            include_samples: 是否同时保存输入样本 (需要 run(..., keep_samples=True))
+            
+        Returns:
+            元数据文件 (.draws.json) 路径，传给 load_draws 即可重新加载
+        """
+        if self.raw_results is None:
+            raise ValueError("未保留原始结果 (keep_raw=False)，无法保存抽样结果")
+        base = Path(path)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        draws_file = base.with_name(f"{base.name}.draws.npy")
+        sidecar = base.with_name(f"{base.name}.draws.json")
+        
+        np.save(draws_file, np.asarray(self.raw_results))
+        self.draws_path = str(sidecar)
+        meta = self.to_dict()
+        meta["draws_file"] = draws_file.name
+        
+        if include_samples and self.samples:
+            names = list(self.samples)
+            samples_file = base.with_name(f"{base.name}.samples.npy")
+            first = self.samples[names[0]]
+            # 逐行写入内存映射文件，不需要先在内存中拼出 d × n 矩阵
+            matrix = np.lib.format.open_memmap(samples_file, mode="w+", dtype=first.dtype,
+                                               shape=(len(names), len(first)))
+            for row, name in enumerate(names):
+                matrix[row] = self.samples[name]
+            matrix.flush()
+            del matrix
+            meta["samples_file"] = samples_file.name
+            meta["sample_names"] = names
+        
+        with open(sidecar, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=float)
+        return sidecar
+    
+    @classmethod
+    def load_draws(cls, path: Union[str, Path], mmap: bool = True) -> "MonteCarloResult":
+        """
+        重新加载 save_draws 保存的结果
+        
+        Args:
+            path: .draws.json 路径，或 save_draws 使用的前缀
+            mmap: 以只读内存映射方式打开 .npy (零拷贝，按需从磁盘读取)；False 时全部读入内存
+        """
+        sidecar = Path(path)
+        if not sidecar.name.endswith(".draws.json"):
+            sidecar = sidecar.with_name(f"{sidecar.name}.draws.json")
+        with open(sidecar, encoding="utf-8") as f:
+            meta = json.load(f)
+        
+        mmap_mode = "r" if mmap else None
+        raw = np.load(sidecar.parent / meta["draws_file"], mmap_mode=mmap_mode)
+        samples = None
+        if meta.get("samples_file"):
+            matrix = np.load(sidecar.parent / meta["samples_file"], mmap_mode=mmap_mode)
+            samples = {name: matrix[row] for row, name in enumerate(meta["sample_names"])}
+        
+        names = {f.name for f in fields(cls)}
+        kwargs = {key: value for key, value in meta.items() if key in names}
+        kwargs.update(raw_results=raw, samples=samples, draws_path=str(sidecar))
+        return cls(**kwargs)
+    
     def get_percentile(self, p: float) -> float:
-        """获取任意分位数"""
+        """获取任意分位数 (未保留原始结果时由分位数草图估计)"""
+        if self.raw_results is None:
+            if self.quantile_sketch is None:
+                raise ValueError("未保留原始结果，也没有分位数草图，无法计算分位数")
+            return float(self.quantile_sketch.percentile(p))
         return float(np.percentile(self.raw_results, p))
 
 
+@dataclass
+class PathSimulationResult:
+    """
+    多年增长路径模拟结果 (由 MonteCarloSimulator.run_paths 生成)
+    
+    fan 的每个分位数是逐年独立计算的 (扇形图)，并不是某一条路径。
+    """
+    years: List[int]                      # 年份 (第一个为基准年)
+    mean: List[float]                     # 各年均值
+    fan: Dict[str, List[float]]           # 各年分位数 {"p5": [...], "p50": [...], ...}
+    cagr: Dict[str, float]                # 各路径实现 CAGR 的分布 {"mean", "p5", "p50", "p95"}
+    n_simulations: int                    # 路径数
+    autocorrelation: float                # 年增长率的 AR(1) 自相关系数
+    unit: str                             # 单位
+    paths: Optional[np.ndarray] = None    # (n_simulations × 年数) 路径矩阵 (keep_paths=False 时为 None)
+    
+    def __str__(self) -> str:
+        keys = list(self.fan)
+        lines = [
+            "="*50,
+            f"增长路径模拟 ({self.n_simulations:,} 条路径，自相关 {self.autocorrelation:.2f})",
+            "="*50,
+            "年份    " + "".join(f"{k.upper():>12}" for k in keys),
+        ]
+        for i, year in enumerate(self.years):
+            lines.append(f"{year:<8}" + "".join(
+                f"{MonteCarloResult._format(self.fan[k][i]):>12}" for k in keys))
+        lines.append("")
+        lines.append(f"实现 CAGR: 均值 {self.cagr['mean']:.1%}  "
+                     f"90% CI [{self.cagr['p5']:.1%}, {self.cagr['p95']:.1%}]  ({self.unit})")
+        return "\n".join(lines)
+    
+    def to_dict(self) -> dict:
+        """转换为字典 (不含路径矩阵)"""
+        return {
+            "years": self.years,
+            "mean": self.mean,
+            "fan": self.fan,
+            "cagr": self.cagr,
+            "n_simulations": self.n_simulations,
+            "autocorrelation": self.autocorrelation,
+            "unit": self.unit,
+        }
+    
+    def to_growth_forecast(self, sam_ratio: Optional[float] = None, percentile: str = "p50") -> List[dict]:
+        """
+        转换为 MarketSizingData.growth_forecast 的行格式
+        
+        Args:
+            sam_ratio: SAM / TAM 比例 (给出时附带 sam 列)
+            percentile: 作为 tam 列的分位数 (默认中位数)，另附 tam_p5 / tam_p95 区间
+        """
+        low, high = ("p5", "p95") if "p5" in self.fan and "p95" in self.fan else (None, None)
+        rows = []
+        for i, year in enumerate(self.years):
+            tam = self.fan[percentile][i]
+            row = {"year": year, "tam": round(tam, 2)}
+            if sam_ratio is not None:
+                row["sam"] = round(tam * sam_ratio, 2)
+            if low:
+                row["tam_p5"], row["tam_p95"] = round(self.fan[low][i], 2), round(self.fan[high][i], 2)
+            row["growth"] = f"{tam / self.fan[percentile][i - 1] - 1:.1%}" if i > 0 else "—"
+            rows.append(row)
+        return rows
+
+
+class _SobolAccumulator:
+    """
+    Saltelli / Jansen 估计量的累加器
+    
+    只保存求和量，多批样本 (分块、多进程) 可以直接相加合并。
+    A、B 为两组独立样本，AB_i 为 A 的第 i 列换成 B 的第 i 列:
+        S1_i = mean(f(B) · (f(AB_i) - f(A))) / V      (Saltelli 2010)
+        ST_i = mean((f(A) - f(AB_i))²) / (2V)          (Jansen 1999)
+    """
+    
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        self.count = 0
+        self.shift: Optional[float] = None      # 平移量，避免大数平方和的精度损失
+        self.sum_f = 0.0
+        self.sum_f2 = 0.0
+        self.sum_first = np.zeros(len(self.names))
+        self.sum_total = np.zeros(len(self.names))
+        self.sum_diff = np.zeros(len(self.names))
+    
+    def update(self, f_a: np.ndarray, f_b: np.ndarray, f_ab: List[np.ndarray]) -> None:
+        """累加一批 (f(A), f(B), [f(AB_i)]) 求值结果"""
+        if len(f_a) == 0:
+            return
+        if self.shift is None:
+            self.shift = float(np.mean(f_a))
+        a = f_a - self.shift
+        b = f_b - self.shift
+        self.count += len(a)
+        self.sum_f += float(np.sum(a) + np.sum(b))
+        self.sum_f2 += float(np.dot(a, a) + np.dot(b, b))
+        for i, values in enumerate(f_ab):
+            diff = values - f_a
+            self.sum_first[i] += float(np.dot(b, diff))
+            self.sum_total[i] += float(np.dot(diff, diff))
+            self.sum_diff[i] += float(np.sum(diff))
+    
+    def merge(self, other: "_SobolAccumulator") -> None:
+        """合并另一个累加器 (平移量不同时换算到本累加器的基准)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.shift = other.shift
+        delta = other.shift - self.shift
+        n_other = 2 * other.count
+        self.count += other.count
+        self.sum_f2 += other.sum_f2 + 2 * delta * other.sum_f + n_other * delta ** 2
+        self.sum_f += other.sum_f + n_other * delta
+        self.sum_first += other.sum_first + delta * other.sum_diff
+        self.sum_total += other.sum_total
+        self.sum_diff += other.sum_diff
+    
+    def indices(self) -> Dict[str, Dict[str, float]]:
+        """计算 {假设名: {"S1": 一阶指数, "ST": 总效应指数}}"""
+        if self.count < 2:
+            return {}
+        n_f = 2 * self.count
+        mean = self.sum_f / n_f
+        variance = self.sum_f2 / n_f - mean ** 2
+        if variance <= 0:
+            return {name: {"S1": 0.0, "ST": 0.0} for name in self.names}
+        first = self.sum_first / self.count / variance
+        total = self.sum_total / self.count / (2 * variance)
+        return {
+            name: {"S1": float(first[i]), "ST": float(total[i])}
+            for i, name in enumerate(self.names)
+        }
+
+
+class _SimulationPartial:
+    """
+    一段模拟 (若干块) 的部分统计量，可按顺序合并
+    
+    keep_raw=True 时保存原始结果块；否则保存在线矩与分位数草图。
+    keep_samples=True 时另外保存输入样本块 (每块为 d × m 矩阵)。
+    """
+    
+    def __init__(self, names: List[str], keep_raw: bool, run_sobol: bool, keep_samples: bool = False):
+        self.names = names
+        self.raw_blocks: List[np.ndarray] = []
+        self.sample_blocks: Optional[List[np.ndarray]] = [] if keep_samples else None
+        self.moments = RunningMoments()
+        self.digest = None if keep_raw else TDigest()
+        self.sobol = _SobolAccumulator(names) if run_sobol else None
+        self.keep_raw = keep_raw
+    
+    def add_block(self, results: np.ndarray) -> None:
+        """加入一块模拟结果"""
+        if self.keep_raw:
+            self.raw_blocks.append(results)
+        else:
+            self.moments.update(results)
+            self.digest.update(results)
+    
+    def add_samples(self, samples: Dict[str, np.ndarray]) -> None:
+        """加入一块输入样本"""
+        self.sample_blocks.append(np.stack([samples[name] for name in self.names]))
+    
+    def merge(self, other: "_SimulationPartial") -> None:
+        """按顺序合并另一段的统计量"""
+        self.raw_blocks.extend(other.raw_blocks)
+        if self.sample_blocks is not None:
+            self.sample_blocks.extend(other.sample_blocks)
+        self.moments.merge(other.moments)
+        if self.digest is not None:
+            self.digest.merge(other.digest)
+        if self.sobol is not None:
+            self.sobol.merge(other.sobol)
+    
+    def raw(self) -> Optional[np.ndarray]:
+        """拼接后的原始结果 (未保留时为 None)"""
+        if not self.keep_raw:
+            return None
+        if len(self.raw_blocks) == 1:
+            return self.raw_blocks[0]
+        return np.concatenate(self.raw_blocks) if self.raw_blocks else np.empty(0)
+    
+    def samples(self) -> Optional[Dict[str, np.ndarray]]:
+        """拼接后的输入样本 {假设名: 数组} (未保留时为 None)"""
+        if not self.sample_blocks:
+            return None
+        matrix = self.sample_blocks[0] if len(self.sample_blocks) == 1 else np.concatenate(self.sample_blocks, axis=1)
+        return {name: matrix[row] for row, name in enumerate(self.names)}
+
+
+# 子进程中的 formula (fork 模式下经 initializer 继承，无需 pickle)
+_WORKER_FORMULA: Optional[Callable[..., float]] = None
+
+
+def _init_worker(formula: Callable[..., float]) -> None:
+    global _WORKER_FORMULA
+    _WORKER_FORMULA = formula
+
+
+def _run_worker(seed_seq: "np.random.SeedSequence", assumptions: Dict[str, "Assumption"], n: int,
+                options: dict) -> "_SimulationPartial":
+    """子进程入口：用派生的子随机流模拟 n 次，返回部分统计量"""
+    sim = MonteCarloSimulator(seed=seed_seq)
+    return sim._simulate_blocks(assumptions, _WORKER_FORMULA, n, **options)
+
+
+# 向量化求值时做标量探测比对的位置数 (首、尾及其间均匀分布)
+_PROBE_POINTS = 5
+
+
+class _ScaledFormula:
+    """
+    输入与结果按常数换算的公式 (单位换算)；定义在模块顶层以便多进程序列化
+
+    结果缓存按实例属性 (内层公式、换算系数) 指纹化，input_scales 按假设名排序，
+    使指纹与假设顺序无关，跨进程重跑同一模型可以命中缓存
+    """
+    
+    def __init__(self, formula: Callable[..., Any], input_scales: Dict[str, float], factor: float):
+        self.formula = formula
+        self.input_scales = dict(sorted(input_scales.items()))
+        self.factor = factor
+    
+    def __call__(self, **values):
+        for name, scale in self.input_scales.items():
+            values[name] = values[name] * scale
+        result = self.formula(**values)
+        return result if self.factor == 1 else result * self.factor
+
+
+def _scale_formula(formula: Callable[..., Any], input_scales: Dict[str, float], factor: float) -> Callable[..., Any]:
+    """换算系数并入公式: 表达式改写为新的表达式 (保持可缓存、可增量重算)，函数则包一层"""
+    if not input_scales and factor == 1:
+        return formula
+    if isinstance(formula, Expression):
+        return Expression(scale_expression(formula.source, input_scales, factor))
+    return _ScaledFormula(formula, input_scales, factor)
+
+
 class MonteCarloSimulator:
     """
     Monte Carlo 模拟器
@@ -180,14 +666,40 @@ class MonteCarloSimulator:
         >>> print(result)
     """
     
-    def __init__(self, seed: Optional[int] = None):
+    def __init__(
+        self,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+        cache: Optional[Union[str, Path, ResultCache]] = None
+    ):
         """
         初始化模拟器
         
         Args:
-            seed: 随机种子 (用于可重复性)
+            seed: 随机种子 (用于可重复性)，也可直接传入 SeedSequence
+            cache: 结果缓存 (ResultCache 或缓存目录)。run() 命中时直接返回已保存的结果
         """
-        self.rng = np.random.default_rng(seed)
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self.cache = ResultCache(cache) if isinstance(cache, (str, Path)) else cache
+    
+    def _rng_state(self) -> dict:
+        """随机状态: 生成器状态 + 已派生的子随机流数 (多进程模式使用)"""
+        return {
+            "entropy": self.seed_sequence.entropy,
+            "spawn_key": self.seed_sequence.spawn_key,
+            "spawned": self.seed_sequence.n_children_spawned,
+            "bit_generator": self.rng.bit_generator.state,
+        }
+    
+    def _restore_rng_state(self, state: dict) -> None:
+        """把随机状态推进到缓存条目记录的运行后状态"""
+        self.rng.bit_generator.state = state["bit_generator"]
+        extra = state["spawned"] - self.seed_sequence.n_children_spawned
+        if extra > 0:
+            self.seed_sequence.spawn(extra)
     
     def _sample(self, assumption: Assumption, n: int) -> np.ndarray:
         """
@@ -223,110 +735,960 @@ class MonteCarloSimulator:
             samples = self.rng.lognormal(log_mean, log_std, n)
             return np.clip(samples, assumption.min, assumption.max)
         
+        elif assumption.distribution == "pert" and assumption.max > assumption.min:
+            alpha, beta = distributions.pert_shape(
+                assumption.min, assumption.most_likely, assumption.max, assumption.params.get("lamb", 4.0))
+            return assumption.min + (assumption.max - assumption.min) * self.rng.beta(alpha, beta, n)
+        
         else:
-            raise ValueError(f"未知分布类型: {assumption.distribution}")
+            # 其余分布: 均匀随机数经逆 CDF 变换
+            return self._inverse_cdf(assumption, self.rng.random(n))
+    
+    @staticmethod
+    def _inverse_cdf(assumption: Assumption, u: np.ndarray) -> np.ndarray:
+        """
+        逆 CDF 变换：把 [0, 1) 均匀样本映射为假设的分布 (与 _sample 的分布定义一致)
+        
+        用于拉丁超立方、Sobol 等分层/准随机抽样。
+        """
+        return distributions.inverse_cdf(
+            assumption.distribution, assumption.min, assumption.most_likely, assumption.max,
+            assumption.params, u,
+        )
+    
+    def _unit_sampler(self, sampling: SamplingMethod, d: int) -> Callable[[int], np.ndarray]:
+        """
+        返回生成 (m, d) 单位超立方样本的函数
+        
+        - lhs: 拉丁超立方，每块内每一维的 m 个等概率区间各落一个点
+        - sobol: 加扰 Sobol 序列 (需要 scipy)，跨块连续取点；m 为 2 的幂时均匀性最好
+        """
+        if sampling == "lhs":
+            def draw(m: int) -> np.ndarray:
+                strata = self.rng.permuted(np.tile(np.arange(m), (d, 1)), axis=1).T
+                return (strata + self.rng.random((m, d))) / m
+            return draw
+        
+        if sampling == "sobol":
+            if not QMC_AVAILABLE:
+                raise ImportError("sampling='sobol' 需要 scipy。请安装: pip install scipy")
+            engine = qmc.Sobol(d=d, scramble=True, seed=self.rng)
+            
+            def draw(m: int) -> np.ndarray:
+                with warnings.catch_warnings():
+                    # 非 2 的幂样本量会触发平衡性提示，这里由调用方选择 n
+                    warnings.simplefilter("ignore", UserWarning)
+                    return engine.random(m)
+            return draw
+        
+        raise ValueError(f"未知抽样方式: {sampling}")
+    
+    @staticmethod
+    def _correlation_matrix(
+        names: List[str],
+        correlation: Optional[CorrelationSpec]
+    ) -> Optional[np.ndarray]:
+        """
+        解析相关系数 (Spearman 秩相关) 输入并校验，
+        返回 d×d 正态得分相关矩阵 (无相关时返回 None)
+        
+        Args:
+            names: 假设名列表 (矩阵行列顺序)
+            correlation: {(假设A, 假设B): ρ} 字典，或按 names 顺序的 d×d 矩阵
+        """
+        if correlation is None:
+            return None
+        d = len(names)
+        if isinstance(correlation, dict):
+            matrix = np.eye(d)
+            index = {name: k for k, name in enumerate(names)}
+            for (a, b), rho in correlation.items():
+                if a not in index or b not in index:
+                    raise ValueError(f"相关系数中的假设不存在: ({a}, {b})")
+                if a == b:
+                    raise ValueError(f"不能为同一假设设置相关系数: {a}")
+                matrix[index[a], index[b]] = matrix[index[b], index[a]] = rho
+        else:
+            matrix = np.asarray(correlation, dtype=float)
+            if matrix.shape != (d, d):
+                raise ValueError(f"相关矩阵形状应为 ({d}, {d})，当前为 {matrix.shape}")
+        
+        if not np.allclose(matrix, matrix.T):
+            raise ValueError("相关矩阵必须对称")
+        if not np.allclose(np.diag(matrix), 1.0):
+            raise ValueError("相关矩阵对角线必须为 1")
+        if np.any(np.abs(matrix) > 1):
+            raise ValueError("相关系数必须在 [-1, 1] 范围内")
+        try:
+            np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError:
+            raise ValueError("相关矩阵不是正定矩阵，请检查相关系数是否互相矛盾")
+        
+        if np.allclose(matrix, np.eye(d)):
+            return None
+        # Spearman 秩相关 → 正态得分的 Pearson 相关 (高斯 copula 关系式)
+        matrix = 2 * np.sin(np.pi * matrix / 6)
+        try:
+            np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError:
+            raise ValueError("相关矩阵换算为正态得分相关后不是正定矩阵，请适当减小相关系数")
+        return matrix
+    
+    def _induce_correlation(
+        self,
+        samples: Dict[str, np.ndarray],
+        names: List[str],
+        target: np.ndarray
+    ) -> None:
+        """
+        Iman-Conover 方法：重排各列样本的顺序，使秩相关接近目标矩阵
+        
+        只改变样本的配对方式，不改变任何一列的边际分布。
+        只有出现在非零相关系数中的列参与重排，代价约 O(m·d² + d·m log m)。
+        """
+        m = len(samples[names[0]])
+        if m < 3:
+            return
+        involved = np.flatnonzero(np.any(target - np.eye(len(names)) != 0, axis=1))
+        sub_target = target[np.ix_(involved, involved)]
+        d = len(involved)
+        
+        # van der Waerden 正态得分，每个假设一行，各行独立随机打乱
+        scores = distributions.norm_ppf(np.arange(1, m + 1) / (m + 1))
+        scores /= scores.std()
+        score_rows = self.rng.permuted(np.tile(scores, (d, 1)), axis=1)
+        
+        # 先消除得分自身的样本相关 (Q)，再施加目标相关 (P)：T = P · Q⁻¹ · S
+        try:
+            q = np.linalg.cholesky(np.corrcoef(score_rows))
+        except np.linalg.LinAlgError:
+            q = np.eye(d)
+        p = np.linalg.cholesky(sub_target)
+        transformed = (p @ np.linalg.inv(q)) @ score_rows
+        del score_rows
+        
+        # 按变换后得分的秩重排各列样本
+        for row, k in enumerate(involved):
+            name = names[k]
+            reordered = np.empty_like(samples[name])
+            reordered[np.argsort(transformed[row])] = np.sort(samples[name])
+            samples[name] = reordered
     
     def run(
         self,
         assumptions: Dict[str, Assumption],
-        formula: Callable[..., float],
+        formula: Union[Callable[..., float], str, Expression],
         n_simulations: int = 10000,
         unit: str = "元",
-        run_sensitivity: bool = True
+        run_sensitivity: bool = True,
+        vectorize: Optional[bool] = None,
+        run_sobol: bool = False,
+        sobol_samples: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        keep_raw: bool = True,
+        n_workers: Optional[int] = 1,
+        sampling: SamplingMethod = "random",
+        correlation: Optional[CorrelationSpec] = None,
+        dtype: PrecisionType = "float64",
+        keep_samples: bool = False,
+        convert_units: bool = False,
+        fx: Any = None
     ) -> MonteCarloResult:
         """
         执行 Monte Carlo 模拟
         
         Args:
             assumptions: 假设字典 {假设名: Assumption}
-            formula: 计算公式函数，参数名需与假设名对应
+            formula: 计算公式函数，参数名需与假设名对应；
+                也可以是表达式字符串 / Expression (如 "ka_vol*ka_price")，编译一次后向量化求值
             n_simulations: 模拟次数
             unit: 结果单位
             run_sensitivity: 是否执行敏感性分析
+            vectorize: 向量化求值模式
+                - None (默认): 先把整列样本数组传给 formula，失败时自动回退逐次循环
+                - True: 强制向量化，formula 不支持数组时抛出 ValueError
+                - False: 逐次循环调用 formula (旧行为)
+            run_sobol: 是否计算 Sobol 全局敏感性指数 (复用本次样本，
+                额外求值 d × n/2 次，d 为假设个数)
+            sobol_samples: Sobol 估计使用的基础样本行数上限 (默认 n/2)
+            chunk_size: 分块大小；设置后按块抽样、求值，只保留当前块的样本
+            keep_raw: 是否保留全部原始结果。False 时改用在线矩 + t-digest
+                分位数草图，峰值内存只取决于 chunk_size，与 n_simulations 无关
+            n_workers: 并行进程数 (默认 1 = 单进程；None = CPU 核数)。
+                多进程时各进程使用 SeedSequence.spawn 派生的子随机流，
+                同一 seed 与进程数下结果逐位可复现 (与单进程结果不同)
+            sampling: 抽样方式
+                - "random" (默认): 伪随机抽样
+                - "lhs": 拉丁超立方抽样，经各分布逆 CDF 变换
+                - "sobol": 加扰 Sobol 准随机序列 (需要 scipy)，经逆 CDF 变换
+                分层/准随机抽样达到相同置信区间宽度所需的模拟次数通常少得多
+            correlation: 假设间的秩相关系数，{("ka_vol", "ka_price"): -0.5} 形式的字典，
+                或按 assumptions 顺序的 d×d 矩阵。使用 Iman-Conover 方法在每块样本上
+                一次性重排，保持各假设的边际分布不变
+            dtype: 样本与结果的精度
+                - "float64" (默认): 双精度
+                - "float32": 单精度抽样与求值，样本与结果内存减半；
+                  统计量仍以 float64 累加，分位数相对漂移通常远小于 1e-6。
+                  与 chunk_size 搭配时峰值内存约为 chunk_size × (假设数 + 1) × 4 字节
+            keep_samples: 是否在结果中保留输入样本 (result.samples)，
+                便于 save_draws 一并保存。需要 keep_raw=True
+            convert_units: 按各假设的 unit 把输入换算到基础单位、推断结果单位并换算到 unit
+                (如价格以 "元" 标注、unit="亿元" 时结果自动乘 1e-8)。单位只在模拟前解析一次，
+                量纲不一致 (如元与美元相加) 时抛出 UnitError；未标注单位的假设视为无量纲
+            fx: convert_units 时的汇率 (数字或 fx.FXTable)；外币假设先换算为 unit 的币种
             
         Returns:
             MonteCarloResult: 模拟结果
         """
-        # 生成所有假设的样本
-        samples = {}
-        for name, assumption in assumptions.items():
-            samples[name] = self._sample(assumption, n_simulations)
+        formula = compile_formula(formula)
+        if convert_units:
+            formula = _scale_formula(formula, *resolve_units(formula, assumptions, unit, fx))
+        block_size = n_simulations if chunk_size is None else max(1, int(chunk_size))
+        dtype = self._precision_dtype(dtype)
+        if keep_samples and not keep_raw:
+            raise ValueError("keep_samples=True 需要 keep_raw=True")
+        correlation_matrix = self._correlation_matrix(list(assumptions), correlation)
+        if correlation_matrix is not None and run_sobol:
+            warnings.warn("Sobol 指数假设输入相互独立，存在相关假设时结果仅供参考")
+        options = dict(
+            block_size=block_size,
+            keep_raw=keep_raw,
+            run_sobol=run_sobol,
+            sobol_budget=sobol_samples,
+            vectorize=vectorize,
+            sampling=sampling,
+            correlation=correlation_matrix,
+            dtype=dtype,
+            keep_samples=keep_samples,
+        )
         
-        # 计算每次模拟的结果
-        results = np.zeros(n_simulations)
-        for i in range(n_simulations):
-            kwargs = {name: values[i] for name, values in samples.items()}
-            results[i] = formula(**kwargs)
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        n_workers = max(1, min(int(n_workers), n_simulations))
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(
+                assumptions, formula, self._rng_state(),
+                dict(options, n_simulations=n_simulations, unit=unit,
+                     run_sensitivity=run_sensitivity, n_workers=n_workers),
+            )
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                result, state = cached
+                self._restore_rng_state(state)
+                return result
+        
+        if n_workers == 1:
+            partial = self._simulate_blocks(assumptions, formula, n_simulations, **options)
+        else:
+            partial = self._simulate_parallel(assumptions, formula, n_simulations, n_workers, options)
         
         # 敏感性分析
-        sensitivity = {}
+        sensitivity, sensitivity_detail = {}, {}
         if run_sensitivity:
-            sensitivity = self._sensitivity_analysis(assumptions, formula)
+            sensitivity, sensitivity_detail = self._sensitivity_analysis(assumptions, formula, vectorize)
         
-        return MonteCarloResult(
-            mean=float(np.mean(results)),
-            median=float(np.median(results)),
-            std=float(np.std(results)),
-            p5=float(np.percentile(results, 5)),
-            p10=float(np.percentile(results, 10)),
-            p25=float(np.percentile(results, 25)),
-            p75=float(np.percentile(results, 75)),
-            p90=float(np.percentile(results, 90)),
-            p95=float(np.percentile(results, 95)),
-            min=float(np.min(results)),
-            max=float(np.max(results)),
+        result = self._summarize(
+            partial.raw(), partial.moments, partial.digest,
             n_simulations=n_simulations,
-            raw_results=results,
             sensitivity=sensitivity,
             unit=unit,
+            sensitivity_detail=sensitivity_detail,
+            sobol=partial.sobol.indices() if partial.sobol is not None else {},
+            samples=partial.samples(),
         )
+        if cache_key:
+            self.cache.put(cache_key, result, self._rng_state())
+        return result
     
-    def _sensitivity_analysis(
+    def run_incremental(
         self,
         assumptions: Dict[str, Assumption],
-        formula: Callable[..., float]
-    ) -> Dict[str, float]:
+        formula: Union[Callable[..., float], str, Expression],
+        n_simulations: int = 10000,
+        unit: str = "元",
+        run_sensitivity: bool = True,
+        vectorize: Optional[bool] = None,
+        sampling: SamplingMethod = "random",
+        dtype: PrecisionType = "float64"
+    ) -> "IncrementalSession":
         """
-        敏感性分析：计算每个假设变化对结果的影响
+        增量模拟：首次完整模拟，之后修改个别假设时只重算受影响的部分
         
-        原理：将每个假设从 most_likely 变化到 max，计算结果变化百分比
+        适合研讨会上反复调整某个假设 (如 som_share) 的场景:
+        - 保留每个假设的均匀随机数列，修改假设时只对该列重新做逆 CDF 变换
+          (公共随机数：结果变化只来自假设修改，不含抽样噪声)；也可选择重新抽取
+        - 表达式公式 (字符串 / Expression) 缓存子表达式，只重算依赖被修改假设的部分
+        
+        不支持相关假设与多进程。额外内存约为 n × (假设数 + 表达式节点数) × 8 字节。
+        
+        Args:
+            assumptions / formula / n_simulations / unit / run_sensitivity /
+            vectorize / sampling / dtype: 见 run()
+            
+        Returns:
+            IncrementalSession: session.result 为首次结果，session.update(...) 返回新结果
+            
+        Example:
+            >>> session = sim.run_incremental(assumptions, "tam * sam_ratio * som_share", 1_000_000)
+            >>> result = session.update(som_share=Assumption(min=0.05, max=0.15))
         """
-        sensitivity = {}
+        return IncrementalSession(
+            self, assumptions, compile_formula(formula), n_simulations, unit,
+            run_sensitivity, vectorize, sampling, self._precision_dtype(dtype),
+        )
+    
+    def run_paths(
+        self,
+        base: Union[Assumption, float],
+        growth: Union[Assumption, List[Assumption]],
+        years: int,
+        n_simulations: int = 10000,
+        autocorrelation: float = 0.0,
+        start_year: int = 0,
+        percentiles: Tuple[float, ...] = (5, 10, 25, 50, 75, 90, 95),
+        unit: str = "元",
+        keep_paths: bool = True,
+        dtype: PrecisionType = "float64"
+    ) -> PathSimulationResult:
+        """
+        多年增长路径模拟：每条路径逐年抽取增长率，输出逐年的扇形图分位数
         
-        # 基准值：所有假设使用 most_likely
-        base_kwargs = {name: a.most_likely for name, a in assumptions.items()}
-        base_result = formula(**base_kwargs)
+        value[t] = value[t-1] × (1 + g[t])，g[t] 的边际分布为 growth (按年给出列表时逐年不同)。
+        年增长率之间的相关通过高斯 copula 上的 AR(1) 过程引入:
+            z[t] = ρ·z[t-1] + √(1-ρ²)·ε[t],  g[t] = F⁻¹(Φ(z[t]))
+        ρ = 0 为逐年独立，ρ → 1 时每条路径接近恒定 CAGR；边际分布不受 ρ 影响。
         
-        if base_result == 0:
-            return sensitivity
-        
-        # 每个假设单独变化
-        for name, assumption in assumptions.items():
-            # 从 most_likely 变化到 max
-            test_kwargs = base_kwargs.copy()
-            test_kwargs[name] = assumption.max
-            high_result = formula(**test_kwargs)
+        全部按列向量化，循环只在年份上，10 年 × 100 万条路径约数秒。
+        
+        Args:
+            base: 基准年规模 (Assumption 或确定值)
+            growth: 年增长率假设，或长度为 years 的逐年假设列表
+            years: 预测年数 (路径矩阵为 n_simulations × (years + 1)，第 0 列为基准年)
+            n_simulations: 路径数
+            autocorrelation: 年增长率的自相关系数 ρ (0 ≤ ρ ≤ 1)
+            start_year: 基准年份 (如 2024)，用于标注 years
+            percentiles: 扇形图分位数
+            unit: 单位
+            keep_paths: 是否保留完整路径矩阵 (False 时只保留逐年分位数)
+            dtype: 路径矩阵精度，见 run()
+            
+        Example:
+            >>> fan = sim.run_paths(
+            ...     base=Assumption(min=180, most_likely=210, max=250),
+            ...     growth=Assumption.truncnormal(mean=0.22, std=0.08, min=-0.1, max=0.6),
+            ...     years=6, start_year=2024, autocorrelation=0.6, n_simulations=1_000_000,
+            ... )
+            >>> data.growth_forecast = fan.to_growth_forecast(sam_ratio=0.8)
+        """
+        if years < 1:
+            raise ValueError(f"years 必须 ≥ 1，当前为: {years}")
+        if not 0 <= autocorrelation <= 1:
+            raise ValueError(f"autocorrelation 必须在 [0, 1] 范围内，当前为: {autocorrelation}")
+        growth_by_year = list(growth) if isinstance(growth, (list, tuple)) else [growth] * years
+        if len(growth_by_year) != years:
+            raise ValueError(f"逐年增长率假设个数 ({len(growth_by_year)}) 与 years ({years}) 不一致")
+        
+        dtype = self._precision_dtype(dtype)
+        n = n_simulations
+        if isinstance(base, Assumption):
+            level = self._sample(base, n).astype(np.float64)
+        else:
+            level = np.full(n, float(base))
+        start = level.copy()
+        
+        paths = np.empty((n, years + 1), dtype=dtype) if keep_paths else None
+        fan = {f"p{p:g}": [] for p in percentiles}
+        mean = []
+        
+        def record(t: int, values: np.ndarray) -> None:
+            if paths is not None:
+                paths[:, t] = values
+            for key, q in zip(fan, np.percentile(values, percentiles)):
+                fan[key].append(float(q))
+            mean.append(float(values.mean()))
+        
+        record(0, level)
+        z = self.rng.standard_normal(n)
+        innovation_scale = math.sqrt(1 - autocorrelation ** 2)
+        for t, assumption in enumerate(growth_by_year, start=1):
+            if t > 1:
+                z *= autocorrelation
+                z += innovation_scale * self.rng.standard_normal(n)
+            g = self._inverse_cdf(assumption, distributions.norm_cdf(z))
+            level *= 1 + g
+            record(t, level)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            realized = np.power(level / start, 1 / years) - 1
+        realized = realized[np.isfinite(realized)]
+        cagr = {"mean": float(realized.mean())}
+        cagr.update({f"p{p}": float(q) for p, q in zip((5, 50, 95), np.percentile(realized, (5, 50, 95)))})
+        
+        return PathSimulationResult(
+            years=[start_year + t for t in range(years + 1)],
+            mean=mean,
+            fan=fan,
+            cagr=cagr,
+            n_simulations=n,
+            autocorrelation=autocorrelation,
+            unit=unit,
+            paths=paths,
+        )
+    
+    def _simulate_blocks(
+        self,
+        assumptions: Dict[str, Assumption],
+        formula: Callable[..., float],
+        n: int,
+        block_size: int,
+        keep_raw: bool,
+        run_sobol: bool,
+        sobol_budget: Optional[int],
+        vectorize: Optional[bool],
+        sampling: SamplingMethod = "random",
+        correlation: Optional[np.ndarray] = None,
+        dtype: np.dtype = np.dtype(np.float64),
+        keep_samples: bool = False
+    ) -> _SimulationPartial:
+        """
+        按块抽样、求值 n 次，返回部分统计量
+        
+        每个假设的样本抽取后立即转换为 dtype (峰值只多出一列 float64)；
+        不需要计算 Sobol 指数、也不保留样本时，本块样本在本块求值后整体释放。
+        向量化公式一次调用需要同时拿到所有假设的整列样本，无法逐列提前释放，
+        因此样本内存的上限按块计: block_size × 假设数 × dtype 字节 (即 chunk_size 控制峰值)。
+        """
+        partial = _SimulationPartial(list(assumptions), keep_raw, run_sobol, keep_samples)
+        unit_sampler = None if sampling == "random" else self._unit_sampler(sampling, len(assumptions))
+        
+        done = 0
+        while done < n:
+            m = min(block_size, n - done)
             
-            # 从 most_likely 变化到 min
-            test_kwargs[name] = assumption.min
-            low_result = formula(**test_kwargs)
+            # 生成本块所有假设的样本
+            samples = {}
+            if unit_sampler is None:
+                for name, assumption in assumptions.items():
+                    samples[name] = self._sample(assumption, m).astype(dtype, copy=False)
+            else:
+                u = unit_sampler(m)
+                for k, (name, assumption) in enumerate(assumptions.items()):
+                    samples[name] = self._inverse_cdf(assumption, u[:, k]).astype(dtype, copy=False)
+                del u
+            if correlation is not None:
+                self._induce_correlation(samples, list(assumptions), correlation)
             
-            # 计算变化幅度 (取变化较大的那个)
-            high_change = (high_result - base_result) / base_result * 100
-            low_change = (low_result - base_result) / base_result * 100
+            # 计算本块每次模拟的结果
+            results = self._evaluate(formula, samples, m, vectorize, dtype)
+            if keep_samples:
+                partial.add_samples(samples)
+            if partial.sobol is None:
+                samples.clear()
+            partial.add_block(results)
             
-            # 取绝对值较大的变化
-            if abs(high_change) >= abs(low_change):
-                sensitivity[name] = high_change
+            # Sobol 全局敏感性: 本块样本前半为 A，后半为 B，f(A)、f(B) 直接复用
+            if partial.sobol is not None and (sobol_budget is None or sobol_budget > 0):
+                before = partial.sobol.count
+                self._sobol_update(partial.sobol, formula, samples, results, sobol_budget, vectorize,
+                                   shuffle_b=unit_sampler is not None)
+                if sobol_budget is not None:
+                    sobol_budget -= partial.sobol.count - before
+            
+            del samples, results
+            done += m
+        
+        return partial
+    
+    def _simulate_parallel(
+        self,
+        assumptions: Dict[str, Assumption],
+        formula: Callable[..., float],
+        n: int,
+        n_workers: int,
+        options: dict
+    ) -> _SimulationPartial:
+        """
+        多进程模拟：n 次模拟均分给各进程，每个进程使用 SeedSequence.spawn
+        派生的独立随机流，部分统计量按进程顺序合并。
+        同一 seed + 同一 n_workers 的结果逐位可复现。
+        """
+        sizes = [n // n_workers + (1 if i < n % n_workers else 0) for i in range(n_workers)]
+        child_seeds = self.seed_sequence.spawn(n_workers)
+        
+        worker_options = dict(options)
+        if options["sobol_budget"] is not None:
+            worker_options["sobol_budget"] = -(-options["sobol_budget"] // n_workers)
+        
+        # lambda 等无法 pickle 的 formula 借助 fork 继承；否则使用默认启动方式
+        context = None
+        try:
+            pickle.dumps(formula)
+        except Exception:
+            if "fork" not in multiprocessing.get_all_start_methods():
+                raise ValueError("当前平台不支持 fork，多进程模式要求 formula 可被 pickle (请使用模块级函数)")
+            context = multiprocessing.get_context("fork")
+        
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(formula,),
+        ) as pool:
+            futures = [
+                pool.submit(_run_worker, seed, assumptions, size, worker_options)
+                for seed, size in zip(child_seeds, sizes)
+            ]
+            partials = [f.result() for f in futures]
+        
+        merged = partials[0]
+        for other in partials[1:]:
+            merged.merge(other)
+        return merged
+    
+    def run_adaptive(
+        self,
+        assumptions: Dict[str, Assumption],
+        formula: Union[Callable[..., float], str, Expression],
+        rel_tol: float = 0.005,
+        percentiles: Tuple[float, ...] = (5, 95),
+        percentile_tol: float = 0.01,
+        batch_size: int = 10000,
+        max_simulations: int = 10_000_000,
+        time_budget: Optional[float] = None,
+        unit: str = "元",
+        run_sensitivity: bool = True,
+        vectorize: Optional[bool] = None,
+        sampling: SamplingMethod = "random",
+        correlation: Optional[CorrelationSpec] = None,
+        n_bootstrap: int = 200,
+        dtype: PrecisionType = "float64"
+    ) -> MonteCarloResult:
+        """
+        自适应 Monte Carlo：分批模拟，直到达到目标精度或时间预算
+        
+        每批结束后检查:
+        - 均值的 95% 置信区间相对半宽 1.96·σ/√n/|均值| ≤ rel_tol
+        - 指定分位数的 bootstrap 95% 置信区间相对半宽 ≤ percentile_tol
+          (次序统计量 bootstrap：重抽样分位数的位置服从 Beta 分布，
+           只需对已排序结果插值，不必重复重抽全部样本)
+        
+        批量按已完成次数的一半递增 (至少 batch_size)，精度检查次数约为 log 级别。
+        
+        Args:
+            assumptions: 假设字典
+            formula: 计算公式函数
+            rel_tol: 均值的目标相对精度 (95% CI 半宽 / 均值)
+            percentiles: 需要达到精度的分位数 (0-100)
+            percentile_tol: 分位数的目标相对精度 (bootstrap 95% CI 半宽 / 分位数)
+            batch_size: 首批及最小批量
+            max_simulations: 模拟次数上限
+            time_budget: 时间预算 (秒)，超时后在当前批结束时停止
+            unit: 结果单位
+            run_sensitivity: 是否执行敏感性分析
+            vectorize / sampling / correlation / dtype: 见 run()
+            n_bootstrap: 分位数 bootstrap 次数
+            
+        Returns:
+            MonteCarloResult: n_simulations 为实际模拟次数，
+            convergence 记录实际精度、是否收敛与停止原因
+        """
+        start = time.perf_counter()
+        formula = compile_formula(formula)
+        names = list(assumptions)
+        correlation_matrix = self._correlation_matrix(names, correlation)
+        options = dict(
+            keep_raw=True,
+            run_sobol=False,
+            sobol_budget=None,
+            vectorize=vectorize,
+            sampling=sampling,
+            correlation=correlation_matrix,
+            dtype=self._precision_dtype(dtype),
+        )
+        
+        partial = _SimulationPartial(names, keep_raw=True, run_sobol=False)
+        total = 0
+        batches = 0
+        while True:
+            m = min(max(batch_size, total // 2), max_simulations - total)
+            partial.merge(self._simulate_blocks(assumptions, formula, m, block_size=m, **options))
+            total += m
+            batches += 1
+            
+            raw = partial.raw()
+            partial.raw_blocks = [raw]
+            precision = self._precision(raw, percentiles, n_bootstrap)
+            converged = (
+                precision["mean_rel_halfwidth"] <= rel_tol
+                and all(w <= percentile_tol for w in precision["percentile_rel_halfwidth"].values())
+            )
+            elapsed = time.perf_counter() - start
+            
+            if converged:
+                stop_reason = "tolerance"
+            elif total >= max_simulations:
+                stop_reason = "max_simulations"
+            elif time_budget is not None and elapsed >= time_budget:
+                stop_reason = "time_budget"
             else:
-                sensitivity[name] = low_change
+                continue
+            break
+        
+        sensitivity, sensitivity_detail = {}, {}
+        if run_sensitivity:
+            sensitivity, sensitivity_detail = self._sensitivity_analysis(assumptions, formula, vectorize)
+        
+        return self._summarize(
+            raw, partial.moments, None,
+            n_simulations=total,
+            sensitivity=sensitivity,
+            unit=unit,
+            sensitivity_detail=sensitivity_detail,
+            convergence={
+                "converged": converged,
+                "stop_reason": stop_reason,
+                "rel_tol": rel_tol,
+                "percentile_tol": percentile_tol,
+                "elapsed_seconds": time.perf_counter() - start,
+                "batches": batches,
+                **precision,
+            },
+        )
+    
+    def _precision(
+        self,
+        raw: np.ndarray,
+        percentiles: Tuple[float, ...],
+        n_bootstrap: int
+    ) -> Dict[str, object]:
+        """
+        估计当前结果的精度：均值的相对 CI 半宽与各分位数的 bootstrap 相对 CI 半宽
+        """
+        n = len(raw)
+        mean = float(np.mean(raw))
+        se = float(np.std(raw)) / math.sqrt(n)
+        mean_width = 1.96 * se / abs(mean) if mean != 0 else (0.0 if se == 0 else math.inf)
+        
+        ordered = np.sort(raw)
+        widths = {}
+        for p in percentiles:
+            # 重抽样中第 k 个次序统计量对应的原样本分位位置 ~ Beta(k, n - k + 1)
+            k = min(max(int(round(p / 100 * n)), 1), n)
+            positions = self.rng.beta(k, n - k + 1, n_bootstrap)
+            boot = np.quantile(ordered, positions)
+            estimate = float(np.quantile(ordered, p / 100))
+            lo, hi = np.percentile(boot, [2.5, 97.5])
+            half = (hi - lo) / 2
+            widths[f"p{p:g}"] = float(half / abs(estimate)) if estimate != 0 else (0.0 if half == 0 else math.inf)
         
-        return sensitivity
+        return {"mean_rel_halfwidth": mean_width, "percentile_rel_halfwidth": widths}
+    
+    @staticmethod
+    def _precision_dtype(dtype: PrecisionType) -> np.dtype:
+        """校验并转换 dtype 参数"""
+        resolved = np.dtype(dtype)
+        if resolved not in (np.float32, np.float64):
+            raise ValueError(f"dtype 只支持 float64 / float32，当前为: {dtype}")
+        return resolved
+    
+    @staticmethod
+    def _summarize(
+        raw: Optional[np.ndarray],
+        moments: RunningMoments,
+        digest: Optional[TDigest],
+        **fields
+    ) -> MonteCarloResult:
+        """
+        汇总统计量：有原始结果时精确计算，否则使用在线矩 + 分位数草图
+        """
+        if raw is not None:
+            p5, p10, p25, p50, p75, p90, p95 = np.percentile(raw, [5, 10, 25, 50, 75, 90, 95])
+            return MonteCarloResult(
+                mean=float(np.mean(raw, dtype=np.float64)),
+                median=float(p50),
+                std=float(np.std(raw, dtype=np.float64)),
+                p5=float(p5),
+                p10=float(p10),
+                p25=float(p25),
+                p75=float(p75),
+                p90=float(p90),
+                p95=float(p95),
+                min=float(np.min(raw)),
+                max=float(np.max(raw)),
+                raw_results=raw,
+                **fields,
+            )
+        
+        p5, p10, p25, p50, p75, p90, p95 = digest.percentile(np.array([5, 10, 25, 50, 75, 90, 95]))
+        return MonteCarloResult(
+            mean=moments.mean,
+            median=float(p50),
+            std=moments.std,
+            p5=float(p5),
+            p10=float(p10),
+            p25=float(p25),
+            p75=float(p75),
+            p90=float(p90),
+            p95=float(p95),
+            min=moments.min,
+            max=moments.max,
+            raw_results=None,
+            quantile_sketch=digest,
+            **fields,
+        )
+    
+    def _evaluate(
+        self,
+        formula: Callable[..., float],
+        samples: Dict[str, np.ndarray],
+        n: int,
+        vectorize: Optional[bool] = None,
+        dtype: np.dtype = np.dtype(np.float64)
+    ) -> np.ndarray:
+        """
+        对样本求值，优先整列向量化调用 formula
+        
+        向量化结果会在首、尾与中间共 _PROBE_POINTS 个均匀分布的位置做标量探测比对
+        (固定位置，不消耗随机数)。形状不对、抛出异常 (如 math.log、if 分支)
+        或任一位置与逐次结果不一致时回退到循环，保证与逐次调用的结果一致。
+        
+        Args:
+            formula: 计算公式函数
+            samples: 样本字典 {假设名: 长度为 n 的数组}
+            n: 样本数量
+            vectorize: 见 run() 的同名参数
+            dtype: 结果精度 (单精度时探测比对放宽到 1e-5)
+        """
+        if vectorize is not False and n > 0:
+            results = None
+            rtol = 1e-12 if dtype == np.float64 else 1e-5
+            try:
+                out = np.asarray(formula(**samples), dtype=dtype)
+                if out.ndim == 0:
+                    out = np.full(n, float(out), dtype=dtype)
+                if out.shape == (n,):
+                    positions = np.unique(np.linspace(0, n - 1, _PROBE_POINTS).astype(np.int64))
+                    probe = [float(formula(**{name: values[i] for name, values in samples.items()}))
+                             for i in positions]
+                    if np.allclose(out[positions], probe, rtol=rtol, atol=0.0, equal_nan=True):
+                        results = out
+            except Exception:
+                results = None
+            
+            if results is not None:
+                return results
+            if vectorize:
+                raise ValueError("formula 不支持数组输入，无法向量化求值；请设置 vectorize=None 或 False")
+        
+        results = np.zeros(n, dtype=dtype)
+        for i in range(n):
+            kwargs = {name: values[i] for name, values in samples.items()}
+            results[i] = formula(**kwargs)
+        return results
+    
+    def sobol_analysis(
+        self,
+        assumptions: Dict[str, Assumption],
+        formula: Union[Callable[..., float], str, Expression],
+        n_samples: int = 10000,
+        vectorize: Optional[bool] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        独立执行 Sobol 全局敏感性分析 (不依赖 run())
+        
+        共求值 (d + 2) × n_samples 次，d 为假设个数。
+        
+        Args:
+            assumptions: 假设字典
+            formula: 计算公式函数
+            n_samples: 基础样本行数 (A、B 矩阵各 n_samples 行)
+            vectorize: 见 run() 的同名参数
+            
+        Returns:
+            {假设名: {"S1": 一阶指数, "ST": 总效应指数}}
+        """
+        formula = compile_formula(formula)
+        samples = {name: self._sample(a, 2 * n_samples) for name, a in assumptions.items()}
+        results = self._evaluate(formula, samples, 2 * n_samples, vectorize)
+        accumulator = _SobolAccumulator(list(assumptions))
+        self._sobol_update(accumulator, formula, samples, results, None, vectorize)
+        return accumulator.indices()
+    
+    def _sobol_update(
+        self,
+        accumulator: _SobolAccumulator,
+        formula: Callable[..., float],
+        samples: Dict[str, np.ndarray],
+        results: np.ndarray,
+        limit: Optional[int],
+        vectorize: Optional[bool],
+        shuffle_b: bool = False
+    ) -> None:
+        """
+        用已抽取的样本与结果更新 Sobol 累加器
+        
+        前 m 行作为 A、随后 m 行作为 B，每个假设构造一次 AB_i 并整批求值。
+        """
+        m = len(results) // 2
+        if limit is not None:
+            m = min(m, limit)
+        if m == 0:
+            return
+        block_a = {name: values[:m] for name, values in samples.items()}
+        block_b = {name: values[m:2 * m] for name, values in samples.items()}
+        f_b = results[m:2 * m]
+        if shuffle_b:
+            # 分层/准随机样本的前后两半存在结构相关，打乱 B 的行顺序使 A、B 独立
+            order = self.rng.permutation(m)
+            block_b = {name: values[order] for name, values in block_b.items()}
+            f_b = f_b[order]
+        f_ab = []
+        for name in accumulator.names:
+            mixed = dict(block_a)
+            mixed[name] = block_b[name]
+            f_ab.append(self._evaluate(formula, mixed, m, vectorize))
+        accumulator.update(results[:m], f_b, f_ab)
+    
+    def _sensitivity_analysis(
+        self,
+        assumptions: Dict[str, Assumption],
+        formula: Callable[..., float],
+        vectorize: Optional[bool] = None
+    ) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+        """
+        敏感性分析：计算每个假设变化对结果的影响
+        
+        原理：所有假设取 most_likely 作为基准，每个假设单独变化到 min / max，
+        计算结果变化百分比。全部 2N+1 组扰动堆叠成一个矩阵，一次批量求值。
+        
+        Returns:
+            (sensitivity, sensitivity_detail)
+            - sensitivity: {假设名: 绝对值较大一侧的变化%} (兼容旧版 Tornado)
+            - sensitivity_detail: {假设名: {"low": 取 min 时变化%, "high": 取 max 时变化%}}
+        """
+        names = list(assumptions)
+        n_rows = 2 * len(names) + 1
+        
+        # 第 0 行为基准，第 2k+1 / 2k+2 行分别把第 k 个假设设为 min / max
+        matrix = np.array([assumptions[name].most_likely for name in names], dtype=float)
+        matrix = np.tile(matrix, (n_rows, 1))
+        for k, name in enumerate(names):
+            matrix[2 * k + 1, k] = assumptions[name].min
+            matrix[2 * k + 2, k] = assumptions[name].max
+        
+        columns = {name: matrix[:, k] for k, name in enumerate(names)}
+        outputs = self._evaluate(formula, columns, n_rows, vectorize)
+        
+        base_result = outputs[0]
+        if base_result == 0:
+            return {}, {}
+        
+        changes = (outputs[1:] - base_result) / base_result * 100
+        sensitivity = {}
+        sensitivity_detail = {}
+        for k, name in enumerate(names):
+            low_change = float(changes[2 * k])
+            high_change = float(changes[2 * k + 1])
+            sensitivity_detail[name] = {"low": low_change, "high": high_change}
+            # 取绝对值较大的变化
+            sensitivity[name] = high_change if abs(high_change) >= abs(low_change) else low_change
+        
+        return sensitivity, sensitivity_detail
+
+
+class IncrementalSession:
+    """
+    增量模拟会话 (由 MonteCarloSimulator.run_incremental 创建)
+    
+    Attributes:
+        assumptions: 当前假设字典 (update 后同步更新)
+        result: 最近一次的模拟结果
+    """
+    
+    def __init__(
+        self,
+        simulator: MonteCarloSimulator,
+        assumptions: Dict[str, Assumption],
+        formula: Callable[..., float],
+        n_simulations: int,
+        unit: str,
+        run_sensitivity: bool,
+        vectorize: Optional[bool],
+        sampling: SamplingMethod,
+        dtype: np.dtype
+    ):
+        self.simulator = simulator
+        self.assumptions = dict(assumptions)
+        self.formula = formula
+        self.n_simulations = n_simulations
+        self.unit = unit
+        self.run_sensitivity = run_sensitivity
+        self.vectorize = vectorize
+        self.dtype = dtype
+        self._evaluator = CachedEvaluator(formula) if isinstance(formula, Expression) else None
+        
+        names = list(self.assumptions)
+        if sampling == "random":
+            u = simulator.rng.random((n_simulations, len(names)))
+        else:
+            u = simulator._unit_sampler(sampling, len(names))(n_simulations)
+        self._uniforms = {name: np.ascontiguousarray(u[:, k]) for k, name in enumerate(names)}
+        del u
+        self._samples = {name: self._transform(name) for name in names}
+        self.result = self._compute(changed=None)
+    
+    def _transform(self, name: str) -> np.ndarray:
+        """均匀随机数 → 假设分布的样本"""
+        values = MonteCarloSimulator._inverse_cdf(self.assumptions[name], self._uniforms[name])
+        return values.astype(self.dtype, copy=False)
+    
+    def update(self, redraw: bool = False, **changes: Assumption) -> MonteCarloResult:
+        """
+        修改一个或多个假设并返回新结果
+        
+        Args:
+            redraw: False (默认) 复用该假设原有的均匀随机数 (公共随机数)；
+                True 时为被修改的假设重新抽取随机数
+            **changes: {假设名: 新的 Assumption}
+        """
+        unknown = [name for name in changes if name not in self.assumptions]
+        if unknown:
+            raise KeyError(f"未知假设: {', '.join(unknown)}，可选: {', '.join(self.assumptions)}")
+        for name, assumption in changes.items():
+            self.assumptions[name] = assumption
+            if redraw:
+                self._uniforms[name] = self.simulator.rng.random(self.n_simulations)
+            self._samples[name] = self._transform(name)
+        self.result = self._compute(changed=set(changes))
+        return self.result
+    
+    def _compute(self, changed: Optional[set]) -> MonteCarloResult:
+        sim, n = self.simulator, self.n_simulations
+        if self._evaluator is not None:
+            results = np.asarray(self._evaluator.evaluate(self._samples, changed), dtype=self.dtype)
+            if results.ndim == 0:
+                results = np.full(n, float(results), dtype=self.dtype)
+        else:
+            results = sim._evaluate(self.formula, self._samples, n, self.vectorize, self.dtype)
+        
+        sensitivity, sensitivity_detail = {}, {}
+        if self.run_sensitivity:
+            sensitivity, sensitivity_detail = sim._sensitivity_analysis(self.assumptions, self.formula, self.vectorize)
+        
+        return sim._summarize(
+            results, RunningMoments(), None,
+            n_simulations=n,
+            sensitivity=sensitivity,
+            unit=self.unit,
+            sensitivity_detail=sensitivity_detail,
+        )
 
 
 def quick_monte_carlo(
     assumptions: Dict[str, Tuple[float, float, float]],
-    formula: Callable[..., float],
+    formula: Union[Callable[..., float], str, Expression],
     n: int = 10000,
     unit: str = "元"
 ) -> MonteCarloResult:
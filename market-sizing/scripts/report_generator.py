@@ -26,7 +26,7 @@ import json
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 
 # 尝试导入可视化库
 PLOTLY_AVAILABLE = False
@@ -49,6 +49,27 @@ try:
 except ImportError:
     pass
 
+try:
+    from .formula_expr import Expression, ExpressionError
+    from .segment_model import MarketModel
+    from .units import conversion_factor, format_number
+except ImportError:
+    from formula_expr import Expression, ExpressionError
+    from segment_model import MarketModel
+    from units import conversion_factor, format_number
+
+# 尝试导入 Monte Carlo 模块 (读取已保存的抽样结果，重绘分布图；需要 numpy)
+DRAWS_AVAILABLE = False
+try:
+    try:
+        from .monte_carlo import MonteCarloResult
+    except ImportError:
+        from monte_carlo import MonteCarloResult
+    import numpy as np
+    DRAWS_AVAILABLE = True
+except ImportError:
+    pass
+
 
 @dataclass
 class MarketSizingData:
@@ -90,6 +111,66 @@ class MarketSizingData:
     # [{"type":"数据时效性", "detail":"..."}]
     growth_drivers: Optional[List[str]] = None
     # ["健康消费升级", "大瓶装渗透低线城市"]
+    tam_formula: Optional[str] = None
+    # "(ka_vol*ka_price + mid_vol*mid_price) / 1e8" — 引用 assumptions 的 key，Excel 直接生成公式
+    monte_carlo_draws: Optional[Any] = None
+    # MonteCarloResult 对象；给出时原始抽样结果随报告保存为 .npy (重绘分布图、查询分位数无需重跑)
+    segments: Optional[Any] = None
+    # MarketModel 或其 to_dict()；段因子引用 assumptions 的 key，Excel 按段生成公式链 (优先于 tam_formula)
+
+    def converted(self, unit: str, fx: Any = None) -> "MarketSizingData":
+        """
+        换算到另一单位 / 币种的副本 (如 亿元 → 亿美元)
+
+        换算 tam / sam / som、growth_forecast 的 tam / sam / som、monte_carlo_result 的统计量与分段拆解、
+        monte_carlo_draws、cross_validation 与各推导链的 result；推导步骤等文字说明保持原样。
+
+        Args:
+            unit: 目标单位
+            fx: 跨币种汇率 (数字或 fx.FXTable，如 fx_table.average(base_year))
+        """
+        factor = conversion_factor(self.unit, unit, fx)
+
+        def scale(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return value * factor
+            return value
+
+        def scale_keys(row: Optional[dict], keys) -> Optional[dict]:
+            if row is None:
+                return None
+            return {k: scale(v) if k in keys else v for k, v in row.items()}
+
+        mc = self.monte_carlo_result
+        if mc is not None:
+            mc = scale_keys(mc, ("mean", "median", "std", "p5", "p10", "p25", "p75", "p90", "p95", "min", "max"))
+            mc["unit"] = unit
+            mc["draws_path"] = None  # 已保存的抽样仍是原单位
+            if mc.get("segments"):
+                mc["segments"] = [scale_keys(seg, ("mean", "p5", "p50", "p95")) for seg in mc["segments"]]
+        draws = self.monte_carlo_draws
+        if draws is not None and hasattr(draws, "scaled"):
+            draws = draws.scaled(factor, unit)
+
+        return replace(
+            self,
+            tam=scale(self.tam), sam=scale(self.sam), som=scale(self.som), unit=unit,
+            growth_forecast=[scale_keys(row, ("tam", "sam", "som")) for row in self.growth_forecast]
+            if self.growth_forecast else self.growth_forecast,
+            monte_carlo_result=mc,
+            monte_carlo_draws=draws,
+            cross_validation=scale_keys(self.cross_validation, ("bottom_up", "top_down")),
+            tam_derivation=scale_keys(self.tam_derivation, ("result",)),
+            sam_derivation=scale_keys(self.sam_derivation, ("result",)),
+            som_derivation=scale_keys(self.som_derivation, ("result",)),
+            top_down_result=scale_keys(self.top_down_result, ("result",)),
+        )
+
+    def segment_model(self) -> Optional[MarketModel]:
+        """segments 统一转换为 MarketModel"""
+        if self.segments is None or isinstance(self.segments, MarketModel):
+            return self.segments
+        return MarketModel.from_dict(self.segments)
 
     def validate(self) -> List[str]:
         """校验数据完整性，返回 warnings 列表。不阻塞生成，但打印告警。"""
@@ -111,6 +192,25 @@ class MarketSizingData:
                 warnings.append("⚠️ 缺少 cagr key → Growth Forecast 将使用静态 CAGR 值")
             if "som_share" not in keys:
                 warnings.append("⚠️ 缺少 som_share key → SOM 将降级为静态值")
+        # 检查 TAM 公式
+        if self.tam_formula:
+            try:
+                expr = Expression(self.tam_formula)
+                known = {a.get("key") for a in (self.assumptions or [])}
+                unknown = [v for v in expr.variables if v not in known]
+                if unknown:
+                    warnings.append(f"⚠️ tam_formula 引用了不存在的假设 key: {', '.join(unknown)} → 将按分段模式检测")
+            except ExpressionError as e:
+                warnings.append(f"⚠️ tam_formula 无法解析 ({e}) → 将按分段模式检测")
+        # 检查细分段模型
+        if self.segments is not None:
+            try:
+                known = {a.get("key") for a in (self.assumptions or [])}
+                unknown = [v for v in self.segment_model().variables if v not in known]
+                if unknown:
+                    warnings.append(f"⚠️ segments 引用了不存在的假设 key: {', '.join(unknown)} → 将按公式/分段模式检测")
+            except (ValueError, KeyError, TypeError) as e:
+                warnings.append(f"⚠️ segments 无法解析 ({e}) → 将按公式/分段模式检测")
         # 检查 Fermi 相关
         if not self.fermi_result:
             warnings.append("⚠️ fermi_result 为空 → Fermi 静态 fallback 也不可用")
@@ -247,16 +347,50 @@ class ReportGenerator:
             lines.append(f"| P95 (乐观) | {self._format_number(mc.get('p95', 0))} {data.unit} |")
             lines.append("")
             
+            # 分段拆解
+            if mc.get("segments"):
+                lines.append("### 分段拆解")
+                lines.append("")
+                lines.append("| 细分段 | P5 | P50 | P95 | 占比 |")
+                lines.append("|--------|----|-----|-----|------|")
+                for seg in mc["segments"]:
+                    label = "　" * (seg.get("depth", 1) - 1) + seg.get("label", seg.get("name", ""))
+                    lines.append(f"| {label} | {self._format_number(seg['p5'])} | {self._format_number(seg['p50'])} | "
+                                 f"{self._format_number(seg['p95'])} | {seg['share'] * 100:.1f}% |")
+                lines.append("")
+            
             # 敏感性分析
             if mc.get("sensitivity"):
                 lines.append("### 敏感性分析 (Tornado)")
                 lines.append("")
-                lines.append("| 假设 | 影响幅度 |")
-                lines.append("|------|----------|")
+                detail = mc.get("sensitivity_detail") or {}
                 sorted_sens = sorted(mc["sensitivity"].items(), key=lambda x: abs(x[1]), reverse=True)
+                if detail:
+                    lines.append("| 假设 | 取最小值 | 取最大值 | 影响幅度 |")
+                    lines.append("|------|----------|----------|----------|")
+                else:
+                    lines.append("| 假设 | 影响幅度 |")
+                    lines.append("|------|----------|")
                 for name, impact in sorted_sens:
                     bar = "▓" * min(int(abs(impact) / 5), 10)
-                    lines.append(f"| {name} | {bar} {impact:+.1f}% |")
+                    if name in detail:
+                        low, high = detail[name]["low"], detail[name]["high"]
+                        lines.append(f"| {name} | {low:+.1f}% | {high:+.1f}% | {bar} {impact:+.1f}% |")
+                    else:
+                        lines.append(f"| {name} | {bar} {impact:+.1f}% |")
+                lines.append("")
+            
+            # Sobol 全局敏感性 (含交互效应)
+            if mc.get("sobol"):
+                lines.append("### 全局敏感性 (Sobol)")
+                lines.append("")
+                lines.append("> S1 = 单独贡献的方差占比 | ST = 含交互效应的总贡献")
+                lines.append("")
+                lines.append("| 假设 | S1 (一阶) | ST (总效应) |")
+                lines.append("|------|-----------|-------------|")
+                sorted_sobol = sorted(mc["sobol"].items(), key=lambda x: x[1].get("ST", 0), reverse=True)
+                for name, idx in sorted_sobol:
+                    lines.append(f"| {name} | {idx.get('S1', 0):.3f} | {idx.get('ST', 0):.3f} |")
                 lines.append("")
         
         # 假设列表
@@ -338,6 +472,22 @@ class ReportGenerator:
         output_path.write_text(html_content, encoding="utf-8")
         return html_content
 
+    def _draws_histogram_html(self, mc: dict, unit: str, bins: int = 40) -> str:
+        """由已保存的抽样结果 (draws_path) 绘制分布直方图，P5-P95 区间高亮；无抽样文件时返回空"""
+        draws_path = mc.get("draws_path")
+        if not (DRAWS_AVAILABLE and draws_path and Path(draws_path).exists()):
+            return ""
+        draws = MonteCarloResult.load_draws(draws_path)
+        counts, edges = np.histogram(draws.raw_results, bins=bins)
+        peak = counts.max() or 1
+        p5, p95 = mc.get("p5", edges[0]), mc.get("p95", edges[-1])
+        bars = ""
+        for count, lo, hi in zip(counts, edges[:-1], edges[1:]):
+            cls = "hist-bar" if hi >= p5 and lo <= p95 else "hist-bar hist-tail"
+            bars += f'<div class="{cls}" style="height:{count / peak * 100:.0f}%" title="{self._format_number(lo)} - {self._format_number(hi)}: {count:,}"></div>'
+        return f'''<h3>结果分布</h3><div class="hist-chart">{bars}</div>
+                <div class="hist-axis"><span>{self._format_number(edges[0])} {unit}</span><span>{self._format_number(edges[-1])} {unit}</span></div>'''
+    
     def _build_html_report(self, data: MarketSizingData) -> str:
         """构建 Notion 风格自包含 HTML 报告 (完整 10 节)"""
 
@@ -505,27 +655,52 @@ class ReportGenerator:
             pills = ""
             for label, key, hl in [("P5 悲观","p5",""), ("P25","p25",""), ("P50 中位数","median","hl"), ("P75","p75",""), ("P95 乐观","p95","")]:
                 pills += f'<div class="pill {hl}"><div class="pill-label">{label}</div><div class="pill-val">{self._format_number(mc.get(key,0))} {data.unit}</div></div>\n'
+            seg_html = ""
+            if mc.get("segments"):
+                seg_rows = "".join(
+                    f'<tr><td style="padding-left:{seg.get("depth", 1) * 12}px">{seg.get("label", seg.get("name", ""))}</td>'
+                    f'<td>{self._format_number(seg["p5"])}</td><td><strong>{self._format_number(seg["p50"])}</strong></td>'
+                    f'<td>{self._format_number(seg["p95"])}</td><td>{seg["share"] * 100:.1f}%</td></tr>'
+                    for seg in mc["segments"]
+                )
+                seg_html = f'''<h3>分段拆解</h3><table><thead><tr><th>细分段</th><th>P5 ({data.unit})</th>
+                <th>P50 ({data.unit})</th><th>P95 ({data.unit})</th><th>占比</th></tr></thead><tbody>{seg_rows}</tbody></table>'''
             mc_html = f'''<section><h2>§6 🎲 Monte Carlo 模拟</h2>
                 <p>模拟次数: <strong>{mc.get("n_simulations",10000):,}</strong></p>
-                <div class="pill-grid">{pills}</div></section>'''
+                <div class="pill-grid">{pills}</div>{self._draws_histogram_html(mc, data.unit)}{seg_html}</section>'''
 
         # ========== §7 敏感性分析 ==========
         sens_html = ""
         if data.monte_carlo_result and data.monte_carlo_result.get("sensitivity"):
             mc = data.monte_carlo_result
             sorted_s = sorted(mc["sensitivity"].items(), key=lambda x: abs(x[1]), reverse=True)
+            detail = mc.get("sensitivity_detail") or {}
             mx_impact = max(abs(v) for _, v in sorted_s) if sorted_s else 1
+            if detail:
+                mx_impact = max([mx_impact] + [max(abs(d["low"]), abs(d["high"])) for d in detail.values()]) or 1
             tornado = ""
             sens_rows = ""
             for i, (name, impact) in enumerate(sorted_s):
-                w = abs(impact) / mx_impact * 100
-                tornado += f'''<div class="tornado-row">
+                if name in detail:
+                    # 双侧 Tornado: 左半轴为取 min 的影响，右半轴为取 max 的影响
+                    low, high = detail[name]["low"], detail[name]["high"]
+                    left = max(-min(low, high, 0), 0) / mx_impact * 50
+                    right = max(max(low, high, 0), 0) / mx_impact * 50
+                    tornado += f'''<div class="tornado-row">
+                    <div class="tornado-name">{name}</div>
+                    <div class="tornado-track tornado-split"><div class="tornado-fill tornado-neg" style="margin-left:{50 - left:.0f}%;width:{left:.0f}%"></div><div class="tornado-fill" style="width:{right:.0f}%"></div></div>
+                    <div class="tornado-val">{low:+.1f}% / {high:+.1f}%</div></div>\n'''
+                    impact_text = f"{low:+.1f}% / {high:+.1f}%"
+                else:
+                    w = abs(impact) / mx_impact * 100
+                    tornado += f'''<div class="tornado-row">
                     <div class="tornado-name">{name}</div>
                     <div class="tornado-track"><div class="tornado-fill" style="width:{w:.0f}%"></div></div>
                     <div class="tornado-val">{impact:+.1f}%</div></div>\n'''
+                    impact_text = f"{impact:+.1f}%"
                 # 解读
                 interp = "最关键变量" if i == 0 else "次关键" if i == 1 else "影响有限"
-                sens_rows += f'<tr><td>{name}</td><td><strong>{impact:+.1f}%</strong></td><td class="muted">{interp}</td></tr>\n'
+                sens_rows += f'<tr><td>{name}</td><td><strong>{impact_text}</strong></td><td class="muted">{interp}</td></tr>\n'
 
             top_var = sorted_s[0][0] if sorted_s else ""
             second_var = sorted_s[1][0] if len(sorted_s) > 1 else ""
@@ -668,8 +843,17 @@ border-radius:var(--radius);padding:16px 20px;margin:12px 0;font-size:.9rem;line
 .tornado-name{{width:130px;flex-shrink:0;font-size:.85rem;color:var(--muted);text-align:right}}
 .tornado-track{{flex:1;height:20px;background:var(--gray-bg);border-radius:4px;overflow:hidden}}
 .tornado-fill{{height:100%;background:linear-gradient(90deg,var(--blue),#5dade2);border-radius:4px}}
+.tornado-split{{display:flex}}
+.tornado-neg{{background:linear-gradient(90deg,#e59866,var(--amber))}}
+.tornado-split + .tornado-val{{width:110px}}
 .tornado-val{{width:55px;font-size:.85rem;font-weight:600;color:var(--blue)}}
 
+/* Histogram */
+.hist-chart{{display:flex;align-items:flex-end;gap:1px;height:120px;margin-top:8px}}
+.hist-bar{{flex:1;background:var(--blue);border-radius:2px 2px 0 0}}
+.hist-tail{{opacity:.35}}
+.hist-axis{{display:flex;justify-content:space-between;font-size:.75rem;color:var(--muted)}}
+
 /* Bar Chart */
 .bar-chart{{display:flex;align-items:flex-end;gap:16px;justify-content:center;padding:24px 0 8px}}
 .bar-col{{display:flex;flex-direction:column;align-items:center}}
@@ -765,6 +949,15 @@ ul{{padding-left:1.5rem}}
         
         results = {}
         
+        # 保存原始抽样结果 (与报告同名前缀)，在副本的 monte_carlo_result 中记录 draws_path
+        # (绝对路径，与当前工作目录无关)；调用方传入的 data / monte_carlo_draws 不被修改
+        if data.monte_carlo_draws is not None and data.monte_carlo_draws.raw_results is not None:
+            draws = replace(data.monte_carlo_draws)
+            draws_path = draws.save_draws((output_dir / base_name).resolve())
+            data = replace(data, monte_carlo_draws=draws, monte_carlo_result={
+                **(data.monte_carlo_result or draws.to_dict()), "draws_path": str(draws_path)})
+            results["draws"] = draws_path
+        
         # 校验数据完整性
         warnings = data.validate()
         if warnings:
@@ -954,6 +1147,24 @@ ul{{padding-left:1.5rem}}
                             "price": price_key,
                         }
         
+        # Pattern 0a: 显式细分段模型 (segments)，优先于 tam_formula 与后缀推断
+        segment_model = None
+        if data.segments is not None:
+            try:
+                segment_model = data.segment_model()
+            except (ValueError, KeyError, TypeError):
+                segment_model = None  # validate() 已告警
+            if segment_model is not None and any(k not in key_map for k in segment_model.variables):
+                segment_model = None
+
+        # Pattern 0: 显式 TAM 公式 (tam_formula)，优先于后缀推断
+        expression_formula = None
+        if data.tam_formula:
+            try:
+                expression_formula = Expression(data.tam_formula).to_excel(key_map)
+            except ExpressionError:
+                expression_formula = None  # validate() 已告警，降级为分段模式检测
+
         is_institution_based = len(seg_keys_found) > 0
         is_population_based = all(k in key_map for k in ["base_pop", "pene_rate", "price"])
         # Pattern 3: substitution_based (existing_market + substitution_rate + price_premium)
@@ -965,7 +1176,88 @@ ul{{padding-left:1.5rem}}
         
         curr_row = 4
         
-        if is_institution_based:
+        def _write_segment(segment, depth):
+            """按段写公式链: 子段小计 → × 各因子 → × 换算系数，返回段结果单元格"""
+            nonlocal curr_row
+            labels = {a.get("key"): a.get("name", a.get("key")) for a in (data.assumptions or [])}
+            if depth > 0:
+                ws2.cell(row=curr_row, column=1, value=f"{'  ' * (depth - 1)}── {segment.label} 段 ──")
+                ws2.cell(row=curr_row, column=1).font = Font(bold=True, size=11)
+                curr_row += 1
+            prev = None
+            if segment.children:
+                child_cells = [_write_segment(child, depth + 1) for child in segment.children]
+                ws2.cell(row=curr_row, column=1, value=f"{segment.label}: 各段之和")
+                ws2.cell(row=curr_row, column=2, value="= 各段之和")
+                ws2.cell(row=curr_row, column=3, value="=" + "+".join(child_cells))
+                ws2.cell(row=curr_row, column=4, value="🧮 计算")
+                for c in range(1, 5): ws2.cell(row=curr_row, column=c).border = thin_border
+                prev = f"C{curr_row}"
+                curr_row += 1
+            for key in segment.factors:
+                name = labels.get(key, key)
+                if prev is None:
+                    ws2.cell(row=curr_row, column=1, value=f"{segment.label}: {name}")
+                    ws2.cell(row=curr_row, column=2, value="引用假设")
+                    ws2.cell(row=curr_row, column=3, value=f"={key_map[key]}")
+                    ws2.cell(row=curr_row, column=4, value="🧮 引用")
+                else:
+                    ws2.cell(row=curr_row, column=1, value=f"{segment.label}: × {name}")
+                    ws2.cell(row=curr_row, column=2, value=f"× {name}")
+                    ws2.cell(row=curr_row, column=3, value=f"={prev}*{key_map[key]}")
+                    ws2.cell(row=curr_row, column=4, value="🧮 计算")
+                ws2.cell(row=curr_row, column=3).font = xref_font
+                for c in range(1, 5): ws2.cell(row=curr_row, column=c).border = thin_border
+                prev = f"C{curr_row}"
+                curr_row += 1
+            if segment.scale != 1:
+                ws2.cell(row=curr_row, column=1, value=f"{segment.label}: 单位换算")
+                ws2.cell(row=curr_row, column=2, value=f"× {segment.scale:g}")
+                ws2.cell(row=curr_row, column=3, value=f"={prev}*{segment.scale!r}")
+                ws2.cell(row=curr_row, column=4, value=data.unit)
+                for c in range(1, 5): ws2.cell(row=curr_row, column=c).border = thin_border
+                prev = f"C{curr_row}"
+                curr_row += 1
+            result = ws2[prev]
+            result.number_format = '#,##0.00'
+            if depth == 0:
+                result.font = Font(bold=True, size=12)
+                result.fill = calc_fill
+                ws2[f"A{prev[1:]}"] = f"★ {segment.label} (Bottom-Up 汇总)"
+                ws2[f"A{prev[1:]}"].font = Font(bold=True, size=12, color="1F4E79")
+            else:
+                curr_row += 1  # 段之间空一行
+            return prev
+        
+        if segment_model is not None:
+            # ── 显式细分段模型: 逐段写公式链，父段 = 子段之和 × 因子 ──
+            fermi_final_cell = _write_segment(segment_model.root, 0)
+            curr_row += 1
+        
+        elif expression_formula:
+            # ── 显式公式: 逐个引用公式用到的假设，再汇总 ──
+            for key in Expression(data.tam_formula).variables:
+                label = next((a.get("name", key) for a in (data.assumptions or []) if a.get("key") == key), key)
+                ws2.cell(row=curr_row, column=1, value=label)
+                ws2.cell(row=curr_row, column=2, value="引用假设")
+                ws2.cell(row=curr_row, column=3, value=f"={key_map[key]}")
+                ws2.cell(row=curr_row, column=3).font = xref_font
+                ws2.cell(row=curr_row, column=4, value="🧮 引用")
+                for c in range(1, 5): ws2.cell(row=curr_row, column=c).border = thin_border
+                curr_row += 1
+            ws2.cell(row=curr_row, column=1, value="TAM (公式)")
+            ws2.cell(row=curr_row, column=1).font = Font(bold=True)
+            ws2.cell(row=curr_row, column=2, value=data.tam_formula)
+            ws2.cell(row=curr_row, column=3, value=expression_formula)
+            ws2.cell(row=curr_row, column=3).font = xref_font
+            ws2.cell(row=curr_row, column=3).fill = calc_fill
+            ws2.cell(row=curr_row, column=3).number_format = '#,##0.00'
+            ws2.cell(row=curr_row, column=4, value="🧮 计算")
+            for c in range(1, 5): ws2.cell(row=curr_row, column=c).border = thin_border
+            fermi_final_cell = f"C{curr_row}"
+            curr_row += 2
+        
+        elif is_institution_based:
             # ── Institution-Based 分段模型 ──
             segment_result_cells = []
             
@@ -1339,13 +1631,23 @@ ul{{padding-left:1.5rem}}
                 ws5.cell(row=sens_row, column=1).font = Font(bold=True, size=12)
                 sens_row += 1
                 
-                _write_header(ws5, sens_row, ["假设", "影响幅度 (%)", "解读"])
+                detail = mc.get("sensitivity_detail") or {}
+                if detail:
+                    _write_header(ws5, sens_row, ["假设", "影响幅度 (%)", "解读", "取最小值 (%)", "取最大值 (%)"])
+                else:
+                    _write_header(ws5, sens_row, ["假设", "影响幅度 (%)", "解读"])
                 sens_row += 1
                 sorted_sens = sorted(mc["sensitivity"].items(), key=lambda x: abs(x[1]), reverse=True)
                 for i, (name, impact) in enumerate(sorted_sens):
                     rank = "最关键变量" if i == 0 else "次关键" if i == 1 else "影响有限"
-                    _write_row(ws5, sens_row + i, [name, impact, rank])
+                    row_values = [name, impact, rank]
+                    if name in detail:
+                        row_values += [detail[name]["low"], detail[name]["high"]]
+                    _write_row(ws5, sens_row + i, row_values)
                     ws5.cell(row=sens_row + i, column=2).number_format = '+#,##0.0%;-#,##0.0%' if abs(impact) < 1 else '+#,##0.0'
+                    for col in (4, 5):
+                        if name in detail:
+                            ws5.cell(row=sens_row + i, column=col).number_format = '+#,##0.0;-#,##0.0'
         else:
             ws5['A3'] = "未运行 Monte Carlo 模拟"
             ws5['A3'].font = Font(italic=True, color="999999")
@@ -1397,17 +1699,7 @@ ul{{padding-left:1.5rem}}
         wb.save(output_path)
         return str(output_path)
     
-    @staticmethod
-    def _format_number(n: float) -> str:
-        """格式化数字"""
-        if n >= 1e12:
-            return f"{n/1e12:.2f}万亿"
-        elif n >= 1e8:
-            return f"{n/1e8:.2f}亿"
-        elif n >= 1e4:
-            return f"{n/1e4:.2f}万"
-        else:
-            return f"{n:.2f}"
+    _format_number = staticmethod(format_number)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,353 @@
+"""
+Monte Carlo Result Cache
+========================
+
+按内容寻址的 Monte Carlo 结果磁盘缓存：只改报告措辞、重新渲染时不必重跑模拟。
+
+缓存键 = SHA-256(
+    假设定义 (Assumption 各字段),
+    公式指纹 (Expression 规范化 AST；普通函数为字节码 + 常量 + 闭包 + 引用的全局量),
+    n_simulations 及其他 run() 参数,
+    随机数生成器当前状态 (seed 及已消耗的随机流)
+)
+
+- 命中时直接返回 MonteCarloResult，原始结果以内存映射方式加载 (零拷贝)，
+  并把生成器状态推进到与实际运行之后一致，后续调用的结果不受缓存影响
+- 按总字节数做 LRU 淘汰 (以条目文件的访问时间排序)
+
+使用方法:
+    from monte_carlo import MonteCarloSimulator
+    from result_cache import ResultCache
+
+    sim = MonteCarloSimulator(seed=42, cache=ResultCache(".mc_cache", max_bytes=2 * 2**30))
+    result = sim.run(assumptions, formula="ka_vol * ka_price", n_simulations=1_000_000)  # 首次计算
+    result = MonteCarloSimulator(seed=42, cache=".mc_cache").run(...)                    # 命中
+
+注意: 普通 Python 函数的指纹覆盖其字节码、常量、默认参数、闭包变量以及
+直接引用的模块级数值/函数；可调用实例按类的 __call__ 与逐个实例属性指纹化。
+指纹只取决于内容、不含内存地址，因此跨进程稳定；含锁、文件句柄等无法按内容
+指纹化的状态时不缓存。依赖外部可变状态 (文件、数据库等) 的公式请使用
+字符串表达式，或不启用缓存。
+"""
+
+import os
+import json
+import types
+import pickle
+import hashlib
+import functools
+import dataclasses
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("result_cache 需要 numpy。请安装: pip install numpy")
+
+try:
+    from .formula_expr import Expression
+except ImportError:
+    from formula_expr import Expression
+
+
+# 缓存格式版本，格式变化时递增使旧条目失效
+CACHE_VERSION = 1
+
+
+def formula_fingerprint(formula: Union[str, Expression, Callable[..., float]]) -> Optional[str]:
+    """
+    公式的稳定指纹
+
+    Returns:
+        十六进制 SHA-256；无法可靠指纹化的对象 (内置函数、C 扩展等) 返回 None
+    """
+    if isinstance(formula, str):
+        formula = Expression(formula)
+    if isinstance(formula, Expression):
+        return formula.fingerprint
+    digest = hashlib.sha256()
+    try:
+        _hash_callable(formula, digest, set())
+    except _Unhashable:
+        return None
+    return digest.hexdigest()
+
+
+class _Unhashable(Exception):
+    """对象无法稳定指纹化"""
+
+
+def _hash_callable(fn: Any, digest: "hashlib._Hash", seen: set) -> None:
+    if id(fn) in seen:
+        digest.update(b"<seen>")
+        return
+    seen.add(id(fn))
+
+    if isinstance(fn, Expression):
+        digest.update(fn.fingerprint.encode())
+    elif isinstance(fn, functools.partial):
+        digest.update(b"partial")
+        _hash_callable(fn.func, digest, seen)
+        _hash_value(fn.args, digest, seen)
+        _hash_value(fn.keywords, digest, seen)
+    elif isinstance(fn, types.MethodType):
+        _hash_callable(fn.__func__, digest, seen)
+        _hash_value(fn.__self__, digest, seen)
+    elif isinstance(fn, types.FunctionType):
+        _hash_code(fn.__code__, digest)
+        _hash_value(fn.__defaults__, digest, seen)
+        _hash_value(fn.__kwdefaults__, digest, seen)
+        for cell in fn.__closure__ or ():
+            _hash_value(cell.cell_contents, digest, seen)
+        # 直接引用的模块级常量与函数 (如 SCALE = 1e8 或辅助函数)
+        for name in _global_names(fn.__code__):
+            if name in fn.__globals__:
+                digest.update(name.encode())
+                _hash_value(fn.__globals__[name], digest, seen)
+    elif callable(fn) and isinstance(getattr(type(fn), "__call__", None), types.FunctionType):
+        # 可调用实例: 类的 __call__ + 逐个实例属性 (属性中的函数、对象同样按内容指纹化)
+        _hash_callable(type(fn).__call__, digest, seen)
+        _hash_attributes(fn, digest, seen)
+    else:
+        raise _Unhashable(repr(fn))
+
+
+def _hash_attributes(obj: Any, digest: "hashlib._Hash", seen: set) -> None:
+    """按属性名排序逐个指纹化实例属性；没有 __dict__ (如 __slots__ 类、C 扩展对象) 时无法指纹化"""
+    attributes = getattr(obj, "__dict__", None)
+    if not isinstance(attributes, dict):
+        raise _Unhashable(repr(obj))
+    digest.update(f"object:{type(obj).__module__}.{type(obj).__qualname__}".encode())
+    for name in sorted(attributes):
+        digest.update(name.encode())
+        _hash_value(attributes[name], digest, seen)
+
+
+def _hash_code(code: types.CodeType, digest: "hashlib._Hash") -> None:
+    digest.update(code.co_code)
+    digest.update(repr((code.co_names, code.co_varnames)).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+def _global_names(code: types.CodeType) -> set:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _hash_value(value: Any, digest: "hashlib._Hash", seen: set) -> None:
+    """
+    按内容指纹化任意值；不能确定性指纹化的对象抛出 _Unhashable
+
+    不使用 repr 兜底: 默认 repr 含内存地址，跨进程不稳定，进程内又可能因地址复用而碰撞
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        digest.update(f"{type(value).__name__}:".encode())
+        digest.update(json.dumps(_canonical(value.hex() if isinstance(value, bytes) else value)).encode())
+    elif isinstance(value, types.ModuleType):
+        digest.update(f"module:{value.__name__}".encode())
+    elif isinstance(value, (types.FunctionType, functools.partial, types.MethodType, Expression)):
+        _hash_callable(value, digest, seen)
+    elif isinstance(value, (types.BuiltinFunctionType, np.ufunc)):
+        digest.update(f"builtin:{getattr(value, '__module__', '')}.{value.__name__}".encode())
+    elif isinstance(value, type):
+        digest.update(f"type:{value.__module__}.{value.__qualname__}".encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}".encode())
+        if value.dtype.hasobject:
+            _hash_value(value.tolist(), digest, seen)
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _hash_value(item, digest, seen)
+    elif isinstance(value, dict):
+        # 保留插入顺序 (与 _canonical 一致)
+        digest.update(f"dict:{len(value)}".encode())
+        for key, item in value.items():
+            _hash_value(key, digest, seen)
+            _hash_value(item, digest, seen)
+    elif isinstance(value, (set, frozenset)):
+        digest.update(f"set:{len(value)}".encode())
+        for item_digest in sorted(_sub_digest(item, seen) for item in value):
+            digest.update(item_digest)
+    elif id(value) in seen:
+        digest.update(b"<seen>")
+    elif callable(value):
+        _hash_callable(value, digest, seen)
+    else:
+        seen.add(id(value))
+        if dataclasses.is_dataclass(value):
+            digest.update(f"dataclass:{type(value).__module__}.{type(value).__qualname__}".encode())
+            for field in dataclasses.fields(value):
+                digest.update(field.name.encode())
+                _hash_value(getattr(value, field.name), digest, seen)
+        else:
+            _hash_attributes(value, digest, seen)
+
+
+def _sub_digest(value: Any, seen: set) -> bytes:
+    sub = hashlib.sha256()
+    _hash_value(value, sub, seen)
+    return sub.digest()
+
+
+def _canonical(value: Any) -> Any:
+    """
+    转换为可稳定 JSON 序列化的结构 (数组转列表、dataclass 转字段列表)
+
+    dict 保留插入顺序: 假设的顺序决定抽样顺序，顺序不同结果也不同
+    """
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return [type(value).__name__, _canonical(dataclasses.asdict(value))]
+    if isinstance(value, dict):
+        return [[_canonical(k), _canonical(v)] for k, v in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": value.dtype.str, "shape": value.shape, "data": value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and value != value:
+        return "nan"
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return repr(value)
+
+
+class ResultCache:
+    """
+    Monte Carlo 结果磁盘缓存
+
+    每个条目包含:
+    - <key>.pkl: 去掉大数组后的 MonteCarloResult + 运行后的生成器状态 (最后写入，存在即完整)
+    - <key>.draws.npy / .samples.npy / .draws.json: 原始结果与输入样本 (见 save_draws)
+
+    Args:
+        directory: 缓存目录
+        max_bytes: 缓存总大小上限 (字节)，超出时淘汰最久未使用的条目
+
+    Example:
+        >>> cache = ResultCache(".mc_cache", max_bytes=1 << 30)
+        >>> sim = MonteCarloSimulator(seed=42, cache=cache)
+    """
+
+    def __init__(self, directory: Union[str, Path] = ".mc_cache", max_bytes: int = 2 * 2**30):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, assumptions: Dict[str, Any], formula: Any, rng_state: dict,
+                 options: Dict[str, Any]) -> Optional[str]:
+        """
+        计算缓存键；公式无法指纹化时返回 None (不缓存)
+
+        Args:
+            assumptions: 假设字典 {假设名: Assumption}
+            formula: 公式 (字符串 / Expression / 函数)
+            rng_state: 生成器当前状态 (MonteCarloSimulator._rng_state())
+            options: n_simulations 等其他影响结果的参数
+        """
+        fingerprint = formula_fingerprint(formula)
+        if fingerprint is None:
+            return None
+        payload = {
+            "version": CACHE_VERSION,
+            "assumptions": _canonical(assumptions),
+            "formula": fingerprint,
+            "rng": _canonical(rng_state),
+            "options": _canonical(options),
+        }
+        return hashlib.sha256(json.dumps(payload, default=repr).encode()).hexdigest()
+
+    def _prefix(self, key: str) -> Path:
+        return self.directory / key
+
+    def get(self, key: str) -> Optional[Tuple[Any, dict]]:
+        """
+        读取缓存条目
+
+        Returns:
+            (MonteCarloResult, 运行后的生成器状态)；未命中返回 None
+        """
+        entry = self._prefix(key).with_suffix(".pkl")
+        try:
+            with open(entry, "rb") as f:
+                result, state = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, ImportError, AttributeError):
+            # 不存在、写入中断，或以另一种导入方式 (scripts.monte_carlo / monte_carlo) 写入
+            self.misses += 1
+            return None
+
+        draws = self._prefix(key).with_name(f"{key}.draws.json")
+        if result.raw_results is None and draws.exists():
+            saved = type(result).load_draws(draws)
+            result.raw_results, result.samples = saved.raw_results, saved.samples
+        os.utime(entry)  # 更新访问时间 (LRU)
+        self.hits += 1
+        return result, state
+
+    def put(self, key: str, result: Any, state: dict) -> None:
+        """写入缓存条目，然后按 max_bytes 淘汰旧条目"""
+        prefix = self._prefix(key)
+        stored = dataclasses.replace(result, raw_results=None, samples=None, draws_path=None)
+        if result.raw_results is not None:
+            dataclasses.replace(result, draws_path=None).save_draws(prefix)
+
+        tmp = prefix.with_suffix(".pkl.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((stored, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, prefix.with_suffix(".pkl"))
+        self.evict()
+
+    def _entries(self) -> Dict[str, dict]:
+        """{key: {"size": 字节数, "atime": 最近访问时间}}"""
+        entries: Dict[str, dict] = {}
+        for path in self.directory.iterdir():
+            key = path.name.split(".", 1)[0]
+            info = entries.setdefault(key, {"size": 0, "atime": 0.0})
+            stat = path.stat()
+            info["size"] += stat.st_size
+            if path.suffix == ".pkl":
+                info["atime"] = stat.st_mtime
+        return entries
+
+    def evict(self) -> int:
+        """淘汰最久未使用的条目直到总大小不超过 max_bytes，返回淘汰条目数"""
+        entries = self._entries()
+        total = sum(info["size"] for info in entries.values())
+        removed = 0
+        for key, info in sorted(entries.items(), key=lambda item: item[1]["atime"]):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= info["size"]
+            removed += 1
+        return removed
+
+    def _remove(self, key: str) -> None:
+        for path in self.directory.glob(f"{key}.*"):
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        for key in self._entries():
+            self._remove(key)
+
+    @property
+    def size_bytes(self) -> int:
+        """缓存当前占用的字节数"""
+        return sum(info["size"] for info in self._entries().values())
+
+    def __len__(self) -> int:
+        return len(self._entries())
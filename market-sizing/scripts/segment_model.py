@@ -0,0 +1,341 @@
+"""
+Segmented Market Model
+======================
+
+分层细分市场模型：市场由若干细分段组成，每个段是一串因子的乘积，
+段之间可以嵌套 (父段 = 子段之和 × 父段自身的因子)。
+
+    TAM = (KA + Mid + SMB) × 换算系数
+    KA  = ka_count × ka_adopt × ka_price
+
+同一棵段树同时用于:
+- Monte Carlo: 生成表达式公式向量化求值，并给出每个段的分位数拆解与占比
+- 报告: MarketSizingData.segments 让 Excel 的 Fermi 计算表按段生成公式链，
+  不再依赖 _count / _adopt / _price 等 key 后缀推断
+
+使用方法:
+    from segment_model import Segment, MarketModel
+
+    model = MarketModel([
+        Segment("KA",  ["ka_count", "ka_adopt", "ka_price"], label="KA (头部)"),
+        Segment("Mid", ["mid_count", "mid_adopt", "mid_price"]),
+        Segment("SMB", ["smb_count", "smb_adopt", "smb_price"]),
+    ], scale=1e-4)   # 万元 → 亿元
+
+    model.formula                        # "(ka_count*ka_adopt*ka_price + ...)*0.0001"
+    result = model.run_monte_carlo(assumptions, n_simulations=100_000, unit="亿元")
+    print(result)                        # 总量分位数 + 各段 P5/P50/P95 与占比
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Segment:
+    """
+    细分段
+
+    Attributes:
+        name: 段名称 (在整棵树中唯一，用作结果的键)
+        factors: 相乘的假设 key 列表 (如 ["ka_count", "ka_adopt", "ka_price"])
+        children: 子段；有子段时段值 = 子段之和 × factors 之积 × scale
+        scale: 换算系数 (如 1e-8 把元换算为亿元)
+        label: 显示名称 (默认同 name)
+    """
+    name: str
+    factors: List[str] = field(default_factory=list)
+    children: List["Segment"] = field(default_factory=list)
+    scale: float = 1.0
+    label: str = ""
+
+    def __post_init__(self):
+        if not self.factors and not self.children:
+            raise ValueError(f"段 '{self.name}' 至少需要一个因子或子段")
+        for key in self.factors:
+            if not isinstance(key, str) or not key.isidentifier():
+                raise ValueError(f"段 '{self.name}' 的因子必须是假设 key (合法标识符)，当前为: {key!r}")
+        if not self.label:
+            self.label = self.name
+
+    def expression(self) -> str:
+        """段的表达式字符串 (子段之和 × 因子 × scale)"""
+        terms = []
+        if self.children:
+            inner = " + ".join(child.expression() for child in self.children)
+            terms.append(f"({inner})" if len(self.children) > 1 else inner)
+        terms.extend(self.factors)
+        if self.scale != 1:
+            terms.append(repr(float(self.scale)))
+        return "*".join(terms)
+
+    def evaluate(self, values: Dict[str, Any], cache: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        计算段值 (标量或 numpy 数组，按元素运算)
+
+        Args:
+            values: {假设 key: 值或样本数组}
+            cache: 传入字典时记录每个段的值 {段名: 值}
+        """
+        value = None
+        for child in self.children:
+            child_value = child.evaluate(values, cache)
+            value = child_value if value is None else value + child_value
+        for key in self.factors:
+            if key not in values:
+                raise KeyError(f"段 '{self.name}' 缺少假设: {key}")
+            value = values[key] if value is None else value * values[key]
+        if self.scale != 1:
+            value = value * self.scale
+        if cache is not None:
+            cache[self.name] = value
+        return value
+
+    def to_dict(self) -> dict:
+        spec: Dict[str, Any] = {"name": self.name}
+        if self.label != self.name:
+            spec["label"] = self.label
+        if self.factors:
+            spec["factors"] = list(self.factors)
+        if self.children:
+            spec["children"] = [child.to_dict() for child in self.children]
+        if self.scale != 1:
+            spec["scale"] = self.scale
+        return spec
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "Segment":
+        return cls(
+            name=spec["name"],
+            factors=list(spec.get("factors") or []),
+            children=[cls.from_dict(child) for child in spec.get("children") or []],
+            scale=float(spec.get("scale", 1.0)),
+            label=spec.get("label", ""),
+        )
+
+
+class MarketModel:
+    """
+    细分市场模型 (段树的根)
+
+    Args:
+        segments: 顶层细分段
+        name: 根节点名称 (如 "TAM")
+        factors: 作用于全部段之和的因子 (如 ["sam_ratio"])
+        scale: 换算系数
+        label: 显示名称
+
+    模型本身可作为公式直接传给 MonteCarloSimulator.run (按关键字参数调用)，
+    但 run_monte_carlo 使用等价的表达式字符串，可被结果缓存与增量重算识别。
+    """
+
+    def __init__(
+        self,
+        segments: List[Segment],
+        name: str = "TAM",
+        factors: Optional[List[str]] = None,
+        scale: float = 1.0,
+        label: str = "",
+    ):
+        self.root = Segment(name, list(factors or []), list(segments), scale, label)
+        names = [segment.name for _, segment in self.walk()]
+        duplicated = sorted({n for n in names if names.count(n) > 1})
+        if duplicated:
+            raise ValueError(f"段名称重复: {', '.join(duplicated)}")
+
+    @property
+    def segments(self) -> List[Segment]:
+        """顶层细分段"""
+        return self.root.children
+
+    def walk(self) -> Iterator[Tuple[int, Segment]]:
+        """先序遍历 (深度, 段)，根节点深度为 0"""
+        stack = [(0, self.root)]
+        while stack:
+            depth, segment = stack.pop()
+            yield depth, segment
+            stack.extend((depth + 1, child) for child in reversed(segment.children))
+
+    @property
+    def variables(self) -> List[str]:
+        """模型用到的假设 key (按首次出现顺序)"""
+        seen: Dict[str, None] = {}
+        for _, segment in self.walk():
+            for key in segment.factors:
+                seen.setdefault(key)
+        return list(seen)
+
+    @property
+    def formula(self) -> str:
+        """总量的表达式字符串"""
+        return self.root.expression()
+
+    def evaluate(self, values: Dict[str, Any]) -> Any:
+        """计算总量"""
+        return self.root.evaluate(values)
+
+    def evaluate_segments(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        一次计算所有段对总量的贡献 {段名: 值}
+
+        段值乘上所有祖先段的因子与换算系数，与总量同单位；纯加和的树中同层各段之和等于父段。
+        """
+        cache: Dict[str, Any] = {}
+        self.root.evaluate(values, cache)
+        contributions: Dict[str, Any] = {}
+
+        def scale_down(segment: Segment, multiplier: Any) -> None:
+            value = cache[segment.name]
+            contributions[segment.name] = value if multiplier is None else value * multiplier
+            if not segment.children:
+                return
+            for key in segment.factors:
+                multiplier = values[key] if multiplier is None else multiplier * values[key]
+            if segment.scale != 1:
+                multiplier = segment.scale if multiplier is None else multiplier * segment.scale
+            for child in segment.children:
+                scale_down(child, multiplier)
+
+        scale_down(self.root, None)
+        return {segment.name: contributions[segment.name] for _, segment in self.walk()}
+
+    def __call__(self, **values: Any) -> Any:
+        return self.evaluate(values)
+
+    def run_monte_carlo(
+        self,
+        assumptions: Dict[str, Any],
+        simulator: Any = None,
+        n_simulations: int = 10000,
+        unit: str = "元",
+        **options: Any,
+    ) -> "SegmentedResult":
+        """
+        Monte Carlo 模拟并按段拆解
+
+        总量结果与 MonteCarloSimulator.run 完全一致；各段的值由同一批输入样本向量化计算，
+        因此各段分位数与总量分位数来自同一组抽样。需要保留输入样本，
+        额外内存约为 n × (假设数 + 段数) × 8 字节。
+
+        Args:
+            assumptions: 假设字典 {假设 key: Assumption}
+            simulator: MonteCarloSimulator 实例 (默认新建，seed=None)
+            n_simulations / unit / **options: 透传给 MonteCarloSimulator.run
+                (chunk_size、keep_raw=False 等流式选项不适用)；
+                convert_units=True 时按假设单位换算 (输入系数并入公式，结果系数并入根节点的 scale)，
+                总量与各段同时换算到 unit；跨币种时用 fx 传入汇率
+        """
+        try:
+            from .monte_carlo import MonteCarloSimulator
+            from .streaming_stats import RunningMoments
+            from .units import resolve_units, scale_expression
+        except ImportError:
+            from monte_carlo import MonteCarloSimulator
+            from streaming_stats import RunningMoments
+            from units import resolve_units, scale_expression
+
+        missing = [key for key in self.variables if key not in assumptions]
+        if missing:
+            raise ValueError(f"模型引用了未定义的假设: {', '.join(missing)}")
+        if options.get("chunk_size") is not None or options.get("keep_raw") is False:
+            raise ValueError("分段拆解需要完整样本，不支持 chunk_size / keep_raw=False")
+        keep_samples = options.pop("keep_samples", False)
+
+        model, formula, input_scales = self, self.formula, {}
+        fx = options.pop("fx", None)
+        if options.pop("convert_units", False):
+            input_scales, factor = resolve_units(self, assumptions, unit, fx)
+            if factor != 1:
+                model = MarketModel.from_dict(dict(self.to_dict(), scale=self.root.scale * factor))
+            formula = scale_expression(model.formula, input_scales)
+
+        sim = simulator if simulator is not None else MonteCarloSimulator()
+        total = sim.run(assumptions, formula, n_simulations=n_simulations, unit=unit,
+                        keep_samples=True, **options)
+
+        samples = {name: values * input_scales[name] if name in input_scales else values
+                   for name, values in total.samples.items()}
+        values = model.evaluate_segments(samples)
+        segments = {}
+        for name, value in values.items():
+            if name == model.root.name:
+                continue
+            segments[name] = MonteCarloSimulator._summarize(
+                value, RunningMoments(), None,
+                n_simulations=total.n_simulations, sensitivity={}, unit=unit,
+            )
+        if not keep_samples:
+            total.samples = None
+        return SegmentedResult(model=model, total=total, segments=segments)
+
+    def to_dict(self) -> dict:
+        """转换为可 JSON 序列化的字典 (MarketSizingData.segments / 场景文件格式)"""
+        spec = self.root.to_dict()
+        spec["segments"] = spec.pop("children")
+        return spec
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "MarketModel":
+        return cls(
+            segments=[Segment.from_dict(child) for child in spec["segments"]],
+            name=spec.get("name", "TAM"),
+            factors=spec.get("factors"),
+            scale=float(spec.get("scale", 1.0)),
+            label=spec.get("label", ""),
+        )
+
+    def __repr__(self) -> str:
+        return f"MarketModel({self.formula!r})"
+
+
+@dataclass
+class SegmentedResult:
+    """
+    分段 Monte Carlo 结果
+
+    Attributes:
+        model: 细分市场模型
+        total: 总量的 MonteCarloResult
+        segments: 各段的 MonteCarloResult {段名: 结果} (不含敏感性分析)
+    """
+    model: MarketModel
+    total: Any
+    segments: Dict[str, Any]
+
+    def share(self, name: str) -> float:
+        """段均值占总量均值的比例"""
+        return self.segments[name].mean / self.total.mean if self.total.mean else float("nan")
+
+    def breakdown(self) -> List[dict]:
+        """按段树顺序的拆解表 [{"name", "label", "depth", "mean", "p5", "p50", "p95", "share"}]"""
+        rows = []
+        for depth, segment in self.model.walk():
+            if segment.name not in self.segments:
+                continue
+            r = self.segments[segment.name]
+            rows.append({
+                "name": segment.name,
+                "label": segment.label,
+                "depth": depth,
+                "mean": r.mean,
+                "p5": r.p5,
+                "p50": r.median,
+                "p95": r.p95,
+                "share": self.share(segment.name),
+            })
+        return rows
+
+    def __str__(self) -> str:
+        fmt = self.total._format
+        lines = [str(self.total), "", "🧩 分段拆解 (P5 / P50 / P95，占比按均值):"]
+        for row in self.breakdown():
+            indent = "  " * row["depth"]
+            lines.append(f"{indent}{row['label']}: {fmt(row['p5'])} / {fmt(row['p50'])} / "
+                         f"{fmt(row['p95'])} {self.total.unit}  ({row['share']:.1%})")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        """总量结果字典，附加 "segments" 拆解表 (可直接作为 monte_carlo_result 传给报告)"""
+        d = self.total.to_dict()
+        d["segments"] = self.breakdown()
+        return d
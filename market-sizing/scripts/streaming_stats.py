@@ -0,0 +1,171 @@
+"""
+Streaming Statistics
+====================
+
+大规模 Monte Carlo 的流式统计工具，内存占用与样本总数无关：
+- RunningMoments: 在线均值/方差/极值 (Chan 并行合并公式)
+- TDigest: 可合并的分位数草图 (merging t-digest，向量化压缩)
+
+两者都支持 update(一批数据) 与 merge(另一个实例)，
+分块模拟、多进程模拟可以逐块累加后再合并。
+
+使用方法:
+    from streaming_stats import RunningMoments, TDigest
+
+    moments, digest = RunningMoments(), TDigest()
+    for chunk in chunks:
+        moments.update(chunk)
+        digest.update(chunk)
+
+    print(moments.mean, moments.std, digest.quantile(0.95))
+"""
+
+import math
+from typing import Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("streaming_stats 需要 numpy。请安装: pip install numpy")
+
+
+class RunningMoments:
+    """
+    在线统计量: 样本数、均值、方差 (总体方差，与 np.std 默认一致)、最小值、最大值
+
+    Example:
+        >>> m = RunningMoments()
+        >>> m.update(np.array([1.0, 2.0, 3.0]))
+        >>> print(m.mean, m.std)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0          # 离差平方和
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """累加一批数据"""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        chunk_mean = float(np.mean(values))
+        centered = values - chunk_mean
+        self._combine(values.size, chunk_mean, float(np.dot(centered, centered)),
+                      float(np.min(values)), float(np.max(values)))
+
+    def merge(self, other: "RunningMoments") -> None:
+        """合并另一个 RunningMoments"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n: int, mean: float, m2: float, lo: float, hi: float) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    @property
+    def variance(self) -> float:
+        """总体方差"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """总体标准差"""
+        return math.sqrt(self.variance)
+
+
+class TDigest:
+    """
+    Merging t-digest 分位数草图
+
+    质心按 k1 尺度函数 k(q) = δ/(2π)·asin(2q-1) 分组：两端质心很小，
+    中间质心较大，因此 P5/P95 等尾部分位数的精度远高于等宽直方图。
+    每次 update 把新数据与现有质心一起排序，按 k 值整数部分分组压缩，
+    全程向量化，质心数量约为 δ/2。
+
+    Args:
+        compression: 压缩参数 δ，越大越精确 (质心越多)
+
+    Example:
+        >>> d = TDigest()
+        >>> d.update(np.random.default_rng(0).normal(size=1_000_000))
+        >>> print(d.quantile([0.05, 0.5, 0.95]))
+    """
+
+    def __init__(self, compression: float = 500):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """加入一批数据 (每个值权重为 1)"""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+        self._compress(values, np.ones(values.size))
+
+    def merge(self, other: "TDigest") -> None:
+        """合并另一个 TDigest"""
+        if other.count == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(other.means, other.weights)
+
+    def scaled(self, factor: float) -> "TDigest":
+        """所有数据乘以正数 factor 后的草图 (单位换算用)"""
+        if not factor > 0:
+            raise ValueError(f"factor 必须为正数，当前值: {factor}")
+        digest = TDigest(self.compression)
+        digest.means, digest.weights, digest.count = self.means * factor, self.weights.copy(), self.count
+        digest.min, digest.max = self.min * factor, self.max * factor
+        return digest
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        total = float(np.sum(weights))
+        centers = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * centers - 1, -1.0, 1.0))
+        groups = np.floor(k).astype(np.int64)
+        groups -= groups[0]
+
+        group_weights = np.bincount(groups, weights=weights)
+        group_sums = np.bincount(groups, weights=weights * means)
+        keep = group_weights > 0
+        self.weights = group_weights[keep]
+        self.means = group_sums[keep] / self.weights
+        self.count = total
+
+    def quantile(self, q: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        估计分位数
+
+        Args:
+            q: 0-1 之间的分位点 (标量或数组)
+        """
+        if self.count == 0:
+            raise ValueError("TDigest 为空，无法计算分位数")
+        positions = np.concatenate([[0.0], np.cumsum(self.weights) - self.weights / 2, [self.count]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        result = np.interp(np.asarray(q, dtype=float) * self.count, positions, values)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def percentile(self, p: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """估计百分位数 (p 为 0-100，与 np.percentile 一致)"""
+        return self.quantile(np.asarray(p, dtype=float) / 100)
@@ -0,0 +1,545 @@
+"""
+Units
+=====
+
+轻量的单位换算与带单位数值 (Quantity)：
+- 单位解析: 元 / 万元 / 亿元 / 万亿元、美元 / USD / M USD / $bn、万人 / 家 等，结果按字符串缓存
+- Quantity: 数值 (标量或 numpy 数组) + 单位，四则运算自动换算与检查量纲，
+  可直接传入公式函数与表达式 (支持 min / max / abs / sqrt / log / exp)
+- 模型单位解析: 输入换算到基础单位，再用 Quantity 把公式探测求值一次得到结果单位；
+  换算系数在模拟前并入公式 (表达式直接改写)，抽样与求值仍是纯 numpy 数组，开销可忽略
+- 统一的大数字格式化: format_number / format_quantity (FermiResult、MonteCarloResult、报告共用)
+
+量纲只跟踪货币 (CNY / USD / EUR / HKD / JPY / GBP)。人、家、次等计数单位视为无量纲，
+只保留数量级前缀 (万人 = 1e4)，因此 "家 × 元" 的结果单位仍是元。
+跨币种换算需要传入汇率 fx (数字，或带 rate(from, to) 方法的对象，如 fx.FXTable)。
+
+使用方法:
+    from units import Quantity, parse_unit, convert, format_quantity
+
+    convert(6.375e9, "元", "亿元")                  # 63.75
+    q = Quantity(4250, "家") * Quantity(1.5e6, "元")
+    q.to("亿元")                                     # Quantity(63.75, '亿元')
+    format_quantity(6.375e9, "元")                   # '63.75 亿元'
+
+    sim.run(assumptions, "ka_vol*ka_price", unit="亿元", convert_units=True)
+"""
+
+import ast
+import math
+import numbers
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+
+class UnitError(ValueError):
+    """单位无法解析或量纲不一致"""
+
+
+# 货币: 名称 -> ISO 代码 (按名称长度从长到短匹配，"美元" 优先于 "元")
+_CURRENCIES = {
+    "人民币": "CNY", "元": "CNY", "CNY": "CNY", "RMB": "CNY", "¥": "CNY",
+    "美元": "USD", "USD": "USD", "US$": "USD", "$": "USD",
+    "欧元": "EUR", "EUR": "EUR", "€": "EUR",
+    "港元": "HKD", "港币": "HKD", "HKD": "HKD",
+    "日元": "JPY", "JPY": "JPY",
+    "英镑": "GBP", "GBP": "GBP", "£": "GBP",
+}
+
+# 中文数量级前缀
+_CN_PREFIXES = {
+    "万亿": 1e12, "千亿": 1e11, "百亿": 1e10, "十亿": 1e9, "亿": 1e8,
+    "千万": 1e7, "百万": 1e6, "十万": 1e5, "万": 1e4, "千": 1e3, "百": 1e2,
+}
+
+# 英文数量级 (前缀或后缀，如 "M USD" / "USD mn" / "$bn")
+_EN_PREFIXES = {
+    "k": 1e3, "K": 1e3, "thousand": 1e3,
+    "m": 1e6, "M": 1e6, "mn": 1e6, "mm": 1e6, "million": 1e6,
+    "b": 1e9, "B": 1e9, "bn": 1e9, "billion": 1e9,
+    "t": 1e12, "T": 1e12, "tn": 1e12, "trillion": 1e12,
+}
+
+# 可以脱离货币单独出现的数量级词；其余 (k / m / b / t / mm 等) 只有与货币相邻时才是数量级，
+# 否则按计数单位处理 ("t" 是吨，"m" 可能是米)
+_EN_SCALE_WORDS = {"thousand", "mn", "million", "bn", "billion", "tn", "trillion"}
+
+# 质量单位: 相对千克的倍数 (与计数单位一样无量纲，但 kg ↔ t、元/吨 × 吨 按倍数正确换算)
+_MASS_UNITS = {"kg": 1.0, "公斤": 1.0, "g": 1e-3, "克": 1e-3, "t": 1e3, "吨": 1e3, "公吨": 1e3}
+
+# format_quantity 使用的前缀 (数量级 -> 前缀)，与 format_number 的分档一致
+_DISPLAY_PREFIXES = {1e4: "万", 1e8: "亿", 1e12: "万亿"}
+
+
+@dataclass(frozen=True)
+class Unit:
+    """
+    解析后的单位
+
+    Attributes:
+        name: 原始单位字符串
+        scale: 相对基础单位的倍数 (亿元 = 1e8)
+        dims: 货币量纲 ((代码, 指数), ...)，无量纲为 ()
+        base: 基础单位名 (亿元 → 元, 万人 → 人)，用于格式化
+    """
+    name: str
+    scale: float = 1.0
+    dims: Tuple[Tuple[str, int], ...] = ()
+    base: str = ""
+
+    @property
+    def dimensionless(self) -> bool:
+        return not self.dims
+
+    @property
+    def currency(self) -> Optional[str]:
+        """单一货币单位的 ISO 代码 (如 CNY)，其余情况为 None"""
+        if len(self.dims) == 1 and self.dims[0][1] == 1:
+            return self.dims[0][0]
+        return None
+
+    def __mul__(self, other: "Unit") -> "Unit":
+        return _product(self, other, self.scale * other.scale, _combine_dims(self.dims, other.dims, 1), "·")
+
+    def __truediv__(self, other: "Unit") -> "Unit":
+        return _product(self, other, self.scale / other.scale, _combine_dims(self.dims, other.dims, -1), "/")
+
+    def __pow__(self, exponent: int) -> "Unit":
+        if exponent == 1:
+            return self
+        return Unit(f"({self.name})^{exponent}" if self.name else "", self.scale ** exponent,
+                    tuple((code, power * exponent) for code, power in self.dims), self.base)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+DIMENSIONLESS = Unit("")
+
+UnitLike = Union[str, Unit, None]
+
+
+def _join(left: str, op: str, right: str) -> str:
+    if not right:
+        return left
+    if not left:
+        return f"1{op}{right}" if op == "/" else right
+    return f"{left}{op}{right}"
+
+
+def _product(left: Unit, right: Unit, scale: float, dims, op: str) -> Unit:
+    """乘除结果的单位；计数单位无量纲，"家 × 元" 的结果按数量级命名为 "元" / "万元" 等"""
+    if dims and (left.dimensionless or right.dimensionless):
+        dimensional = right if left.dimensionless else left
+        if dims == dimensional.dims:
+            name = _prefixed(scale, dimensional.base)
+            if name is not None:
+                return Unit(name, scale, dims, dimensional.base)
+    return Unit(_join(left.name, op, right.name), scale, dims, left.base or right.base)
+
+
+def _prefixed(scale: float, base: str) -> Optional[str]:
+    if scale == 1:
+        return base
+    if base.isascii():
+        for name in ("M", "B", "K", "T"):
+            if _EN_PREFIXES[name] == scale:
+                return f"{name} {base}"
+        return None
+    for name, value in _CN_PREFIXES.items():
+        if value == scale:
+            return f"{name}{base}"
+    return None
+
+
+def _combine_dims(a, b, sign: int) -> Tuple[Tuple[str, int], ...]:
+    dims: Dict[str, int] = dict(a)
+    for code, power in b:
+        dims[code] = dims.get(code, 0) + sign * power
+    return tuple(sorted((code, power) for code, power in dims.items() if power))
+
+
+@lru_cache(maxsize=256)
+def _parse(text: str) -> Unit:
+    if "/" in text:
+        numerator, _, denominator = text.partition("/")
+        unit = _parse(numerator.strip()) / _parse(denominator.strip())
+        return Unit(text, unit.scale, unit.dims, unit.base)
+
+    scale = 1.0
+    tokens = text.split()
+    # 英文数量级: 独立的词 ("M USD" / "USD mn") 或紧跟货币符号 ("$bn" / "USD M")；
+    # 单字母等缩写只在单位含货币时才是数量级 ("5 t" 是 5 吨，不是 5 万亿)
+    with_currency = any(_has_currency(token) for token in tokens if token not in _EN_PREFIXES)
+    remaining = []
+    for token in tokens:
+        if token in _EN_PREFIXES and (with_currency or token in _EN_SCALE_WORDS):
+            scale *= _EN_PREFIXES[token]
+        else:
+            remaining.append(token)
+    body = "".join(remaining)
+
+    for name in sorted(_CURRENCIES, key=len, reverse=True):
+        if body.endswith(name):
+            prefix, base = body[:-len(name)], name
+            break
+        if body.startswith(name) and body[len(name):] in _EN_PREFIXES:
+            prefix, base = body[len(name):], name
+            break
+    else:
+        prefix, base = body, ""
+
+    if prefix:
+        if prefix in _EN_PREFIXES and base:
+            scale *= _EN_PREFIXES[prefix]
+        else:
+            # 中文前缀 + 计数单位 (万人 / 亿元)，前缀可叠加 (万亿)
+            for name in sorted(_CN_PREFIXES, key=len, reverse=True):
+                if prefix.startswith(name):
+                    scale *= _CN_PREFIXES[name]
+                    prefix = prefix[len(name):]
+                    break
+            if prefix and base:
+                raise UnitError(f"无法识别的单位: {text!r}")
+            base = base or prefix
+            scale *= _MASS_UNITS.get(base, 1.0)
+
+    dims = ((_CURRENCIES[base], 1),) if base in _CURRENCIES else ()
+    return Unit(text, scale, dims, base)
+
+
+def _has_currency(token: str) -> bool:
+    """token 是否以货币名开头或结尾 ("USD" / "$bn" / "亿元")"""
+    return any(token.endswith(name) or token.startswith(name) for name in _CURRENCIES)
+
+
+def parse_unit(unit: UnitLike) -> Unit:
+    """
+    解析单位字符串 (结果缓存)
+
+    支持 "元" / "万元" / "亿元" / "美元" / "USD" / "M USD" / "$bn" / "万人" / "元/人" 等；
+    无法识别的计数单位视为无量纲 (如 "家" / "次")。质量单位 (kg / t / 吨 / 万吨) 按相对千克
+    的倍数换算；单字母的 k / m / b / t 只有与货币相邻时 ("M USD" / "USD m") 才表示数量级。
+    """
+    if isinstance(unit, Unit):
+        return unit
+    if not unit:
+        return DIMENSIONLESS
+    return _parse(str(unit).strip())
+
+
+def _fx_rate(fx: Any, source: str, target: str) -> float:
+    if fx is None:
+        raise UnitError(f"{source} → {target} 需要汇率 (fx)")
+    if isinstance(fx, numbers.Real):
+        return float(fx)
+    return float(fx.rate(source, target))
+
+
+def conversion_factor(source: UnitLike, target: UnitLike, fx: Any = None) -> float:
+    """
+    source 单位的数值乘以该系数即为 target 单位的数值
+
+    Args:
+        source / target: 单位
+        fx: 跨币种时的汇率 (1 source 货币 = fx target 货币)，或带 rate(from, to) 方法的对象
+    """
+    src, dst = parse_unit(source), parse_unit(target)
+    factor = src.scale / dst.scale
+    if src.dims == dst.dims:
+        return factor
+    if src.currency and dst.currency:
+        return factor * _fx_rate(fx, src.currency, dst.currency)
+    raise UnitError(f"量纲不一致，无法从 {src.name or '无量纲'} 换算为 {dst.name or '无量纲'}")
+
+
+def convert(value: Any, source: UnitLike, target: UnitLike, fx: Any = None) -> Any:
+    """换算数值 (标量或 numpy 数组)"""
+    factor = conversion_factor(source, target, fx)
+    return value if factor == 1 else value * factor
+
+
+class Quantity:
+    """
+    带单位的数值
+
+    value 可以是标量或 numpy 数组；加减时右侧换算到左侧单位，乘除时单位相乘除。
+    与纯数字运算时数字视为无量纲。
+    """
+
+    __slots__ = ("value", "unit")
+
+    def __init__(self, value: Any, unit: UnitLike = ""):
+        self.value = value
+        self.unit = parse_unit(unit)
+
+    def to(self, unit: UnitLike, fx: Any = None) -> "Quantity":
+        """换算到指定单位"""
+        target = parse_unit(unit)
+        return Quantity(convert(self.value, self.unit, target, fx), target)
+
+    def to_base(self) -> "Quantity":
+        """换算到基础单位 (亿元 → 元)"""
+        return Quantity(self.value * self.unit.scale if self.unit.scale != 1 else self.value,
+                        Unit(self.unit.base, 1.0, self.unit.dims, self.unit.base))
+
+    # ---------- 运算 ----------
+
+    @staticmethod
+    def _wrap(other: Any) -> "Quantity":
+        return other if isinstance(other, Quantity) else Quantity(other, DIMENSIONLESS)
+
+    def _aligned(self, other: Any) -> Any:
+        if not isinstance(other, Quantity) and isinstance(other, numbers.Real) and other == 0:
+            return other    # 0 与任意单位兼容 (如 max(x, 0))
+        other = self._wrap(other)
+        if other.unit.dims != self.unit.dims:
+            raise UnitError(f"量纲不一致: {self.unit.name or '无量纲'} 与 {other.unit.name or '无量纲'} 不能相加减或比较")
+        factor = other.unit.scale / self.unit.scale
+        return other.value if factor == 1 else other.value * factor
+
+    def __add__(self, other: Any) -> "Quantity":
+        return Quantity(self.value + self._aligned(other), self.unit)
+
+    def __radd__(self, other: Any) -> "Quantity":
+        # sum() 的起始值 0 视为与自身同单位
+        if isinstance(other, numbers.Real) and other == 0:
+            return self
+        return self._wrap(other) + self
+
+    def __sub__(self, other: Any) -> "Quantity":
+        return Quantity(self.value - self._aligned(other), self.unit)
+
+    def __rsub__(self, other: Any) -> "Quantity":
+        return self._wrap(other) - self
+
+    def __mul__(self, other: Any) -> "Quantity":
+        other = self._wrap(other)
+        return Quantity(self.value * other.value, self.unit * other.unit)
+
+    def __rmul__(self, other: Any) -> "Quantity":
+        return self._wrap(other) * self
+
+    def __truediv__(self, other: Any) -> "Quantity":
+        other = self._wrap(other)
+        return Quantity(self.value / other.value, self.unit / other.unit)
+
+    def __rtruediv__(self, other: Any) -> "Quantity":
+        return self._wrap(other) / self
+
+    def __pow__(self, exponent: Any) -> "Quantity":
+        if isinstance(exponent, Quantity):
+            if not exponent.unit.dimensionless:
+                raise UnitError("指数必须无量纲")
+            exponent = exponent.value * exponent.unit.scale
+        if not self.unit.dimensionless and not float(exponent).is_integer():
+            raise UnitError(f"带量纲的数值 ({self.unit.name}) 只能取整数次幂")
+        if self.unit.dimensionless:
+            return Quantity((self.value * self.unit.scale) ** exponent, DIMENSIONLESS)
+        return Quantity(self.value ** exponent, self.unit ** int(exponent))
+
+    def __neg__(self) -> "Quantity":
+        return Quantity(-self.value, self.unit)
+
+    def __abs__(self) -> "Quantity":
+        return Quantity(abs(self.value), self.unit)
+
+    def _compare(self, other: Any, op) -> Any:
+        return op(self.value, self._aligned(other))
+
+    def __lt__(self, other): return self._compare(other, lambda a, b: a < b)
+    def __le__(self, other): return self._compare(other, lambda a, b: a <= b)
+    def __gt__(self, other): return self._compare(other, lambda a, b: a > b)
+    def __ge__(self, other): return self._compare(other, lambda a, b: a >= b)
+
+    def __eq__(self, other: Any) -> Any:
+        try:
+            return self._compare(other, lambda a, b: a == b)
+        except UnitError:
+            return False
+
+    __hash__ = None
+
+    # ---------- numpy ----------
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """支持表达式白名单函数用到的 ufunc (min / max / abs / sqrt / log / exp)"""
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        name = ufunc.__name__
+        if name in ("add", "subtract", "multiply", "true_divide", "power"):
+            a, b = inputs
+            op = {"add": "__add__", "subtract": "__sub__", "multiply": "__mul__",
+                  "true_divide": "__truediv__", "power": "__pow__"}[name]
+            return getattr(self._wrap(a), op)(b)
+        if name in ("minimum", "maximum"):
+            a, b = inputs
+            if isinstance(a, Quantity):
+                return Quantity(ufunc(a.value, a._aligned(b)), a.unit)
+            return Quantity(ufunc(b._aligned(a), b.value), b.unit)
+        if name in ("negative", "absolute"):
+            return Quantity(ufunc(self.value), self.unit)
+        if name == "sqrt":
+            if self.unit.dimensionless:
+                return Quantity(ufunc(self.value * self.unit.scale), DIMENSIONLESS)
+            if any(power % 2 for _, power in self.unit.dims):
+                raise UnitError(f"无法对 {self.unit.name} 开平方")
+            scale = math.sqrt(self.unit.scale)
+            dims = tuple((code, power // 2) for code, power in self.unit.dims)
+            return Quantity(ufunc(self.value), Unit(f"√{self.unit.name}", scale, dims, self.unit.base))
+        if name in ("log", "exp"):
+            if not self.unit.dimensionless:
+                raise UnitError(f"{name} 的参数必须无量纲，当前为 {self.unit.name}")
+            return Quantity(ufunc(self.value * self.unit.scale), DIMENSIONLESS)
+        return NotImplemented
+
+    def _plain(self) -> Any:
+        if not self.unit.dimensionless:
+            raise UnitError(f"带单位的数值 ({self.unit.name}) 不能直接转为数字，请先 .to() 或取 .value")
+        return self.value if self.unit.scale == 1 else self.value * self.unit.scale
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._plain(), dtype=dtype)
+
+    def __float__(self) -> float:
+        return float(self._plain())
+
+    def __repr__(self) -> str:
+        return f"Quantity({self.value!r}, {self.unit.name!r})"
+
+    def __str__(self) -> str:
+        if NUMPY_AVAILABLE and isinstance(self.value, np.ndarray):
+            return f"{self.value} {self.unit.name}".rstrip()
+        return format_quantity(self.value, self.unit)
+
+
+# ==================== 模型单位解析 ====================
+
+def infer_unit(formula: Any, values: Dict[str, Any], units: Dict[str, UnitLike]) -> Unit:
+    """
+    推断公式结果的单位: 用 Quantity 包装的代表值求值一次
+
+    Args:
+        formula: 公式函数或 Expression (按关键字参数调用)
+        values: 代表值 {变量名: 数值} (用于探测，只要求不触发定义域错误)
+        units: 变量单位 {变量名: 单位}
+    """
+    try:
+        result = formula(**{name: Quantity(value, units.get(name)) for name, value in values.items()})
+    except UnitError:
+        raise
+    except Exception as e:
+        raise UnitError(f"无法推断公式单位 (公式不支持 Quantity 运算): {e}") from e
+    if isinstance(result, Quantity):
+        return result.unit
+    return DIMENSIONLESS
+
+
+def resolve_units(formula: Any, assumptions: Dict[str, Any], unit: UnitLike,
+                  fx: Any = None) -> Tuple[Dict[str, float], float]:
+    """
+    解析模型单位 (每个模型只解析一次)
+
+    各输入先换算到基础单位 (万元 → 元, 万人 → 人)，因此 "元 + 万元" 这类混合数量级的加法也正确；
+    给出 fx 时外币输入同时换算为目标币种。再由 Quantity 探测求值得到结果单位与目标单位的换算系数。
+
+    Args:
+        formula: 公式函数或 Expression
+        assumptions: 假设字典 {名称: Assumption}，使用其 most_likely 与 unit
+        unit: 目标单位
+        fx: 跨币种汇率，见 conversion_factor
+
+    Returns:
+        (输入系数 {假设名: 换算到基础单位的倍数，只含不为 1 的项}, 结果换算系数)。
+        所有假设都未标注单位时不做换算，返回 ({}, 1.0)。
+    """
+    units = {name: parse_unit(getattr(a, "unit", "")) for name, a in assumptions.items()}
+    if all(u is DIMENSIONLESS for u in units.values()):
+        return {}, 1.0
+    target = parse_unit(unit)
+    scales, base_units = {}, {}
+    for name, u in units.items():
+        scale, base = u.scale, Unit(u.base, 1.0, u.dims, u.base)
+        if fx is not None and u.currency and target.currency and u.currency != target.currency:
+            # 外币输入直接换算为目标币种，公式内不同币种可以相加
+            scale *= _fx_rate(fx, u.currency, target.currency)
+            base = Unit(target.base, 1.0, target.dims, target.base)
+        scales[name], base_units[name] = scale, base
+    values = {name: a.most_likely * scales[name] for name, a in assumptions.items()}
+    source = infer_unit(formula, values, base_units)
+    input_scales = {name: scale for name, scale in scales.items() if scale != 1}
+    return input_scales, conversion_factor(source, target, fx)
+
+
+def scale_expression(source: str, input_scales: Dict[str, float], factor: float = 1.0) -> str:
+    """
+    把输入系数与结果系数并入表达式字符串: "a*b" → "(a*10000.0*b)*1e-08"
+
+    变量替换在语法树上进行，函数名不受影响。
+    """
+    tree = ast.parse(source, mode="eval")
+
+    class _Scale(ast.NodeTransformer):
+        def visit_Name(self, node):
+            if node.id in input_scales and isinstance(node.ctx, ast.Load):
+                return ast.BinOp(left=node, op=ast.Mult(), right=ast.Constant(float(input_scales[node.id])))
+            return node
+
+        def visit_Call(self, node):
+            node.args = [self.visit(arg) for arg in node.args]
+            return node
+
+    body = ast.unparse(ast.fix_missing_locations(_Scale().visit(tree)).body)
+    return body if factor == 1 else f"({body})*{factor!r}"
+
+
+# ==================== 格式化 ====================
+
+def _scaled(n: float) -> Tuple[float, float]:
+    magnitude = abs(n)
+    for scale in (1e12, 1e8, 1e4):
+        if magnitude >= scale:
+            return n / scale, scale
+    return n, 1.0
+
+
+def format_number(n: float, digits: int = 2) -> str:
+    """
+    大数字格式化: 1.23万 / 4.56亿 / 7.89万亿 (负数按绝对值分档)
+
+    1 万以下的整数不显示小数位 (如 "4250")。
+    """
+    value, scale = _scaled(n)
+    if scale == 1.0:
+        if isinstance(n, numbers.Integral) or (isinstance(n, float) and n.is_integer()):
+            return f"{n:.0f}"
+        return f"{n:.{digits}f}"
+    return f"{value:.{digits}f}{_DISPLAY_PREFIXES[scale]}"
+
+
+def format_quantity(value: float, unit: UnitLike = "", digits: int = 2) -> str:
+    """
+    带单位格式化，数量级前缀并入单位: (6.375e9, "元") → "63.75 亿元"，(3e4, "亿元") → "3.00 万亿元"
+
+    单位无法合并前缀时 (如 "USD" / "元/人") 退化为 "数字 单位"。
+    """
+    u = parse_unit(unit)
+    if not u.name:
+        return format_number(value, digits)
+    merge = u.base and u.name.endswith(u.base) and u.base not in ("USD", "EUR", "HKD", "JPY", "GBP", "CNY", "RMB")
+    if merge:
+        scaled, scale = _scaled(value)
+        total = u.scale / _MASS_UNITS.get(u.base, 1.0) * scale  # 数量级前缀部分 (万吨 → 1e4)
+        for prefix_scale, prefix in ((1.0, ""), *_DISPLAY_PREFIXES.items()):
+            if total == prefix_scale:
+                number = format_number(scaled, digits) if scale == 1.0 else f"{scaled:.{digits}f}"
+                return f"{number} {prefix}{u.base}"
+    return f"{format_number(value, digits)} {u.name}"